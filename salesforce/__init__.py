@@ -22,3 +22,11 @@ from salesforce.dbapi.exceptions import (  # NOQA pylint:disable=unused-import,u
 __version__ = "5.2"
 
 log = logging.getLogger(__name__)
+
+
+def __getattr__(name: str) -> object:
+    # lazy imports of tools that require initialized Django
+    if name in ('gather', 'lazy_count', 'graph'):
+        from salesforce import utils  # pylint:disable=import-outside-toplevel
+        return getattr(utils, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
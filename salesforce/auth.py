@@ -23,6 +23,7 @@ import logging
 import os
 import re
 import threading
+import time
 import urllib
 
 import requests
@@ -37,6 +38,7 @@ from salesforce.dbapi.exceptions import (
     import_string,
 )
 from salesforce.dbapi.exceptions import SalesforceError  # noqa unused # common superclass of above errors
+from salesforce.dbapi.metrics import metrics_registry
 
 log = logging.getLogger(__name__)
 
@@ -150,6 +152,18 @@ class SalesforceAuth(AuthBase, ABC):
                 raise OperationalError("'HOST' key in '%s' database settings should be a URL: %s" %
                                        (self.db_alias, e))
 
+    def auth_request(self, url: str, session: Any = None, **kwargs: Any) -> requests.Response:
+        """POST an authentication request measured by metrics (see salesforce.dbapi.metrics)"""
+        metrics = metrics_registry.get(self.db_alias)
+        start = time.monotonic()
+        try:
+            response = (session or requests).post(url, **kwargs)
+        except requests.exceptions.RequestException as exc:
+            metrics.observe('auth', 'POST', type(exc).__name__, time.monotonic() - start)
+            raise
+        metrics.observe('auth', 'POST', response.status_code, time.monotonic() - start)
+        return response
+
     @staticmethod
     def create_subclass_instance(db_alias: str, settings_dict: Dict[str, Any],
                                  _session: Optional[requests.Session] = None) -> 'SalesforceAuth':
@@ -291,10 +305,10 @@ class SalesforcePasswordAuth(StaticGlobalAuth):
         }
         time_statistics.update_callback(url, self.ping_connection)
         try:
-            response = self._session.post(url, data=auth_params, timeout=3)
+            response = self.auth_request(url, session=self._session, data=auth_params, timeout=3)
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
             log.info(f"Login: network error db={self.db_alias}: {exc}")
-            response = self._session.post(url, data=auth_params, timeout=6)
+            response = self.auth_request(url, session=self._session, data=auth_params, timeout=6)
         return self.checked_auth_response(response)
 
     def ping_connection(self) -> None:
@@ -379,7 +393,7 @@ class SimpleSfPasswordAuth(StaticGlobalAuth):
         log.info("authentication to %s as %s", settings_dict['HOST'], settings_dict['USER'])
         if settings_dict['HOST'] not in self._session.adapters:
             self._session.mount(settings_dict['HOST'], HTTPAdapter(max_retries=get_max_retries()))
-        response = self._session.post(url, request_body, headers=request_headers)
+        response = self.auth_request(url, session=self._session, data=request_body, headers=request_headers)
         if response.status_code != 200:
             raise SalesforceAuthError("login failed for user '%s': %s" % (
                 self.settings_dict['USER'], tag_content('faultstring'))
@@ -427,9 +441,12 @@ class SfdxWebAuth(StaticGlobalAuth):
         """Run a SFDX command. Don't raise on the expected error names (comma delimited)"""
         # not intercept OSError e.g. file not found - raise directly
         # stderr is not redirected, because it can be used for some interactive dialogs
+        start = time.monotonic()
         with Popen(command, stdout=PIPE) as proc:
             stdout, _ = proc.communicate()
             returncode = proc.returncode
+        # the status of a command is its exit code
+        metrics_registry.get(self.db_alias).observe('auth', 'sfdx', returncode, time.monotonic() - start)
 
         if returncode != 0:
             self.data = {}
@@ -534,7 +551,7 @@ class RefreshTokenAuth(StaticGlobalAuth):
             refresh_token=refresh_token,
         ))
         headers = {'Content-type': 'application/x-www-form-urlencoded'}
-        response = requests.post(url, data=data, headers=headers)
+        response = self.auth_request(url, data=data, headers=headers)
         try:
             auth_data = self.checked_auth_response(response)
         except SalesforceAuthError:
@@ -632,7 +649,7 @@ class RefreshTokenAuth(StaticGlobalAuth):
             format='json',
         ))
         headers = {'Content-type': 'application/x-www-form-urlencoded'}
-        response = requests.post(url, data=data, headers=headers)
+        response = self.auth_request(url, data=data, headers=headers)
         auth_data = self.checked_auth_response(response)
         return auth_data
 
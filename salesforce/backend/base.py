@@ -24,6 +24,7 @@ from salesforce.backend.schema import DatabaseSchemaEditor
 # from django.db.backends.signals import connection_created
 from salesforce.backend.utils import CursorWrapper, async_unsafe
 from salesforce.dbapi import driver as Database
+from salesforce.dbapi.async_driver import AsyncConnection, get_async_connection
 from salesforce.dbapi.driver import IntegrityError, DatabaseError, SalesforceError  # NOQA pylint:disable=unused-import
 
 if TYPE_CHECKING:
@@ -100,6 +101,11 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         # simulated only a connection interface without connecting really
         return Database.connect(settings_dict=conn_params, alias=self.alias)
 
+    def get_async_connection(self) -> 'AsyncConnection':
+        """Get an asyncio connection for the running event loop (it requires the package "httpx")"""
+        enterprise.check_license_in_latest_django()
+        return get_async_connection(self.alias, settings_dict=self.get_connection_params())
+
     def init_connection_state(self):
         pass  # nothing to init
 
@@ -7,11 +7,18 @@
 """
 Generate queries using the SOQL dialect.  (like django.db.models.sql.compiler and  django.db.models.sql.where)
 """
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import as_completed
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import copy
+import heapq
 import re
 import warnings
-from django.core.exceptions import EmptyResultSet
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, FieldError
 from django.db import NotSupportedError
+from django.db.models import Q
+from django.db.models.expressions import Col
 from django.db.models.sql import compiler as sql_compiler, where as sql_where, datastructures
 from django.db.models.sql.constants import CURSOR, GET_ITERATOR_CHUNK_SIZE, MULTI, NO_RESULTS, SINGLE
 from django.db.models.sql.where import AND
@@ -19,9 +26,13 @@ from django.db.transaction import TransactionManagementError
 
 import salesforce.backend.models_lookups   # noqa pylint:disable=unused-import # required for activation of lookups
 from salesforce.backend import DJANGO_30_PLUS, DJANGO_31_PLUS, DJANGO_40_PLUS, DJANGO_42_PLUS, DJANGO_52_PLUS
+from salesforce.backend import query_cache
 from salesforce.backend.utils import FullResultSet
 from salesforce.dbapi import DatabaseError
+from salesforce.dbapi.common import LRUCache
+from salesforce.dbapi.driver import RETRIEVE_BATCH_SIZE, connection_thread_pool
 from salesforce.dbapi.exceptions import SalesforceWarning
+from salesforce.dbapi.partitions import split_range
 # pylint:disable=no-else-return,too-many-branches,too-many-locals
 
 if DJANGO_52_PLUS:
@@ -41,12 +52,67 @@ objects_needing_minimal_aliases = [
 ]
 
 
+def convert_csv_boolean(value: Any, expression: Any, connection: Any) -> Any:
+    # pylint:disable=unused-argument
+    return value == 'true' if isinstance(value, str) else value
+
+
+def convert_csv_integer(value: Any, expression: Any, connection: Any) -> Any:
+    # pylint:disable=unused-argument
+    return int(float(value)) if isinstance(value, str) else value
+
+
+BULK_CSV_CONVERTERS = {
+    'BooleanField': convert_csv_boolean,
+    'IntegerField': convert_csv_integer,
+    'BigIntegerField': convert_csv_integer,
+    'SmallIntegerField': convert_csv_integer,
+    'PositiveIntegerField': convert_csv_integer,
+    'PositiveSmallIntegerField': convert_csv_integer,
+}  # type: Dict[str, Callable[[Any, Any, Any], Any]]
+
+
+# internal types of Django fields that are ordered equally by SOQL and by Python (not text, not Id)
+MERGEABLE_INTERNAL_TYPES = {
+    'BooleanField', 'DateField', 'DateTimeField', 'TimeField', 'DecimalField', 'FloatField', 'IntegerField',
+    'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+}
+
+# the maximal number of levels of child-to-parent relationships in SOQL, e.g. 5 in "A.B.C.D.E.F.Name"
+MAX_RELATIONSHIP_DEPTH = 5
+
+# Caches of compilation steps that depend only on the structure of a query, not on parameters.
+# The size is `settings.SF_SOQL_CACHE_SIZE` (0 = disabled)
+# topology of joins: (root_aliases, soql_trans) by alias map items
+topology_cache = LRUCache('SF_SOQL_CACHE_SIZE', 256)
+# translated SQL fields to SOQL by (sql_field, topology, minimal_aliases)
+fix_field_cache = LRUCache('SF_SOQL_CACHE_SIZE', 256)
+
+# types of columns for the decoder of rows in the driver by internal types of Django fields
+DECODER_COLUMN_TYPES = {
+    'DateTimeField': 'datetime',
+    'DateField': 'date',
+}
+
+
 class SfParams:  # like an immutable DataClass: clone when updating
     def __init__(self):
         self.query_all = False
         self.all_or_none = None  # type: Optional[bool]
         self.edge_updates = False
         self.minimal_aliases = False
+        self.prefetch_chunks = 0
+        self.bulk_api = None  # type: Optional[bool]
+        self.bulk_query = False
+        # (partitions, key, preserve_order) for parallel queries
+        self.parallel = None  # type: Optional[Tuple[int, str, bool]]
+        # the first chunk of the result if it has been fetched yet by `salesforce.utils.gather()`
+        self.first_chunk = None  # type: Optional[Dict[str, Any]]
+        # seconds of caching the result (see salesforce.backend.query_cache), None = Meta.sf_cache_ttl
+        self.cache_ttl = None  # type: Optional[int]
+        # compiled parent-to-child subqueries "SELECT ... FROM <relationship name>" with parameters
+        # that are added as the last columns (see SalesforceQuerySet.prefetch_related)
+        self.child_subqueries = []  # type: List[Tuple[str, Sequence[Any]]]
 
 
 class SQLCompiler(sql_compiler.SQLCompiler):
@@ -59,6 +125,7 @@ class SQLCompiler(sql_compiler.SQLCompiler):
         super().__init__(*args, **kwargs)
         self.sf_params = SfParams()
         self.root_aliases = []  # type: List[str]
+        self._fix_field_context = None  # type: Optional[Tuple[Any, ...]]
 
     def set_sf_params(self, sf_params: SfParams) -> 'SQLCompiler':
         self.sf_params = sf_params
@@ -96,12 +163,27 @@ class SQLCompiler(sql_compiler.SQLCompiler):
         """Translate the field name from sql join "alias.name" to SOQL tree "object_1.object_2...name"."""
         # debug_: 1 = print what is recompiled
         soql_trans = self.query_topology()
+        if debug_ or self.soql_trans is None:  # not cached if debugging or without joins yet
+            return self._sf_fix_field(sql_field, soql_trans, debug_)[0]
+        if self._fix_field_context is None:
+            self._fix_field_context = (frozenset(soql_trans.items()), tuple(self.root_aliases),
+                                       self.sf_params.minimal_aliases)
+        key = (sql_field, self._fix_field_context)
+        ret = fix_field_cache.get(key)
+        if ret is None:
+            ret, ok = self._sf_fix_field(sql_field, soql_trans)
+            if ok:  # not cached after a warning
+                fix_field_cache.put(key, ret)
+        return ret
+
+    def _sf_fix_field(self, sql_field: str, soql_trans: Dict[str, str], debug_: int = 0) -> Tuple[str, bool]:
+        """Translate the field, get also False if it can not be recompiled"""
         if sql_field.startswith('('):
-            return sql_field  # compiled and fixed yet
+            return sql_field, True  # compiled and fixed yet
         if re.match(r'[\w.]+$', sql_field) and len(sql_field.split('.')) == 2:
             pre, field, post = '', sql_field, ''  # very easy fix for a simple 'select' field
         elif sql_field.startswith('COUNT(Id)') and re.match(r'^COUNT\(Id\)(?: \w+)?$', sql_field, re.ASCII):
-            return sql_field  # not necessary to fix
+            return sql_field, True  # not necessary to fix
         else:
             match = re.match(r'^((?:\w+\()*)'     # optional some nested functions with one parameter
                              r'((?:\w+\.)*\w+)'   # table.field
@@ -116,7 +198,7 @@ class SQLCompiler(sql_compiler.SQLCompiler):
             if not match or not ok:
                 warnings.warn("sf_fix_field: Can not recompile unexpected sql: {!r}".format(sql_field),
                               SalesforceWarning)
-                return sql_field
+                return sql_field, False
         # fix the field
         tab_name, field_name = field.split('.', 1)
         if self.sf_params.minimal_aliases or tab_name in objects_needing_minimal_aliases:
@@ -134,7 +216,7 @@ class SQLCompiler(sql_compiler.SQLCompiler):
 
         if debug_:
             print('** sf_fix_field: {!r} -> {!r}'.format(sql_field, ret))
-        return ret
+        return ret, True
 
     # patched and simplified the parend method  # pylint:disable=no-else-return
     def execute_sql(self,
@@ -165,8 +247,31 @@ class SQLCompiler(sql_compiler.SQLCompiler):
             else:
                 return
 
+        cache_ttl = self.get_cache_ttl() if result_type in (MULTI, SINGLE) else None
+        if cache_ttl:
+            return self.execute_cached_sql(sql, params, result_type, cache_ttl, chunk_size)
+        return self.execute_compiled_sql(sql, params, result_type, chunked_fetch, chunk_size)
+
+    def execute_compiled_sql(self, sql: str, params: Sequence[Any], result_type: str, chunked_fetch: bool,
+                             chunk_size: int) -> Any:
+        """The part of execute_sql() after compilation"""
+        if result_type == MULTI and self.sf_params.parallel and self.can_split_query():
+            rows = self.execute_parallel_sql(chunk_size)
+            if rows is not None:
+                return rows
+        if result_type == MULTI:
+            ids = self.retrieve_ids()
+            if ids is not None:
+                return self.execute_retrieve(sql, params, ids)
+            if self.can_split_query():
+                split_queries = self.split_in_list_queries()
+                if split_queries:
+                    return self.execute_in_list_split(split_queries, chunk_size)
+
         cursor = self.connection.cursor()
-        cursor.prepare_query(self.query)
+        # chunks of `.iterator(chunk_size)` are requested from Salesforce by the same size
+        cursor.prepare_query(self.query, batch_size=chunk_size if chunked_fetch else None,
+                             column_types=self.get_column_types())
         cursor.execute(sql, params)
 
         if not result_type or result_type == 'cursor':
@@ -199,6 +304,281 @@ class SQLCompiler(sql_compiler.SQLCompiler):
         return result
         # pylint:enable=no-else-return
 
+    def get_cache_ttl(self) -> Optional[int]:
+        if self.sf_params.cache_ttl is not None:
+            return self.sf_params.cache_ttl
+        return getattr(self.query.get_meta(), 'sf_cache_ttl', None) if self.query.model else None
+
+    def execute_cached_sql(self, sql: str, params: Sequence[Any], result_type: str, cache_ttl: int,
+                           chunk_size: int) -> Any:
+        """Execute the query by the read-through cache of results (see salesforce.backend.query_cache)"""
+        tables = [x.table_name for x in self.query.alias_map.values()]
+        if self.query.model:  # e.g. an aggregation over a subquery of the model
+            tables.append(self.query.get_meta().db_table)
+        key = query_cache.cache_key(self.connection.alias, tables, sql, params, result_type,
+                                    self.sf_params.query_all)
+
+        def query() -> Any:
+            result = self.execute_compiled_sql(sql, params, result_type, False, chunk_size)
+            if result_type == SINGLE:
+                return result
+            return [row for rows in result for row in rows]
+
+        value = query_cache.get_or_query(key, cache_ttl, query)
+        return value if result_type == SINGLE else [value]
+
+    def get_converters(self, expressions):
+        converters = super().get_converters(expressions)
+        if self.sf_params.bulk_query:
+            # values from CSV of Bulk API are strings, that are converted before normal converters
+            for i, expression in enumerate(expressions):
+                converter = expression and BULK_CSV_CONVERTERS.get(expression.output_field.get_internal_type())
+                if converter:
+                    other_converters = converters[i][0] if i in converters else []
+                    converters[i] = ([converter] + other_converters, expression)
+        return converters
+
+    def get_column_types(self) -> List[Optional[str]]:
+        """Types of selected columns for the decoder of rows in the driver (see DecoderPlan)
+
+        The compiler must be used by as_sql() before.
+        """
+        ret = []  # type: List[Optional[str]]
+        for expression, _, _ in self.select or ():  # not a select in update queries
+            try:
+                internal_type = expression.output_field.get_internal_type()
+            except (AttributeError, FieldError):
+                ret.append(None)
+            else:
+                ret.append(DECODER_COLUMN_TYPES.get(internal_type, 'raw'))
+        return ret
+
+    def can_split_query(self) -> bool:
+        """Check that the query result is a simple union of results of split queries"""
+        query = self.query
+        return (not query.low_mark and query.high_mark is None and not query.group_by and not query.distinct
+                and not query.combinator and not self.query.model._meta.sf_tooling_api_model
+                and not any(getattr(x, 'contains_aggregate', False) for x in query.annotations.values()))
+
+    def execute_parallel_sql(self, chunk_size: int = GET_ITERATOR_CHUNK_SIZE) -> Optional[Iterator[List[Any]]]:
+        """Run the query by more queries on disjoint ranges of a key field in parallel
+
+        The compiler must be used by as_sql() before, because the rows are
+        compatible with its "select". Get None if the ordering can not be preserved by a merge.
+        """
+        assert self.sf_params.parallel
+        partitions, key, preserve_order = self.sf_params.parallel
+        opts = self.query.get_meta()
+        key_fields = [x for x in opts.concrete_fields if x.column == key]
+        if key not in ('Id', 'CreatedDate') or not key_fields:
+            raise NotSupportedError("The model {} has no field {!r} for parallel queries".format(
+                opts.object_name, key))
+        key_name = key_fields[0].name
+        merge_key = None  # type: Optional[Callable[[Any], Any]]
+        reverse = False
+        if preserve_order and self.get_order_by():
+            try:
+                merge_key, reverse = self.get_merge_key()
+            except NotSupportedError as exc:
+                warnings.warn("A parallel query with preserve_order is run by one query: {}".format(exc),
+                              SalesforceWarning)
+                return None
+        low = self._key_bound(key_name, descending=False)
+        high = self._key_bound(key_name, descending=True)
+        if low is None or high is None:
+            return iter([])
+        bounds = split_range(low, high, partitions)
+        queries = []
+        for i in range(len(bounds) + 1):
+            filters = {}
+            if i > 0:
+                filters[key_name + '__gte'] = bounds[i - 1]
+            if i < len(bounds):
+                filters[key_name + '__lt'] = bounds[i]
+            query = self._split_query_clone()
+            query.add_q(Q(**filters))
+            if preserve_order and not merge_key:
+                query.add_ordering(key_name)
+            queries.append(query.get_compiler(using=self.using).as_sql())
+        return self.execute_split_sql(queries, ordered=preserve_order, merge_key=merge_key, reverse=reverse,
+                                      chunk_size=chunk_size)
+
+    def split_in_list_queries(self) -> Optional[List[Tuple[str, Sequence[Any]]]]:
+        """Compile sub-queries over slices of the longest IN list if it is too long for one query
+
+        The maximal size of IN list is `settings.SF_MAX_IN_LIST_SIZE` (default None = not split).
+        Only an IN lookup in the top level AND condition is split and duplicate values are removed,
+        therefore the results of sub-queries are disjoint. The results are merged by the ordering
+        if possible (see get_merge_key), otherwise they are in the order of sub-queries.
+        """
+        max_size = getattr(settings, 'SF_MAX_IN_LIST_SIZE', None)  # type: Optional[int]
+        where = self.query.where
+        if (not max_size or where.connector != AND or where.negated
+                or self.sf_params.bulk_query or self.sf_params.first_chunk):
+            return None
+        candidates = [(len(child.rhs), i) for i, child in enumerate(where.children)
+                      if getattr(child, 'lookup_name', None) == 'in' and isinstance(child.rhs, (list, tuple))
+                      and len(child.rhs) > max_size]
+        if not candidates:
+            return None
+        _, index = max(candidates)
+        child = where.children[index]
+        try:
+            values = list(dict.fromkeys(child.rhs))
+        except TypeError:  # unhashable
+            values = list(child.rhs)
+        queries = []
+        for i in range(0, len(values), max_size):
+            query = self._split_query_clone()
+            query.where.children[index] = type(child)(child.lhs, values[i:i + max_size])
+            queries.append(query.get_compiler(using=self.using).as_sql())
+        return queries
+
+    def execute_in_list_split(self, queries: List[Tuple[str, Sequence[Any]]],
+                              chunk_size: int = GET_ITERATOR_CHUNK_SIZE) -> Iterator[List[Any]]:
+        """Run sub-queries of a split IN list in parallel, merge them by the ordering if possible"""
+        merge_key = None  # type: Optional[Callable[[Any], Any]]
+        reverse = False
+        if self.get_order_by():
+            try:
+                merge_key, reverse = self.get_merge_key()
+            except NotSupportedError as exc:
+                warnings.warn("The ordering of a query with a split IN list is not preserved: {}".format(exc),
+                              SalesforceWarning)
+        return self.execute_split_sql(queries, ordered=True, merge_key=merge_key, reverse=reverse,
+                                      chunk_size=chunk_size)
+
+    def execute_split_sql(self, queries: List[Tuple[str, Sequence[Any]]], ordered: bool = False,
+                          merge_key: Optional[Callable[[Any], Any]] = None, reverse: bool = False,
+                          chunk_size: int = GET_ITERATOR_CHUNK_SIZE) -> Iterator[List[Any]]:
+        """Run compiled split queries by threads over the current connection, get chunks of rows
+
+        The results are in the order of completion, or in the order of queries if `ordered`,
+        or merged by `merge_key` (an ordering of each query result by the same key is expected).
+        """
+        self.connection.sf_session  # pylint:disable=pointless-statement  # to connect
+        raw_connection = self.connection.connection
+        query_all = self.sf_params.query_all
+        column_types = self.get_column_types()
+
+        def fetch(sql: str, params: Sequence[Any]) -> List[Any]:
+            with raw_connection.cursor() as cursor:
+                cursor.execute(sql, params, query_all=query_all, column_types=column_types)
+                return cursor.fetchall()
+
+        with connection_thread_pool(raw_connection, len(queries)) as pool:
+            futures = [pool.submit(fetch, sql, params) for sql, params in queries]
+            if merge_key:
+                results = [future.result() for future in futures]
+                merged = heapq.merge(*results, key=merge_key, reverse=reverse)
+                yield from iter(lambda: list(islice(merged, chunk_size)), [])
+            else:
+                for future in (futures if ordered else as_completed(futures)):
+                    rows = future.result()
+                    if rows:
+                        yield rows
+
+    def retrieve_ids(self) -> Optional[List[str]]:
+        """Get Ids if the query is a pure lookup "pk__in=[...]" that should be run by sObject Collections
+
+        The lookup must have at least `settings.SF_RETRIEVE_THRESHOLD` Ids (default 200, None = disabled)
+        and only fields of the model can be selected. The compiler must be used by as_sql() before.
+        """
+        threshold = getattr(settings, 'SF_RETRIEVE_THRESHOLD', 200)  # type: Optional[int]
+        query = self.query
+        where = query.where
+        if (threshold is None or query.low_mark or query.high_mark is not None or query.distinct
+                or query.group_by or query.combinator or query.annotations or query.extra
+                or self.sf_params.query_all or self.sf_params.bulk_query or self.sf_params.first_chunk
+                or self.sf_params.child_subqueries
+                or query.get_meta().sf_tooling_api_model or self.get_order_by()
+                or where.connector != AND or where.negated or len(where.children) != 1):
+            return None
+        child = where.children[0]
+        if not (getattr(child, 'lookup_name', None) == 'in' and isinstance(child.rhs, (list, tuple))
+                and isinstance(child.lhs, Col) and not child.bilateral_transforms
+                and child.lhs.target.column == 'Id' and child.lhs.target.model is query.model
+                and len(child.rhs) >= threshold):
+            return None
+        if not all(isinstance(expr, Col) and expr.alias == query.base_table for expr, _, _ in self.select):
+            return None
+        return list(dict.fromkeys(x for x in child.rhs if isinstance(x, str)))
+
+    def execute_retrieve(self, sql: str, params: Sequence[Any], ids: List[str]) -> Iterator[List[Any]]:
+        """Run a lookup by Ids by sObject Collections retrieve requests, in parallel if there are more requests
+
+        The rows are the same as by the compiled query `sql`.
+        """
+        self.connection.sf_session  # pylint:disable=pointless-statement  # to connect
+        raw_connection = self.connection.connection
+        sobject = self.query.get_meta().db_table
+        fields = [expr.target.column for expr, _, _ in self.select]
+        batches = [ids[i:i + RETRIEVE_BATCH_SIZE] for i in range(0, len(ids), RETRIEVE_BATCH_SIZE)]
+        column_types = self.get_column_types()
+
+        def fetch(batch: List[str]) -> List[Any]:
+            records = [x for x in raw_connection.sobject_collections_retrieve(sobject, batch, fields) if x]
+            with raw_connection.cursor() as cursor:
+                cursor.execute(sql, params, first_chunk={'totalSize': len(records), 'done': True, 'records': records},
+                               column_types=column_types)
+                return cursor.fetchall()
+
+        if len(batches) <= 1:
+            rows = fetch(batches[0]) if batches else []
+            if rows:
+                yield rows
+            return
+        with connection_thread_pool(raw_connection, len(batches)) as pool:
+            for future in [pool.submit(fetch, batch) for batch in batches]:
+                rows = future.result()
+                if rows:
+                    yield rows
+
+    def get_merge_key(self) -> Tuple[Callable[[Any], Any], bool]:
+        """Get a key function for merging of rows ordered by the query ordering, and the direction
+
+        Only not null numeric, date, time and boolean fields are compared equally by SOQL and by Python.
+        Text is ordered by SOQL case-insensitively by a collation and null values are placed
+        by the direction of ordering.
+        """
+        positions = []
+        for expr, _ in self.get_order_by():
+            ordered_expr = getattr(expr, 'expression', expr)
+            matching = [i for i, (sel_expr, _, _) in enumerate(self.select) if sel_expr == ordered_expr]
+            if not matching:
+                raise NotSupportedError("Results of split queries can be merged only by selected fields, "
+                                        "not by {}".format(ordered_expr))
+            if not (isinstance(ordered_expr, Col) and not ordered_expr.target.null
+                    and ordered_expr.target.get_internal_type() in MERGEABLE_INTERNAL_TYPES):
+                raise NotSupportedError("Results of split queries can be merged only by not null numeric, "
+                                        "date or boolean fields, not by {}".format(ordered_expr))
+            positions.append((matching[0], getattr(expr, 'descending', False)))
+        directions = {descending for _, descending in positions}
+        if len(directions) > 1:
+            raise NotSupportedError("Results of split queries can not be merged by mixed ordering directions")
+
+        def merge_key(row: Sequence[Any]) -> Tuple[Any, ...]:
+            return tuple(row[i] for i, _ in positions)
+        return merge_key, directions.pop()
+
+    def _split_query_clone(self) -> Any:
+        query = self.query.clone()
+        query.sf_params = copy.copy(self.sf_params)
+        query.sf_params.parallel = None
+        return query
+
+    def _key_bound(self, name: str, descending: bool) -> Any:
+        """Get the minimal or maximal value of the field in the query"""
+        query = self._split_query_clone()
+        query.sf_params.child_subqueries = []
+        query.clear_ordering(True)
+        query.clear_select_clause()
+        query.add_fields([name])
+        query.add_ordering(('-' if descending else '') + name)
+        query.set_limits(0, 1)
+        row = query.get_compiler(using=self.using).execute_sql(SINGLE)
+        return row[0] if row else None
+
     def as_sql(self, with_limits=True, with_col_aliases=False
                ) -> Tuple[str, Sequence[Any]]:  # pylint:disable=arguments-differ
 
@@ -261,6 +641,9 @@ class SQLCompiler(sql_compiler.SQLCompiler):
                     col_idx += 1
                 params.extend(s_params)
                 out_cols.append(s_sql)
+            for s_sql, s_params in self.sf_params.child_subqueries:
+                params.extend(s_params)
+                out_cols.append('(%s)' % s_sql)
 
             result.append(', '.join(out_cols))
 
@@ -369,6 +752,12 @@ class SQLCompiler(sql_compiler.SQLCompiler):
                     alias_map_items.append((v.parent_alias, v.table_name, v.join_cols, v.table_alias))
                 else:
                     alias_map_items.append((None, v.table_name, None, v.table_alias))
+        cache_key = tuple(alias_map_items)
+        cached = topology_cache.get(cache_key)
+        if cached is not None:
+            self.root_aliases = list(cached[0])
+            self.soql_trans = dict(cached[1])
+            return self.soql_trans
         # Analyze
         alias2table = {}  # Dict[str, str]
         side_l, side_r = set(), set()
@@ -417,7 +806,12 @@ class SQLCompiler(sql_compiler.SQLCompiler):
                         new_work.add(rhs)
             work_lhses = new_work
         assert len(soql_trans) == len(alias_map_items)
+        too_deep = [x for x in soql_trans.values() if x.count('.') > MAX_RELATIONSHIP_DEPTH]
+        if too_deep:
+            raise NotSupportedError("Only {} levels of child-to-parent relationships are supported by SOQL, "
+                                    "not {!r}".format(MAX_RELATIONSHIP_DEPTH, max(too_deep, key=len)))
         self.soql_trans = soql_trans
+        topology_cache.put(cache_key, (tuple(self.root_aliases), dict(soql_trans)))
         return self.soql_trans
 
 
@@ -54,7 +54,13 @@ class SalesforceManager(manager.Manager, Generic[_T]):
            query_all: Optional[bool] = None,
            all_or_none: Optional[bool] = None,
            edge_updates: Optional[bool] = None,
-           minimal_aliases: Optional[bool] = None) -> 'query.SalesforceQuerySet[_T]':
+           minimal_aliases: Optional[bool] = None,
+           prefetch_chunks: Optional[int] = None,
+           bulk_api: Optional[bool] = None,
+           bulk_query: Optional[bool] = None,
+           cache_ttl: Optional[int] = None,
+           max_depth: Optional[int] = None,
+           ) -> 'query.SalesforceQuerySet[_T]':
         # not dry, but explicit due to preferring type check of user code
         qs = self.get_queryset()
         assert isinstance(qs, query.SalesforceQuerySet)
@@ -63,4 +69,15 @@ class SalesforceManager(manager.Manager, Generic[_T]):
             all_or_none=all_or_none,
             edge_updates=edge_updates,
             minimal_aliases=minimal_aliases,
+            prefetch_chunks=prefetch_chunks,
+            bulk_api=bulk_api,
+            bulk_query=bulk_query,
+            cache_ttl=cache_ttl,
+            max_depth=max_depth,
         )
+
+    def sf_parallel(self, partitions: int = 4, key: str = 'Id', preserve_order: bool = False
+                    ) -> 'query.SalesforceQuerySet[_T]':
+        qs = self.get_queryset()
+        assert isinstance(qs, query.SalesforceQuerySet)
+        return qs.sf_parallel(partitions=partitions, key=key, preserve_order=preserve_order)
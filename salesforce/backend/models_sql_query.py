@@ -4,12 +4,13 @@ Customized Query, RawQuery  (like django.db.models.sql.query)
 import copy
 from typing import Any, cast, Generic, Optional, Sequence, Tuple, Type, TypeVar
 from django.conf import settings
+from django.db import NotSupportedError
 from django.db.models import Count, Model
 from django.db.models.sql import Query, RawQuery, constants
 import django
 
 from salesforce.backend import DJANGO_40_PLUS, DJANGO_42_PLUS
-from salesforce.backend.compiler import SfParams, SQLCompiler
+from salesforce.backend.compiler import MAX_RELATIONSHIP_DEPTH, SfParams, SQLCompiler
 from salesforce.dbapi.driver import arg_to_soql
 
 _T = TypeVar("_T", bound=Model, covariant=True)
@@ -86,7 +87,12 @@ class SalesforceQuery(Query, Generic[_T]):
            query_all: Optional[bool] = None,
            all_or_none: Optional[bool] = None,
            edge_updates: Optional[bool] = None,
-           minimal_aliases: Optional[bool] = None
+           minimal_aliases: Optional[bool] = None,
+           prefetch_chunks: Optional[int] = None,
+           bulk_api: Optional[bool] = None,
+           bulk_query: Optional[bool] = None,
+           cache_ttl: Optional[int] = None,
+           max_depth: Optional[int] = None,
            ) -> 'SalesforceQuery[_T]':
         """
         Set additional parameters for a queryset
@@ -102,6 +108,8 @@ class SalesforceQuery(Query, Generic[_T]):
                 Default: No following block after an error is tried, but also no rollback is done
                     in a block with some errors. (This neutral behavior can not be set back after
                     True or False.)
+                Blocks are sent by parallel threads (`settings.SF_PARALLEL_MAX_WORKERS`), therefore
+                blocks started before an error are finished. It is valid also for `update()` and `delete()`.
 
             `edge_updates`: methods update() and delete() on querysets with related tables
                 could be unsafe if the queryset is not checked. It is safe to rewrite it to two
@@ -110,6 +118,31 @@ class SalesforceQuery(Query, Generic[_T]):
 
             `minimal_aliases`: Fields are compiled to a simple "field_name" if pssible without a dot,
                 not to a "table_alias.field_name".
+
+            `prefetch_chunks`: The number of next chunks of a big query result (up to 2000 rows
+                in a chunk) that are read ahead by a background thread while the current chunk
+                is processed. The default is 0: no read ahead.
+
+            `bulk_api`: True: Methods `bulk_create`, `bulk_update`, `delete` and `hard_delete` use
+                asynchronous jobs of Bulk API 2.0 instead of requests by 200 records.
+                False: Bulk API is never used.
+                Default: Bulk API is used if the number of records is at least
+                `settings.SF_BULK_API_THRESHOLD` (if that is configured).
+
+            `bulk_query`: True: The query is executed by a Bulk API 2.0 query job with results
+                in CSV pages, that is efficient for millions of rows. Queries that are not supported
+                by Bulk API (aggregations, child subqueries, OFFSET) are executed normally.
+                The default is False.
+
+            `cache_ttl`: The result is cached by the Django cache for `cache_ttl` seconds and it is
+                invalidated by writes to the tables of the query. 0 = not cached.
+                The default is `Meta.sf_cache_ttl` of the model or not cached.
+                (see salesforce.backend.query_cache)
+
+            `max_depth`: The depth of relationships followed by `select_related()` without fields,
+                e.g. 3 for "Contact.Account.Owner.Profile.Name". The maximum is 5 by SOQL.
+                The default is 1. (Explicit `select_related('account__owner__profile')` is not limited
+                by it, only by the SOQL limit.)
         """
         clone = self.clone()
         clone.sf_params = copy.copy(self.sf_params)
@@ -121,6 +154,19 @@ class SalesforceQuery(Query, Generic[_T]):
             clone.sf_params.edge_updates = edge_updates
         if minimal_aliases is not None:
             clone.sf_params.minimal_aliases = minimal_aliases
+        if prefetch_chunks is not None:
+            clone.sf_params.prefetch_chunks = prefetch_chunks
+        if bulk_api is not None:
+            clone.sf_params.bulk_api = bulk_api
+        if bulk_query is not None:
+            clone.sf_params.bulk_query = bulk_query
+        if cache_ttl is not None:
+            clone.sf_params.cache_ttl = cache_ttl
+        if max_depth is not None:
+            if not 1 <= max_depth <= MAX_RELATIONSHIP_DEPTH:
+                raise NotSupportedError("The max_depth of select_related() must be from 1 to {}"
+                                        .format(MAX_RELATIONSHIP_DEPTH))
+            clone.max_depth = max_depth
         return clone
 
     def has_results(self, using: Optional[str]) -> bool:
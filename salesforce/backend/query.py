@@ -7,20 +7,31 @@
 """
 Salesforce object query and queryset customizations.  (like django.db.models.query)
 """
-from typing import Dict, Generic, Iterable, List, NoReturn, Optional, TYPE_CHECKING, Type, TypeVar
+from typing import (
+    Any, AsyncIterator, Dict, Generic, Iterable, Iterator, List, NamedTuple, NoReturn, Optional, Sequence,
+    TYPE_CHECKING, Tuple, Type, TypeVar,
+)
+import copy
+import re
 import typing  # pylint:disable=unused-import
 
 from django.conf import settings
-from django.db import NotSupportedError, models, DEFAULT_DB_ALIAS
+from django.core.exceptions import EmptyResultSet
+from django.db import NotSupportedError, connections, models, DEFAULT_DB_ALIAS
 from django.db.models import constants
 from django.db.models import query as models_query, Model
+from django.db.models.deletion import Collector
 from django.db.models.sql import where as sql_where
+from django.db.models.sql.constants import MULTI
 import django
 
 from salesforce.backend.indep import get_sf_alt_pk
-from salesforce.backend import compiler, DJANGO_30_PLUS, DJANGO_40_PLUS, DJANGO_41_PLUS
+from salesforce.backend import compiler, query_cache, DJANGO_30_PLUS, DJANGO_32_PLUS, DJANGO_40_PLUS, DJANGO_41_PLUS
 from salesforce.backend.models_sql_query import SalesforceQuery
 from salesforce.backend.operations import BULK_BATCH_SIZE
+from salesforce.dbapi.bulk import BulkResults, bulk_ingest
+from salesforce.dbapi.codec import response_json
+from salesforce.dbapi.subselect import DecoderPlan, get_qquery
 from salesforce.router import is_sf_database
 import salesforce.backend.utils
 
@@ -87,6 +98,18 @@ class SalesforceQuerySet(models_query.QuerySet, Generic[_T]):
                     update_fields: Optional[List[str]] = None,
                     unique_fields: Optional[List[str]] = None,
                     ) -> List[_T]:
+        """Insert objects by sObject Collections or by Bulk API 2.0 for a big number of objects
+
+        An upsert by an external id field is possible by Bulk API with parameters
+        `update_conflicts=True, unique_fields=[external_id_field_name]`. All inserted fields
+        are updated on conflict then.
+        """
+        if is_sf_database(self.db):
+            objs = list(objs)
+            if update_conflicts or self._use_bulk_api(len(objs)):
+                return self._bulk_api_create(objs, update_conflicts=update_conflicts, unique_fields=unique_fields)
+            if not ignore_conflicts and len(objs) > (batch_size or BULK_BATCH_SIZE):
+                return self._bulk_parallel_create(objs, batch_size=batch_size)
         assert not update_conflicts and update_fields is None and unique_fields is None
         if getattr(self.model, '_salesforce_object', '') == 'extended' and not is_sf_database(self.db):
             objs = list(objs)
@@ -100,15 +123,150 @@ class SalesforceQuerySet(models_query.QuerySet, Generic[_T]):
         self.sf(all_or_none=all_or_none)
         if batch_size is not None and batch_size < 0:
             raise ValueError('Batch size must be a positive integer.')
-        batch_size = min(batch_size, BULK_BATCH_SIZE) if batch_size else BULK_BATCH_SIZE
-        for chunk in salesforce.backend.utils.chunked(objs, batch_size):
-            bulk_update_small(chunk, fields, all_or_none=all_or_none)
+        if not is_sf_database(self.db):
+            # an extended model in other database
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+        objs = list(objs)
+        if self._use_bulk_api(len(objs)):
+            bulk_update_bulk_api(objs, fields)
+            return None
+        if objs:
+            bulk_update_parallel(objs, fields, all_or_none=all_or_none, batch_size=batch_size or BULK_BATCH_SIZE)
+        return None
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete records, by Bulk API 2.0 if it is selected by `.sf(bulk_api=...)` or by the threshold
+
+        Bulk API is used only if Django could delete the records without collecting them:
+        no pre_delete/post_delete signal receivers and no cascades of related objects.
+        It is refused by `.sf(bulk_api=True)` otherwise, because no signals would be sent.
+        """
+        bulk_api = self.query.sf_params.bulk_api
+        if (is_sf_database(self.db) and bulk_api is not False
+                and (bulk_api or getattr(settings, 'SF_BULK_API_THRESHOLD', None) is not None)):
+            if not self._can_bulk_delete('delete'):
+                return super().delete()
+            pks = self._pks_for_bulk_delete('delete')
+            if self._use_bulk_api(len(pks)):
+                return self._bulk_api_delete(pks, 'delete')
+            # the collected primary keys are reused, without the original query again
+            self._result_cache = None
+            return self.model._base_manager.using(self.db).filter(pk__in=pks).sf(bulk_api=False).delete()
+        return super().delete()
+
+    delete.alters_data = True  # type: ignore[attr-defined]  # noqa
+    delete.queryset_only = True  # type: ignore[attr-defined]  # noqa
+
+    def hard_delete(self) -> Tuple[int, Dict[str, int]]:
+        """Delete records by Bulk API 2.0 without moving them to the Recycle Bin
+
+        The user needs the permission "Bulk API Hard Delete".
+        """
+        if not is_sf_database(self.db):
+            raise NotSupportedError("hard_delete() is possible only on a Salesforce database")
+        self._can_bulk_delete('hard_delete', required=True)
+        return self._bulk_api_delete(self._pks_for_bulk_delete('hard_delete'), 'hardDelete')
+
+    hard_delete.alters_data = True  # type: ignore[attr-defined]  # noqa
+    hard_delete.queryset_only = True  # type: ignore[attr-defined]  # noqa
+
+    def _use_bulk_api(self, count: int) -> bool:
+        bulk_api = self.query.sf_params.bulk_api
+        if bulk_api is None:
+            threshold = getattr(settings, 'SF_BULK_API_THRESHOLD', None)
+            return threshold is not None and count >= threshold
+        return bulk_api
+
+    def _bulk_api_create(self, objs: List[_T], update_conflicts: bool = False,
+                         unique_fields: Optional[List[str]] = None) -> List[_T]:
+        opts = self.model._meta
+        external_id_field = None
+        if update_conflicts:
+            if not unique_fields or len(unique_fields) != 1:
+                raise NotSupportedError("Upsert requires exactly one external id field in 'unique_fields'")
+            external_id_field = opts.get_field(unique_fields[0]).column
+        if not objs:
+            return objs
+        self._for_write = True
+        db = self.db
+        records = self._insert_records(objs)
+        results = bulk_api_request(db, 'upsert' if update_conflicts else 'insert', opts.db_table, records,
+                                   external_id_field=external_id_field)
+        for obj, result in zip(objs, results):
+            if result.success:
+                obj.pk = result.id
+                obj._state.adding = False
+                obj._state.db = db
+        results.raise_errors()
+        return objs
+
+    def _bulk_parallel_create(self, objs: List[_T], batch_size: Optional[int] = None) -> List[_T]:
+        """Insert objects by sObject Collections requests of `batch_size` objects in parallel threads"""
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError('Batch size must be a positive integer.')
+        self._for_write = True
+        db = self.db
+        db_table = self.model._meta.db_table
+        if DJANGO_32_PLUS:
+            for obj in objs:
+                obj._prepare_related_fields_for_save(operation_name='bulk_create')
+        connection = connections[db]
+        connection.ensure_connection()
+        records = [dict(item, type_=db_table) for item in self._insert_records(objs)]
+        ids = connection.connection.sobject_collections_parallel(
+            'POST', records, all_or_none=self.query.sf_params.all_or_none, batch_size=batch_size or BULK_BATCH_SIZE)
+        query_cache.invalidate_after_write([db_table])
+        for obj, pk in zip(objs, ids):
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = db
+        return objs
+
+    def _insert_records(self, objs: List[_T]) -> List[Dict[str, Any]]:
+        """Get the inserted values of objects, without the fields with a default value on create"""
+        query = models.sql.InsertQuery(self.model)
+        query.insert_values(self.model._meta.concrete_fields, objs)
+        records = salesforce.backend.utils.extract_insert_values(query)
+        for item in records:
+            salesforce.backend.utils.CursorWrapper.our_fix_default(item)
+        return records
+
+    def _can_bulk_delete(self, method_name: str, required: bool = False) -> bool:
+        """Check that records can be deleted by Bulk API without signals and cascades"""
+        if Collector(using=self.db).can_fast_delete(self):
+            return True
+        if required or self.query.sf_params.bulk_api:
+            raise NotSupportedError(
+                "{}() by Bulk API is not possible for {} with delete signal receivers or on_delete "
+                "cascades of related objects".format(method_name, self.model._meta.label))
+        return False
+
+    def _pks_for_bulk_delete(self, method_name: str) -> List[str]:
+        if not self.query.can_filter():
+            raise TypeError("Cannot use 'limit' or 'offset' with %s()." % method_name)
+        if self._fields is not None:
+            raise TypeError("Cannot call %s() after .values() or .values_list()" % method_name)
+        return list(self.values_list('pk', flat=True))
+
+    def _bulk_api_delete(self, pks: List[str], operation: str) -> Tuple[int, Dict[str, int]]:
+        self._for_write = True
+        self._result_cache = None
+        if not pks:
+            return 0, {}
+        results = bulk_api_request(self.db, operation, self.model._meta.db_table, [{'Id': pk} for pk in pks])
+        results.raise_errors()
+        return len(results), {self.model._meta.label: len(results)}
 
     def sf(self,
            query_all: Optional[bool] = None,
            all_or_none: Optional[bool] = None,
            edge_updates: Optional[bool] = None,
            minimal_aliases: Optional[bool] = None,
+           prefetch_chunks: Optional[int] = None,
+           bulk_api: Optional[bool] = None,
+           bulk_query: Optional[bool] = None,
+           cache_ttl: Optional[int] = None,
+           max_depth: Optional[int] = None,
            ) -> 'SalesforceQuerySet[_T]':
         """Set additional parameters for queryset methods with Salesforce.
 
@@ -127,9 +285,257 @@ class SalesforceQuerySet(models_query.QuerySet, Generic[_T]):
             all_or_none=all_or_none,
             edge_updates=edge_updates,
             minimal_aliases=minimal_aliases,
+            prefetch_chunks=prefetch_chunks,
+            bulk_api=bulk_api,
+            bulk_query=bulk_query,
+            cache_ttl=cache_ttl,
+            max_depth=max_depth,
         )
         return clone
 
+    def sf_parallel(self, partitions: int = 4, key: str = 'Id', preserve_order: bool = False
+                    ) -> 'SalesforceQuerySet[_T]':
+        """Run the query by more queries in parallel threads, split by ranges of a key field
+
+        parameters:
+            partitions:  the number of queries
+            key:  'Id' or 'CreatedDate' - the database column that is split to disjoint ranges
+            preserve_order:  False: the rows are merged in the order of completed queries.
+                True: the ordering of the queryset is preserved, or the rows are ordered by the key
+                if no ordering is specified. A query ordered by text or nullable fields
+                is run serially, because SOQL ordering of them can not be merged.
+
+        Boundaries of ranges are interpolated between the minimal and maximal value
+        found by two small queries. Sliced querysets and aggregations run serially.
+        Example:
+        >>> for contact in Contact.objects.filter(...).sf_parallel(partitions=8):
+        ...     ...
+        """
+        if not is_sf_database(self.db) or partitions < 2:
+            return self
+        if key not in ('Id', 'CreatedDate'):
+            raise NotSupportedError("Parallel queries can be split only by 'Id' or 'CreatedDate'")
+        clone = self._chain()
+        clone.query = clone.query.sf()
+        clone.query.sf_params.parallel = (partitions, key, preserve_order)
+        return clone
+
+    def _fetch_all(self) -> None:
+        if self._result_cache is None and self._prefetch_related_lookups and not self._prefetch_done:
+            child_prefetches = self._child_prefetches()
+            if child_prefetches:
+                self._result_cache = self._fetch_with_child_subqueries(child_prefetches)
+        super()._fetch_all()
+
+    def _child_prefetches(self) -> List['ChildPrefetch']:
+        """Get reverse foreign key prefetches that can be queried by parent-to-child subqueries
+
+        The first level of lookups e.g. 'contact_set' of 'contact_set__owner' is eligible if the child
+        model is a Salesforce model with a relationship name and an optional queryset of
+        `Prefetch(..., queryset=...)` is a simple queryset of model instances without OFFSET.
+        Other lookups are prefetched later normally by `Id IN (...)` queries. Nothing is eligible
+        if the first chunk has been already fetched by a query without subqueries (by gather()).
+        """
+        if not (is_sf_database(self.db) and self._iterable_class is models_query.ModelIterable
+                and not self.query.combinator and not self.query.sf_params.bulk_query
+                and self.query.sf_params.first_chunk is None
+                and not self.model._meta.sf_tooling_api_model):
+            return []
+        rels = {rel.get_accessor_name(): rel for rel in self.model._meta.related_objects
+                if rel.one_to_many and getattr(rel.related_model, '_salesforce_object', None)
+                and rel.field.target_field.column == 'Id'}
+        specs = {}  # type: Dict[str, Any]
+        for lookup in self._prefetch_related_lookups:
+            through = lookup.prefetch_through if isinstance(lookup, models.Prefetch) else lookup
+            name = through.split(constants.LOOKUP_SEP)[0]
+            queryset, to_attr = None, name
+            if isinstance(lookup, models.Prefetch) and through == name:
+                queryset, to_attr = lookup.queryset, lookup.to_attr or name
+            spec = (queryset, to_attr)
+            if name in rels and specs.setdefault(name, spec) != spec:
+                specs[name] = None  # different querysets of the same lookup are resolved by Django
+        ret = []
+        for name, spec in specs.items():
+            if spec is None:
+                continue
+            queryset, to_attr = spec
+            rel = rels[name]
+            if queryset is None:
+                queryset = rel.related_model._default_manager.all()
+            if not (isinstance(queryset, SalesforceQuerySet) and queryset.model is rel.related_model
+                    and queryset._iterable_class is models_query.ModelIterable
+                    and not queryset._prefetch_related_lookups and not queryset.query.low_mark
+                    and not queryset.query.combinator and not queryset.query.sf_params.parallel):
+                continue
+            relationship_name = child_relationship_name(self.db, rel)
+            if not relationship_name:
+                continue
+            queryset = queryset.using(self.db).sf(minimal_aliases=True)
+            compiler = queryset.query.get_compiler(using=self.db)
+            try:
+                sql, params = compiler.as_sql()
+            except EmptyResultSet:
+                continue
+            sql = re.sub(r'\bFROM {}\b'.format(re.escape(rel.related_model._meta.db_table)),
+                         'FROM ' + relationship_name, sql, count=1)
+            ret.append(ChildPrefetch(rel, queryset, compiler, sql, params, to_attr))
+        return ret
+
+    def _fetch_with_child_subqueries(self, child_prefetches: List['ChildPrefetch']) -> List[_T]:
+        """Fetch objects by a query with parent-to-child subqueries, fill the prefetch cache by child objects"""
+        query = self.query.sf()
+        query.sf_params.child_subqueries = [(x.sql, x.params) for x in child_prefetches]
+        compiler = query.get_compiler(using=self.db)
+        rows = [row for chunk in compiler.execute_sql(MULTI) for row in chunk]
+        if not rows:
+            return []
+        objs = list(model_instances(self, compiler, rows))
+        for i, child in enumerate(child_prefetches):
+            qquery = get_qquery(child.sql)
+            plan = DecoderPlan(qquery, child.compiler.get_column_types()) if qquery.supports_decoder_plan else None
+            column = len(rows[0]) - len(child_prefetches) + i
+            accessor = child.rel.get_accessor_name()
+            for obj, row in zip(objs, rows):
+                records = row[column]['records'] if row[column] else []
+                child_rows = list(qquery.parse_rest_response(records, len(records), row_type=list, plan=plan))
+                vals = list(model_instances(child.queryset, child.compiler, child_rows))
+                for val in vals:
+                    child.rel.field.set_cached_value(val, obj)
+                if child.to_attr != accessor:
+                    setattr(obj, child.to_attr, vals)
+                    continue
+                manager = getattr(obj, accessor)
+                qs = manager._apply_rel_filters(child.queryset)  # pylint:disable=protected-access
+                qs._result_cache = vals  # pylint:disable=protected-access
+                qs._prefetch_done = True  # pylint:disable=protected-access
+                if not hasattr(obj, '_prefetched_objects_cache'):
+                    obj._prefetched_objects_cache = {}  # pylint:disable=protected-access
+                obj._prefetched_objects_cache[accessor] = qs  # pylint:disable=protected-access
+        return objs
+
+    # -- asyncio methods that use the native async driver (salesforce.dbapi.async_driver)
+    #    instead of a thread for every request by sync_to_async
+
+    def _is_async_native(self) -> bool:
+        """Can the query run by the native async driver?
+
+        Queries with options implemented only by the sync compiler (a cache by `cache_ttl` or
+        `Meta.sf_cache_ttl`, `bulk_query` and `parallel`) are run by the inherited methods in a thread.
+        """
+        if not (is_sf_database(self.db) and self._iterable_class is models_query.ModelIterable
+                and not self._prefetch_related_lookups and not self.query.combinator):
+            return False
+        sf_params = self.query.sf_params
+        return not (sf_params.bulk_query or sf_params.parallel
+                    or self.query.get_compiler(using=self.db).get_cache_ttl())
+
+    async def aiterator(self, chunk_size: int = 2000) -> AsyncIterator[_T]:  # type: ignore[override]
+        if not self._is_async_native():
+            async for obj in super().aiterator(chunk_size=chunk_size):
+                yield obj
+            return
+        db = self.db
+        compiler = self.query.get_compiler(using=db)
+        try:
+            sql, params = compiler.as_sql()
+            if not sql:
+                raise EmptyResultSet
+        except EmptyResultSet:
+            return
+        cursor = connections[db].get_async_connection().cursor()
+        await cursor.execute(sql, params, query_all=self.query.sf_params.query_all,
+                             tooling_api=self.model._meta.sf_tooling_api_model)
+        rows = []  # type: List[Any]
+        async for row in cursor:
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                for obj in model_instances(self, compiler, rows):
+                    yield obj
+                rows = []
+        for obj in model_instances(self, compiler, rows):
+            yield obj
+
+    async def acount(self) -> int:
+        if not self._is_async_native() or self._result_cache is not None or self.query.annotations:
+            return await super().acount()
+        compiled = self.count_sql()
+        if compiled is None:
+            return 0
+        sql, params = compiled
+        cursor = connections[self.db].get_async_connection().cursor()
+        await cursor.execute(sql, params, query_all=self.query.sf_params.query_all,
+                             tooling_api=self.model._meta.sf_tooling_api_model)
+        return (await cursor.fetchone())[0]
+
+    def count_sql(self) -> Optional[Tuple[str, Sequence[Any]]]:
+        """Compile 'SELECT COUNT() FROM ...' of this queryset or get None if the result is empty"""
+        qs = self.values_list('pk')
+        qs.query.clear_ordering(True)
+        try:
+            sql, params = qs.query.get_compiler(using=self.db).as_sql()
+            if not sql:
+                raise EmptyResultSet
+        except EmptyResultSet:
+            return None
+        return re.sub(r'^SELECT .*? FROM ', 'SELECT COUNT() FROM ', sql, count=1), params
+
+    async def aget(self, *args: Any, **kwargs: Any) -> _T:
+        if not self._is_async_native():
+            return await super().aget(*args, **kwargs)
+        clone = self.filter(*args, **kwargs)
+        if self.query.can_filter() and not self.query.distinct_fields:
+            clone = clone.order_by()
+        limit = models_query.MAX_GET_RESULTS
+        clone.query.set_limits(high=limit)
+        objs = [obj async for obj in clone.aiterator()]
+        num = len(objs)
+        if num == 1:
+            return objs[0]
+        if not num:
+            raise self.model.DoesNotExist(
+                "%s matching query does not exist." % self.model._meta.object_name)
+        raise self.model.MultipleObjectsReturned(
+            "get() returned more than one %s -- it returned %s!" % (
+                self.model._meta.object_name, num if num < limit else "more than %s" % (limit - 1)))
+
+    async def abulk_create(self, objs: Iterable[_T], batch_size: Optional[int] = None,  # type: ignore[override]
+                           ignore_conflicts: bool = False,
+                           update_conflicts: bool = False,
+                           update_fields: Optional[List[str]] = None,
+                           unique_fields: Optional[List[str]] = None,
+                           ) -> List[_T]:
+        if not is_sf_database(self.db):
+            return await super().abulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts,
+                                              update_conflicts=update_conflicts, update_fields=update_fields,
+                                              unique_fields=unique_fields)
+        if ignore_conflicts:
+            raise NotSupportedError("This database backend does not support ignoring conflicts.")
+        if update_conflicts or update_fields is not None or unique_fields is not None:
+            raise NotSupportedError("Upsert is possible only by the sync bulk_create() by Bulk API")
+        objs = list(objs)
+        if batch_size is not None and batch_size <= 0:
+            raise ValueError('Batch size must be a positive integer.')
+        batch_size = min(batch_size, BULK_BATCH_SIZE) if batch_size else BULK_BATCH_SIZE
+        self._for_write = True
+        db = self.db
+        opts = self.model._meta
+        connection = connections[db].get_async_connection()
+        for chunk in salesforce.backend.utils.chunked(objs, batch_size):
+            post_data = self._insert_records(chunk)
+            if len(post_data) == 1:
+                resp = await connection.handle_api_exceptions('POST', 'sobjects', opts.db_table, json=post_data[0])
+                ids = [response_json(resp)['id']]
+            else:
+                records = [dict(item, type_=opts.db_table) for item in post_data]
+                ids = await connection.sobject_collections_request(
+                    'POST', records, all_or_none=self.query.sf_params.all_or_none)
+            for obj, pk in zip(chunk, ids):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = db
+        query_cache.invalidate_after_write([opts.db_table])
+        return objs
+
     # def _chain(self, **kwargs) -> 'SalesforceQuerySet[_T]':
     #     return super()._chain(**kwargs)
 
@@ -178,23 +584,100 @@ class SalesforceQuerySet(models_query.QuerySet, Generic[_T]):
     _insert.queryset_only = False  # type: ignore[attr-defined]  # noqa
 
 
+def model_instances(queryset: SalesforceQuerySet[_T], compiler: Any, rows: List[Any]) -> Iterator[_T]:
+    """Create model instances from rows by Django's ModelIterable, but the rows are fetched yet
+
+    The compiler must be used yet by .as_sql() to fill select, klass_info and annotations.
+    """
+    compiler = copy.copy(compiler)
+    compiler.execute_sql = lambda *args, **kwargs: [rows]  # the rows instead of a new query
+    clone = queryset._chain()  # pylint:disable=protected-access
+    clone.query.get_compiler = lambda *args, **kwargs: compiler
+    return iter(models_query.ModelIterable(clone))
+
+
+class ChildPrefetch(NamedTuple):
+    """A reverse foreign key prefetch compiled to a parent-to-child subquery"""
+    rel: Any  # ManyToOneRel
+    queryset: SalesforceQuerySet[Any]
+    compiler: Any  # the compiler used by as_sql() for the `sql`
+    sql: str  # "SELECT ... FROM <relationship name> ..."
+    params: Sequence[Any]
+    to_attr: str
+
+
+def child_relationship_name(db: str, rel: Any) -> Optional[str]:
+    """Get the name of parent-to-child relationship e.g. 'Contacts' by the describe of the parent SObject"""
+    connection = connections[db]
+    connection.ensure_connection()
+    description = connection.introspection.table_description_cache(rel.model._meta.db_table)
+    for child in description.get('childRelationships', []):
+        if child['childSObject'] == rel.related_model._meta.db_table and child['field'] == rel.field.column:
+            return child['relationshipName']
+    return None
+
+
 def bulk_update_small(objs: 'typing.Collection[models.Model]', fields: Iterable[str], all_or_none: bool = None
                       ) -> None:
     # simple implementation without "batch_size" parameter, but with "all_or_none"
     # and objects from mixed models can be updated by one request in the same transaction
     assert len(objs) <= BULK_BATCH_SIZE
+    bulk_update_parallel(objs, fields, all_or_none=all_or_none)
+
+
+def extract_update_records(objs: 'typing.Collection[models.Model]', fields: Iterable[str]
+                           ) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """Get the database alias and the updated values of every object (without Id)
+
+    All objects must be from the same Salesforce database.
+    """
     records = []
     dbs = set()
     for item in objs:
         query = django.db.models.sql.subqueries.UpdateQuery(item._meta.model)  # fake query
         query.add_update_values({field: getattr(item, field) for field in fields})
-        values = salesforce.backend.utils.extract_update_values(query)
-        values['id'] = item.pk
-        values['type_'] = item._meta.db_table
-        records.append(values)
+        records.append(salesforce.backend.utils.extract_update_values(query))
         dbs.add(item._state.db)  # pylint:disable=protected-access
+    if not dbs:
+        return None, records
     db = dbs.pop()
     if dbs or not is_sf_database(db):
         raise ValueError("All updated objects must be from the same Salesforce database.")
+    return db, records
+
+
+def bulk_update_parallel(objs: 'typing.Collection[models.Model]', fields: Iterable[str], all_or_none: bool = None,
+                         batch_size: int = BULK_BATCH_SIZE) -> None:
+    """Update objects by sObject Collections requests of `batch_size` objects in parallel threads
+
+    Objects from mixed models can be updated by one request in the same transaction.
+    """
+    db, values = extract_update_records(objs, fields)
+    if db is None:
+        return
+    records = [dict(item, id=obj.pk, type_=obj._meta.db_table) for obj, item in zip(objs, values)]
     connection = django.db.connections[db].connection
-    connection.sobject_collections_request('PATCH', records, all_or_none=all_or_none)
+    connection.sobject_collections_parallel('PATCH', records, all_or_none=all_or_none, batch_size=batch_size)
+    query_cache.invalidate_after_write({x['type_'] for x in records})
+
+
+def bulk_update_bulk_api(objs: 'typing.Collection[models.Model]', fields: Iterable[str]) -> None:
+    """Update objects by Bulk API 2.0 jobs, one job for every model"""
+    db, values = extract_update_records(objs, fields)
+    if db is None:
+        return
+    by_model = {}  # type: Dict[Type[models.Model], List[Dict[str, Any]]]
+    for obj, item in zip(objs, values):
+        by_model.setdefault(obj._meta.model, []).append(dict(item, Id=obj.pk))
+    for model, records in by_model.items():
+        bulk_api_request(db, 'update', model._meta.db_table, records).raise_errors()
+
+
+def bulk_api_request(db: str, operation: str, db_table: str, records: List[Dict[str, Any]],
+                     external_id_field: Optional[str] = None) -> BulkResults:
+    """Run a Bulk API 2.0 ingest operation on the database alias `db`"""
+    connection = connections[db]
+    connection.ensure_connection()
+    ret = bulk_ingest(connection.connection, operation, db_table, records, external_id_field=external_id_field)
+    query_cache.invalidate_after_write([db_table])
+    return ret
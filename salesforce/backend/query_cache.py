@@ -0,0 +1,124 @@
+"""
+Read-through cache of query results by the Django cache framework
+
+A queryset is cached by `.sf(cache_ttl=seconds)` or by default for all querysets of a model
+by `Meta.sf_cache_ttl = seconds`. A `.sf(cache_ttl=0)` disables the cache for the queryset.
+The cache key is a hash of the compiled SOQL with parameters and of the current versions of
+tables in the query. A version of a table is changed by every write to the table by this
+process (insert, update, delete including bulk methods) and by `invalidate_table()`, e.g.
+by a change event (see salesforce.streaming). Old entries expire then by the timeout.
+
+Concurrent misses of the same key in threads of a process are queried only once ("single-flight").
+
+Writes invalidate the cache only if it is configured: by the setting SF_QUERY_CACHE, by a model
+with `Meta.sf_cache_ttl` or after a cached query in this process. Set SF_QUERY_CACHE in all processes
+that write to tables cached by other processes. A failed write does not invalidate the cache
+and an error of the cache after a successful write is only logged.
+
+Settings:
+    SF_QUERY_CACHE = 'default'  # the alias of the Django cache in settings.CACHES
+"""
+import hashlib
+import logging
+import threading
+import uuid
+from typing import Any, Callable, Dict, Iterable, List
+
+from django.core.cache import caches
+
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+
+KEY_PREFIX = 'sf_query_cache:'
+_MISSING = object()
+log = logging.getLogger(__name__)
+
+
+class QueryCacheStatistics:
+    """Numbers of hits and misses of the query cache in this process"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+statistics = QueryCacheStatistics()
+_used = False  # the cache has been configured by a model or used by a query in this process
+_flights_lock = threading.Lock()
+_flights = {}  # type: Dict[str, threading.Lock]
+
+
+def get_cache() -> Any:
+    return caches[getattr(settings, 'SF_QUERY_CACHE', 'default')]
+
+
+def version_key(table: str) -> str:
+    return '{}version:{}'.format(KEY_PREFIX, table.lower())
+
+
+def get_versions(tables: Iterable[str]) -> List[str]:
+    """Get current version tokens of tables, new tables get a new random token"""
+    cache = get_cache()
+    keys = [version_key(x) for x in sorted(set(tables))]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)  # the first of concurrent processes wins
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def enable() -> None:
+    """Mark the cache as used, e.g. by a model with `Meta.sf_cache_ttl`"""
+    global _used  # pylint:disable=global-statement
+    _used = True
+
+
+def is_enabled() -> bool:
+    return _used or hasattr(settings, 'SF_QUERY_CACHE')
+
+
+def invalidate_table(table: str) -> None:
+    """Invalidate cached results of all queries that use the table"""
+    get_cache().set(version_key(table), uuid.uuid4().hex, None)
+
+
+def invalidate_after_write(tables: Iterable[str]) -> None:
+    """Invalidate tables after a successful write if the cache is enabled, errors are only logged"""
+    if not is_enabled():
+        return
+    for table in tables:
+        try:
+            invalidate_table(table)
+        except Exception as exc:  # pylint:disable=broad-except
+            log.warning("The query cache of the table %s can not be invalidated: %r", table, exc)
+
+
+def cache_key(alias: str, tables: Iterable[str], sql: str, params: Any, *options: Any) -> str:
+    enable()
+    data = repr((alias, sql, tuple(params), options, get_versions(tables)))
+    return KEY_PREFIX + hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def get_or_query(key: str, timeout: int, query: Callable[[], Any]) -> Any:
+    """Get a cached value or query it and cache it, only one thread queries the same key"""
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        statistics.hits += 1
+        return value
+    with _flights_lock:
+        lock = _flights.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                statistics.misses += 1
+                value = query()
+                cache.set(key, value, timeout)
+            else:
+                statistics.hits += 1
+        finally:
+            with _flights_lock:
+                if _flights.get(key) is lock:
+                    del _flights[key]
+    return value
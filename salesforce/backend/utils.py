@@ -8,19 +8,21 @@ It does not inherit from it because e.g.:
 but some functionality can be moved to the driver and not duplicated
 """
 import decimal
+import functools
 import logging
 import warnings
 from itertools import islice
-from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar, Union, overload
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union, overload
 
 from django.db import models
 from django.db.models import expressions as db_expressions
 from django.db.models.sql import subqueries, Query, RawQuery
 
-from salesforce.backend import DJANGO_30_PLUS, DJANGO_42_PLUS, DJANGO_50_PLUS
+from salesforce.backend import DJANGO_30_PLUS, DJANGO_42_PLUS, DJANGO_50_PLUS, query_cache
 from salesforce.dbapi.driver import (
     DatabaseError, SalesforceWarning, merge_dict,
     register_conversion, arg_to_json)
+from salesforce.dbapi.subselect import get_qquery
 from salesforce.fields import NOT_UPDATEABLE, NOT_CREATEABLE
 
 if DJANGO_42_PLUS:
@@ -127,6 +129,16 @@ def extract_update_values(query: subqueries.UpdateQuery) -> Dict[str, Any]:  # T
     return d
 
 
+def invalidating_cache(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate a write method: invalidate cached query results of the table (see query_cache)"""
+    @functools.wraps(method)
+    def wrapper(self: 'CursorWrapper', query: Any) -> Any:
+        ret = method(self, query)
+        query_cache.invalidate_after_write([query.model._meta.db_table])
+        return ret
+    return wrapper
+
+
 class CursorWrapper:
     """
     A wrapper that emulates the behavior of a database cursor.
@@ -143,6 +155,8 @@ class CursorWrapper:
         self.cursor = cursor
         self.db = db
         self.query = None
+        self.batch_size = None  # type: Optional[int]
+        self.column_types = None  # type: Optional[List[Optional[str]]]
         self.session = db.sf_session  # this creates a TCP connection if doesn't exist
         self.rowcount = None
         self.first_row = None
@@ -205,8 +219,16 @@ class CursorWrapper:
             if not q.upper().startswith('SELECT COUNT() FROM'):
                 self.first_row = data['records'][0] if data['records'] else None
 
-    def prepare_query(self, query):
+    def prepare_query(self, query, batch_size: Optional[int] = None,
+                      column_types: Optional[List[Optional[str]]] = None):
+        """Set the query before execute
+
+        batch_size: the requested number of rows in chunks
+        column_types: types of columns for the decoder of rows (see DecoderPlan)
+        """
         self.query = query
+        self.batch_size = batch_size
+        self.column_types = column_types
 
     def execute_django(self, soql: str, args: Tuple[Any, ...] = ()):
         """
@@ -236,7 +258,14 @@ class CursorWrapper:
             # normal query
             query_all = self.query and self.query.sf_params.query_all
             tooling_api = self.query and self.query.model._meta.sf_tooling_api_model
-            self.cursor.execute(soql, args, query_all=query_all, tooling_api=tooling_api)
+            prefetch_chunks = self.query.sf_params.prefetch_chunks if self.query else None
+            # queries unsupported by Bulk API, e.g. count(), are executed normally
+            bulk = bool(self.query and self.query.sf_params.bulk_query and not tooling_api
+                        and get_qquery(soql).supports_bulk_query)
+            first_chunk = self.query.sf_params.first_chunk if self.query else None
+            self.cursor.execute(soql, args, query_all=query_all, tooling_api=tooling_api,
+                                prefetch_chunks=prefetch_chunks, bulk=bulk, first_chunk=first_chunk,
+                                batch_size=self.batch_size, column_types=self.column_types)
         else:
             # Nothing queried about django_migrations to SFDC and immediately responded that
             # nothing about migration status is recorded in SFDC.
@@ -248,7 +277,8 @@ class CursorWrapper:
             self.cursor.rowcount = 0
         self.rowcount = self.cursor.rowcount
 
-    def our_fix_default(self, obj_json_data: Dict[str, Any]) -> None:
+    @staticmethod
+    def our_fix_default(obj_json_data: Dict[str, Any]) -> None:
         if DJANGO_50_PLUS:
             # sql, params = obj_json_data[name].as_sql(self.query.get_compiler('salesforce'), self.db)
             ignore_names = [
@@ -257,6 +287,7 @@ class CursorWrapper:
             for name in ignore_names:
                 del obj_json_data[name]
 
+    @invalidating_cache
     def execute_insert(self, query):
         table = query.model._meta.db_table
         post_data = extract_insert_values(query)
@@ -269,12 +300,12 @@ class CursorWrapper:
             self.our_fix_default(post_data_0)
             return self.handle_api_exceptions('POST', obj_url, json=post_data_0)
         if self.db.connection.composite_type == 'sobject-collections':
-            # SObject Collections
+            # SObject Collections, more requests in parallel if there are more than 200 records
             records = [merge_dict(x, type_=table) for x in post_data]
             for item in records:
                 self.our_fix_default(item)
             all_or_none = query.sf_params.all_or_none
-            ret = self.db.connection.sobject_collections_request('POST', records, all_or_none=all_or_none)
+            ret = self.db.connection.sobject_collections_parallel('POST', records, all_or_none=all_or_none)
             self.lastrowid = ret
             self.rowcount = len(ret)
             return
@@ -350,6 +381,7 @@ class CursorWrapper:
         assert ret.status_code == 204
         self.rowcount = 1
 
+    @invalidating_cache
     def execute_update(self, query):
         if query.model._meta.sf_tooling_api_model:
             return self.execute_tooling_update(query)
@@ -372,7 +404,7 @@ class CursorWrapper:
             for item in records:
                 self.our_fix_default(item)
             all_or_none = query.sf_params.all_or_none
-            ret = self.db.connection.sobject_collections_request('PATCH', records, all_or_none=all_or_none)
+            ret = self.db.connection.sobject_collections_parallel('PATCH', records, all_or_none=all_or_none)
             self.lastrowid = ret
             self.rowcount = len(ret)
             return
@@ -383,6 +415,7 @@ class CursorWrapper:
         self.rowcount = len([x for x in ret.json()['compositeResponse'] if x['httpStatusCode'] == 204])
         return ret
 
+    @invalidating_cache
     def execute_delete(self, query):
         table = query.model._meta.db_table
         pks = self.get_pks_from_query(query)
@@ -399,7 +432,7 @@ class CursorWrapper:
             # SObject Collections
             records = pks
             all_or_none = None  # sf_params not supported by DeleteQuery
-            ret = self.db.connection.sobject_collections_request('DELETE', records, all_or_none=all_or_none)
+            ret = self.db.connection.sobject_collections_parallel('DELETE', records, all_or_none=all_or_none)
             self.lastrowid = ret
             self.rowcount = len(ret)
             return
@@ -0,0 +1,360 @@
+"""
+Asyncio driver for Salesforce REST API (an async counterpart of `salesforce.dbapi.driver`)
+
+It requires the optional package "httpx". The semantics are the same as
+in the synchronous driver: query and queryMore paging, 'composite' and
+'sobject-collections' requests, reauthentication after INVALID_SESSION_ID.
+The authentication request itself is not frequent and it is run in
+a thread executor by the existing synchronous `salesforce.auth` classes.
+
+A connection is bound to the event loop where it has been created.
+
+    >>> conn = get_async_connection(alias, settings_dict=settings_dict)
+    >>> cursor = conn.cursor()
+    >>> await cursor.execute("SELECT Id, Name FROM Account WHERE Name = %s", ['abc'])
+    >>> async for row in cursor:
+    ...     print(row)
+"""
+import asyncio
+import logging
+import re
+import time
+import weakref
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union, cast
+from urllib.parse import urlencode
+
+import salesforce
+from salesforce.auth import SalesforceAuth
+from salesforce.dbapi import driver
+from salesforce.dbapi.codec import encode_json_kwarg, response_json
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+from salesforce.dbapi.driver import ApiUsage, RawConnection, arg_to_soql
+from salesforce.dbapi.exceptions import (
+    FakeReq, FakeResp, InterfaceError, NotSupportedError, ProgrammingError, SalesforceError,
+)
+from salesforce.dbapi.metrics import endpoint_class, metrics_registry
+from salesforce.dbapi.retry import RetryState
+from salesforce.dbapi.subselect import get_qquery, QQuery, _TRow
+
+try:
+    import httpx  # type: ignore[import]
+except ImportError:
+    httpx = None
+
+log = logging.getLogger(__name__)
+
+# connections by event loop and alias
+loop_connections = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary[Any, Dict[Optional[str], AsyncConnection]]  # noqa
+
+
+class AsyncConnection:
+    """Asyncio connection to Salesforce REST API
+
+    parameters:
+        settings_dict:  like settings.DATABASES['salesforce'] in Django
+        alias:          the same alias as for the sync connection to share the static authentication
+        _transport:     an optional custom httpx transport (useful for tests)
+    """
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, settings_dict: Dict[str, Any], alias: Optional[str] = None,
+                 _transport: Any = None) -> None:
+        if httpx is None:
+            raise InterfaceError("The package 'httpx' is required for the async driver.")
+        self.alias = cast(str, alias)
+        self.settings_dict = settings_dict
+        self.messages = []  # type: List[Any]
+        self._api_version = settings_dict.get('API_VERSION', salesforce.API_VERSION)  # type: str
+        self._transport = _transport
+        self._client = None  # type: Optional[httpx.AsyncClient]
+        self._auth_lock = asyncio.Lock()
+        self.sf_auth = SalesforceAuth.create_subclass_instance(db_alias=self.alias,
+                                                               settings_dict=self.settings_dict)
+        self.api_usage = ApiUsage(0, 5000)  # default before initialized by a request
+        self.metrics = metrics_registry.get(self.alias)  # see salesforce.dbapi.metrics
+        self.closed = False
+
+    # the same url structure as in the sync driver
+    rest_api_url = RawConnection.rest_api_url
+    raise_errors = staticmethod(RawConnection.raise_errors)
+
+    @property
+    def api_ver(self) -> str:
+        if self._api_version == 'MAX':
+            raise NotSupportedError("API_VERSION='MAX' is not supported by the async driver")
+        return self._api_version
+
+    def cursor(self, row_type: Type[_TRow] = tuple) -> 'AsyncCursor[_TRow]':  # type: ignore[assignment]
+        return AsyncCursor(self, row_type)
+
+    async def close(self) -> None:
+        del self.messages[:]
+        self.closed = True
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+        connections = loop_connections.get(asyncio.get_running_loop(), {})
+        if connections.get(self.alias) is self:
+            del connections[self.alias]
+
+    async def __aenter__(self) -> 'AsyncConnection':
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_value: Any, exc_tb: Any) -> None:
+        await self.close()
+
+    def check(self) -> None:
+        if self.closed:
+            raise InterfaceError("The connection has been closed previously")
+
+    async def get_client(self) -> 'httpx.AsyncClient':
+        """Authenticate (in an executor thread) and create the http client"""
+        self.check()
+        if self._client is None:
+            async with self._auth_lock:
+                if self._client is None:
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self.sf_auth.authenticate_and_cache)
+                    timeout = getattr(settings, 'SALESFORCE_QUERY_TIMEOUT', (4, 15))
+                    if isinstance(timeout, (tuple, list)):
+                        timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+                    self._client = httpx.AsyncClient(timeout=timeout, transport=self._transport)
+        return self._client
+
+    async def handle_api_exceptions(self, method: str, *url_parts: str, **kwargs: Any) -> 'httpx.Response':
+        """Call REST API and handle exceptions
+
+        Params:
+            method:  'HEAD', 'GET', 'POST', 'PATCH' or 'DELETE'
+            url_parts: like in rest_api_url() method
+            api_ver:   like in rest_api_url() method
+            kwargs: other parameters passed to httpx request, e.g. (... json=data)
+        """
+        assert method in ('HEAD', 'GET', 'POST', 'PATCH', 'DELETE')
+        api_ver = kwargs.pop('api_ver', None)
+        retry = RetryState(method, '/'.join(url_parts), atomic=kwargs.pop('atomic', False), metrics=self.metrics)
+        client = await self.get_client()
+        url = self.rest_api_url(*url_parts, api_ver=api_ver)
+        log.debug('Request API URL: %s', url)
+        driver.request_count += 1
+
+        while True:
+            try:
+                response = await self._request(client, method, url, **kwargs)
+            except SalesforceError as exc:
+                # converted from httpx exceptions
+                if isinstance(exc.__context__, (httpx.ConnectError, httpx.ConnectTimeout)):
+                    exc_reason = 'ConnectError'  # the request has not been sent
+                elif isinstance(exc.__context__, httpx.TimeoutException):
+                    exc_reason = 'Timeout'
+                else:
+                    exc_reason = 'ConnectionError'
+                delay = retry.next_delay(exc_reason=exc_reason)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if (response.status_code == 401                      # Unauthorized
+                    and 'json' in response.headers.get('content-type', '')
+                    and response.json()[0]['errorCode'] == 'INVALID_SESSION_ID'):
+                # Reauthenticate and retry (expired or invalid session ID or OAuth)
+                loop = asyncio.get_running_loop()
+                token = await loop.run_in_executor(None, self.sf_auth.reauthenticate)
+                self.metrics.record_reauthentication()
+                if token:
+                    response = await self._request(client, method, url, **kwargs)
+
+            if response.status_code < 400:  # OK
+                self.api_usage.update(response.headers.get('Sforce-Limit-Info'))
+                self.metrics.update_usage(self.api_usage.api_usage, self.api_usage.api_limit)
+                return response
+            delay = retry.next_delay(response=response)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        self.raise_errors(self._fake_response(response))
+        return  # type: ignore[return-value]
+
+    async def _request(self, client: 'httpx.AsyncClient', method: str, url: str, **kwargs: Any
+                       ) -> 'httpx.Response':
+        kwargs = encode_json_kwarg(kwargs)
+        if isinstance(kwargs.get('data'), bytes):
+            kwargs['content'] = kwargs.pop('data')  # encoded by a fast JSON codec
+        headers = dict(kwargs.pop('headers', None) or {})
+        access_token = self.sf_auth.get_auth().get('access_token')
+        if access_token:
+            headers['Authorization'] = 'OAuth %s' % access_token
+        start = time.monotonic()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.TimeoutException:
+            self.metrics.observe(endpoint_class(url), method, 'Timeout', time.monotonic() - start)
+            raise SalesforceError("Timeout, URL=%s" % url)
+        except httpx.TransportError as exc:
+            self.metrics.observe(endpoint_class(url), method, 'ConnectionError', time.monotonic() - start)
+            raise SalesforceError("ConnectionError, URL=%s, %r" % (url, exc))
+        self.metrics.observe_response(method, url, response, time.monotonic() - start)
+        return response
+
+    @staticmethod
+    def _fake_response(response: 'httpx.Response') -> FakeResp:
+        """A response compatible with "requests" for the error handler of the sync driver"""
+        request = response.request
+        req = FakeReq(request.method, str(request.url), request.content.decode('utf-8'), dict(request.headers))
+        resp = FakeResp(response.status_code, response.headers, response.text, req)
+        resp.reason = response.reason_phrase
+        return resp
+
+    async def handle_api_exceptions_big(self, method: str, *url_parts: str, **kwargs: Any) -> 'httpx.Response':
+        """Call REST API with the query encapsulated into the body if the query is big"""
+        assert method == 'GET'
+        api_ver = kwargs.pop('api_ver', None)
+        url = self.rest_api_url(*url_parts, api_ver=api_ver)
+        url = re.sub(r'^\w+://[^/]+', '', url)
+        data = [{'method': 'GET', 'url': url, 'referenceId': 'subrequest_0'}]
+        return await self.composite_request(data)
+
+    async def composite_request(self, data: List[Dict[str, Any]]) -> 'httpx.Response':
+        """Call a 'composite' request with subrequests, error handling"""
+        post_data = {'compositeRequest': data, 'allOrNone': True}
+        resp = await self.handle_api_exceptions('POST', 'composite', json=post_data, atomic=True)
+        if RawConnection._check_composite_response(  # pylint:disable=protected-access
+                data, response_json(resp)['compositeResponse'], resp.headers['Content-Type']):
+            return resp
+        return  # type: ignore[return-value]
+
+    async def sobject_collections_request(self,
+                                          method: str,
+                                          records: Sequence[Dict[str, Any]],
+                                          all_or_none: bool = True
+                                          ) -> List[str]:
+        # pylint:disable=protected-access
+        records, kwargs = RawConnection._prepare_collections_request(method, records, all_or_none)
+        resp = await self.handle_api_exceptions(method, 'composite/sobjects', atomic=bool(all_or_none), **kwargs)
+        return RawConnection._process_collections_response(response_json(resp), records, all_or_none)
+
+
+# DB API function
+def async_connect(**params: Any) -> AsyncConnection:
+    return AsyncConnection(**params)
+
+
+def get_async_connection(alias: str, **params: Any) -> AsyncConnection:
+    """Get a connection for the alias in the running event loop or create it"""
+    connections = loop_connections.setdefault(asyncio.get_running_loop(), {})
+    if alias not in connections or connections[alias].closed:
+        connections[alias] = async_connect(alias=alias, **params)
+    return connections[alias]
+
+
+class AsyncCursor(Generic[_TRow]):
+    """Asyncio cursor with the same query paging as `salesforce.dbapi.driver.Cursor`"""
+
+    # pylint:disable=too-many-instance-attributes
+    def __init__(self, connection: AsyncConnection, row_type: Optional[Type[_TRow]] = None) -> None:
+        self.description = None           # type: Optional[List[Any]]
+        self.rowcount = -1
+        self.arraysize = 1
+        self.rownumber = None             # type: Optional[int]
+        self._connection = connection
+        self.messages = []                # type: List[Any]
+        self.lastrowid = None
+        assert row_type in (tuple, list, dict, None)
+        self.row_type = row_type or tuple  # type: Union[Type[Dict[str, Any]], Type[Tuple[Any, ...]], Type[List[Any]]]  # noqa
+        self._chunk = []                  # type: List[Dict[str, Any]]
+        self._next_records_url = None     # type: Optional[str]
+        self.qquery = None                # type: Optional[QQuery]
+        self._rows = None                 # type: Optional[Iterator[_TRow]]
+        self.closed = False
+
+    @property
+    def connection(self) -> AsyncConnection:
+        self.check()
+        return self._connection
+
+    def check(self) -> None:
+        self._connection.check()
+        if self.closed:
+            raise InterfaceError("Cursor is closed")
+
+    async def close(self) -> None:
+        self._clean()
+        self.closed = True
+
+    async def execute(self, soql: str, parameters: Optional[Iterable[Any]] = None, query_all: bool = False,
+                      tooling_api: bool = False) -> None:
+        self._clean()
+        parameters = parameters or []
+        sqltype = soql.split(None, 1)[0].upper()
+        if sqltype != 'SELECT':
+            raise ProgrammingError("Unexpected command '{}'".format(sqltype))
+        processed_sql = str(soql) % tuple(arg_to_soql(x) for x in parameters)
+        service = '' if not tooling_api else 'tooling/'
+        service += 'query' if not query_all else 'queryAll'
+
+        self.qquery = qquery = get_qquery(soql)
+        self.description = [(alias, None, None, None, name) for alias, name in
+                            zip(qquery.aliases, qquery.fields)]
+        await self.query_more('/?'.join((service, urlencode(dict(q=processed_sql)))))
+        self.rownumber = 0
+
+    async def query_more(self, nextRecordsUrl: str) -> None:
+        connection = self.connection
+        if len(nextRecordsUrl) < 15500:
+            ret = response_json(await connection.handle_api_exceptions('GET', nextRecordsUrl))
+        else:
+            ret = response_json(await connection.handle_api_exceptions_big('GET', nextRecordsUrl))
+            ret = ret['compositeResponse'][0]['body']
+        self.rowcount = ret['totalSize']
+        self._chunk = ret['records']
+        self._next_records_url = ret.get('nextRecordsUrl')
+        assert self.qquery
+        self._rows = iter(cast(Iterator[_TRow], self.qquery.parse_rest_response(
+            self._chunk, self.rowcount, row_type=self.row_type)))
+
+    async def fetchone(self) -> Optional[_TRow]:
+        try:
+            return await self.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    async def fetchmany(self, size: Optional[int] = None) -> List[_TRow]:
+        size = size if size is not None else self.arraysize
+        ret = []  # type: List[_TRow]
+        while len(ret) < size:
+            row = await self.fetchone()
+            if row is None:
+                break
+            ret.append(row)
+        return ret
+
+    async def fetchall(self) -> List[_TRow]:
+        return [row async for row in self]
+
+    def __aiter__(self) -> 'AsyncCursor[_TRow]':
+        return self
+
+    async def __anext__(self) -> _TRow:
+        if self._rows is None:
+            raise InterfaceError("called fetch...() before execute()")
+        while True:
+            row = next(self._rows, None)
+            if row is not None:
+                assert self.rownumber is not None
+                self.rownumber += 1
+                return row
+            if not self._next_records_url:
+                raise StopAsyncIteration
+            await self.query_more(self._next_records_url)
+
+    def _clean(self) -> None:
+        self.description = None
+        self.rowcount = -1
+        self.rownumber = None
+        del self.messages[:]
+        self.lastrowid = None
+        self._next_records_url = None
+        self._chunk = []
+        self.qquery = None
+        self._rows = None
+        self.check()
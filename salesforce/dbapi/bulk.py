@@ -0,0 +1,298 @@
+"""
+Bulk API 2.0 ingest jobs (insert, update, upsert, delete, hardDelete) and query jobs
+
+It is useful for a big number of records, where the sObject Collections
+(by 200 records in one request) would require too many API requests.
+
+    >>> results = bulk_ingest(connection, 'insert', 'Contact', [{'LastName': 'a'}, {'LastName': 'b'}])
+    >>> results.raise_errors()
+    >>> [x.id for x in results]
+
+Records are dicts {column_name: value} with values converted by `arg_to_json()`.
+The order of results is the same as the order of records.
+
+Query jobs are used by `Cursor.execute(soql, bulk=True)`.
+https://developer.salesforce.com/docs/atlas.en-us.api_asynch.meta/api_asynch/bulk_api_2_0.htm
+"""
+import csv
+import io
+import logging
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from salesforce.dbapi.codec import response_json
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+from salesforce.dbapi.exceptions import NotSupportedError, OperationalError, SalesforceError
+
+log = logging.getLogger(__name__)
+
+OPERATIONS = ('insert', 'update', 'upsert', 'delete', 'hardDelete')
+FINAL_STATES = ('JobComplete', 'Failed', 'Aborted')
+# The limit is 150 MB base64 encoded data per job. Bigger data are split to more jobs.
+MAX_JOB_BYTES = 100 * 1024 * 1024
+
+BulkResult = NamedTuple('BulkResult', [('success', bool), ('id', Optional[str]), ('created', bool),
+                                       ('error', Optional[str])])
+
+
+class BulkResults(List[BulkResult]):
+    """Results of a bulk operation in the order of input records"""
+
+    def __init__(self, results: Sequence[BulkResult], sobject: str, operation: str) -> None:
+        super().__init__(results)
+        self.sobject = sobject
+        self.operation = operation
+
+    @property
+    def errors(self) -> List[Tuple[int, BulkResult]]:
+        return [(i, x) for i, x in enumerate(self) if not x.success]
+
+    def raise_errors(self) -> None:
+        """Raise SalesforceError with a summary of errors, similar to sObject Collections"""
+        errors = self.errors
+        if not errors:
+            return
+        messages = [
+            '(see details below)',
+            '',
+            'Bulk API {} {}: errors={}, success={}'.format(self.operation, self.sobject, len(errors),
+                                                           len(self) - len(errors)),
+            'index ID                 error_info',
+        ]
+        for i, result in errors[:100]:
+            messages.append('{:5d} {:18s} {}'.format(i, result.id or '', result.error))
+        if len(errors) > 100:
+            messages.append('...')
+        raise SalesforceError(messages)
+
+
+class BulkJob:
+    """Common methods of Bulk API 2.0 jobs"""
+    resource = ''
+
+    def __init__(self, connection: Any) -> None:
+        self.connection = connection
+        self.job_id = None  # type: Optional[str]
+        self.info = {}  # type: Dict[str, Any]
+
+    def _create(self, data: Dict[str, Any]) -> str:
+        self.info = response_json(
+            self.connection.handle_api_exceptions('POST', self.resource + '/', json=data, atomic=True))
+        self.job_id = self.info['id']
+        log.debug("Bulk API job %s created: %s", self.job_id, data)
+        return self.job_id
+
+    def abort(self) -> None:
+        self.set_state('Aborted')
+
+    def set_state(self, state: str) -> None:
+        self.info = response_json(self.connection.handle_api_exceptions('PATCH', self.resource, self.job_id + '/',
+                                                                        json={'state': state}))
+
+    def refresh(self) -> Dict[str, Any]:
+        self.info = response_json(self.connection.handle_api_exceptions('GET', self.resource, self.job_id + '/'))
+        return self.info
+
+    @property
+    def state(self) -> str:
+        return self.info.get('state', '')
+
+    def wait(self, timeout: Optional[float] = None, interval: float = 1.0, max_interval: float = 30.0) -> None:
+        """Poll the job state with an exponential backoff until the job is finished"""
+        if timeout is None:
+            timeout = getattr(settings, 'SF_BULK_TIMEOUT', 3600)
+        t_end = time.time() + timeout
+        while self.refresh()['state'] not in FINAL_STATES:
+            if time.time() + interval > t_end:
+                raise OperationalError("Bulk API job {} has not finished in {} seconds, state {}".format(
+                    self.job_id, timeout, self.state))
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
+        if self.state != 'JobComplete':
+            raise OperationalError("Bulk API job {} {}: {}".format(self.job_id, self.state,
+                                                                   self.info.get('errorMessage', '')))
+
+
+class BulkIngestJob(BulkJob):
+    """One Bulk API 2.0 ingest job with one CSV upload"""
+    resource = 'jobs/ingest'
+
+    def __init__(self, connection: Any, sobject: str, operation: str, external_id_field: Optional[str] = None
+                 ) -> None:
+        if operation not in OPERATIONS:
+            raise NotSupportedError("Unsupported Bulk API operation {!r}".format(operation))
+        if (operation == 'upsert') != bool(external_id_field):
+            raise NotSupportedError("The external_id_field is required exactly for the 'upsert' operation")
+        super().__init__(connection)
+        self.sobject = sobject
+        self.operation = operation
+        self.external_id_field = external_id_field
+
+    def create(self) -> str:
+        data = {'object': self.sobject, 'operation': self.operation, 'contentType': 'CSV', 'lineEnding': 'LF'}
+        if self.external_id_field:
+            data['externalIdFieldName'] = self.external_id_field
+        return self._create(data)
+
+    def upload(self, csv_data: str) -> None:
+        self.connection.handle_api_exceptions('PUT', self.resource, self.job_id, 'batches/',
+                                              data=csv_data.encode('utf-8'), headers={'Content-Type': 'text/csv'})
+
+    def close(self) -> None:
+        """Mark the upload complete. The job is queued for processing then."""
+        self.set_state('UploadComplete')
+
+    def successful_results(self) -> List[Dict[str, str]]:
+        return self._get_results('successfulResults/')
+
+    def failed_results(self) -> List[Dict[str, str]]:
+        return self._get_results('failedResults/')
+
+    def _get_results(self, resource: str) -> List[Dict[str, str]]:
+        resp = self.connection.handle_api_exceptions('GET', self.resource, self.job_id, resource)
+        return list(csv.DictReader(io.StringIO(resp.text)))
+
+
+class BulkQueryJob(BulkJob):
+    """Bulk API 2.0 query job. The results are read by pages of CSV data."""
+    resource = 'jobs/query'
+
+    def __init__(self, connection: Any, soql: str, query_all: bool = False) -> None:
+        super().__init__(connection)
+        self.soql = soql
+        self.query_all = query_all
+
+    def create(self) -> str:
+        return self._create({'operation': 'queryAll' if self.query_all else 'query', 'query': self.soql,
+                             'contentType': 'CSV', 'lineEnding': 'LF'})
+
+    def iter_pages(self, max_records: Optional[int] = None) -> Iterator[Tuple[List[str], Iterator[List[str]]]]:
+        """Get pages of results as (header, iterator of rows) by following the 'Sforce-Locator'
+
+        Only one page of CSV text is kept in memory.
+        """
+        if max_records is None:
+            max_records = getattr(settings, 'SF_BULK_QUERY_PAGE_SIZE', 50000)
+        locator = None  # type: Optional[str]
+        while True:
+            params = {'maxRecords': max_records} if max_records else {}
+            if locator:
+                params['locator'] = locator
+            url = 'results/?' + urlencode(params) if params else 'results/'
+            resp = self.connection.handle_api_exceptions('GET', self.resource, self.job_id, url)
+            reader = csv.reader(io.StringIO(resp.text))
+            header = next(reader, [])
+            yield header, reader
+            locator = resp.headers.get('Sforce-Locator')
+            if not locator or locator == 'null':
+                break
+
+
+def csv_chunks(records: Sequence[Dict[str, Any]], operation: str, max_bytes: int = MAX_JOB_BYTES
+               ) -> Iterator[Tuple[List[str], List[List[str]], str]]:
+    """Convert records to CSV chunks not bigger than max_bytes
+
+    yields: (columns, rows as lists of strings, CSV text)
+    """
+    columns = []  # type: List[str]
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    # '#N/A' is a null value, an empty string is an unchanged value for update
+    null_value = '' if operation == 'insert' else '#N/A'
+    header = to_csv([columns])
+    rows = []  # type: List[List[str]]
+    lines = []  # type: List[str]
+    size = len(header.encode('utf-8'))
+    for record in records:
+        row = [csv_value(record[col], null_value) if col in record else '' for col in columns]
+        line = to_csv([row])
+        line_size = len(line.encode('utf-8'))
+        if rows and size + line_size > max_bytes:
+            yield columns, rows, header + ''.join(lines)
+            rows, lines, size = [], [], len(header.encode('utf-8'))
+        rows.append(row)
+        lines.append(line)
+        size += line_size
+    if rows:
+        yield columns, rows, header + ''.join(lines)
+
+
+def csv_value(value: Any, null_value: str) -> str:
+    if value is None:
+        return null_value
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def to_csv(rows: List[List[str]]) -> str:
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerows(rows)
+    return out.getvalue()
+
+
+def bulk_ingest(connection: Any, operation: str, sobject: str, records: Sequence[Dict[str, Any]],
+                external_id_field: Optional[str] = None, timeout: Optional[float] = None,
+                max_bytes: int = MAX_JOB_BYTES) -> BulkResults:
+    """Run a Bulk API 2.0 ingest operation and get results in the order of records
+
+    parameters:
+        connection: RawConnection
+        operation: 'insert', 'update', 'upsert', 'delete' or 'hardDelete'
+        records: list of dicts {column: value}, with an 'Id' item for update and delete
+            or with the external_id_field for upsert
+    All jobs are uploaded before waiting for the first result.
+    """
+    jobs = []
+    for columns, rows, csv_data in csv_chunks(records, operation, max_bytes=max_bytes):
+        job = BulkIngestJob(connection, sobject, operation, external_id_field=external_id_field)
+        job.create()
+        try:
+            job.upload(csv_data)
+            job.close()
+        except Exception:
+            job.abort()
+            raise
+        jobs.append((job, columns, rows))
+    results = []  # type: List[BulkResult]
+    for job, columns, rows in jobs:
+        job.wait(timeout=timeout)
+        results.extend(match_results(job, columns, rows, external_id_field))
+    return BulkResults(results, sobject, operation)
+
+
+def match_results(job: BulkIngestJob, columns: List[str], rows: List[List[str]],
+                  external_id_field: Optional[str] = None) -> List[BulkResult]:
+    """Match successful and failed results of the job to the input rows
+
+    The results are not ordered by Salesforce. They are matched by 'Id', by the external id
+    or by values of all columns for insert. (Rows with the same values are interchangeable.)
+    """
+    key_column = {'insert': None, 'upsert': external_id_field}.get(job.operation, 'Id')
+    key_columns = [key_column] if key_column else columns
+    positions = {}  # type: Dict[Tuple[str, ...], List[int]]
+    for i, row in enumerate(rows):
+        key = tuple(row[columns.index(col)] for col in key_columns)
+        positions.setdefault(key, []).append(i)
+    out = [None] * len(rows)  # type: List[Optional[BulkResult]]
+
+    def assign(result: Dict[str, str], bulk_result: BulkResult) -> None:
+        key = tuple(result.get(col, '') for col in key_columns)
+        indexes = positions.get(key)
+        if not indexes:
+            raise SalesforceError("Bulk API result can not be matched to input records: {}".format(result))
+        out[indexes.pop(0)] = bulk_result
+
+    for result in job.successful_results():
+        assign(result, BulkResult(True, result['sf__Id'], result.get('sf__Created') == 'true', None))
+    for result in job.failed_results():
+        assign(result, BulkResult(False, result.get('sf__Id') or result.get('Id') or None, False,
+                                  result['sf__Error']))
+    missing = [i for i, x in enumerate(out) if x is None]
+    if missing:
+        raise SalesforceError("Bulk API job {}: no result for {} records (e.g. the index {})".format(
+            job.job_id, len(missing), missing[0]))
+    return [x for x in out if x is not None]
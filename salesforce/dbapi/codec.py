@@ -0,0 +1,69 @@
+"""
+JSON codec for request and response bodies of REST API
+
+It is selected by `settings.SF_JSON_CODEC`:
+    'json': the standard library (default)
+    'orjson': a fast codec (requires the package "orjson")
+
+The standard library is used always if `parse_float` or `object_pairs_hook` is required,
+e.g. `parse_float=decimal.Decimal`, because these hooks are not supported by orjson.
+"""
+import json
+from typing import Any, Callable, Dict, Optional
+
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+from salesforce.dbapi.exceptions import InterfaceError
+
+try:
+    import orjson  # type: ignore[import]
+except ImportError:
+    orjson = None
+
+CODECS = ('json', 'orjson')
+
+
+def get_codec() -> str:
+    codec = getattr(settings, 'SF_JSON_CODEC', 'json')
+    if codec not in CODECS:
+        raise InterfaceError("Invalid settings.SF_JSON_CODEC={!r}, expected one of {}".format(codec, CODECS))
+    if codec == 'orjson' and orjson is None:
+        raise InterfaceError("The package 'orjson' is required by settings.SF_JSON_CODEC")
+    return codec
+
+
+def loads(data: Any, parse_float: Optional[Callable[[str], Any]] = None,
+          object_pairs_hook: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Decode JSON from str or bytes"""
+    if parse_float is None and object_pairs_hook is None and get_codec() == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data, parse_float=parse_float, object_pairs_hook=object_pairs_hook)
+
+
+def dumps(obj: Any) -> str:
+    """Encode JSON to str"""
+    if get_codec() == 'orjson':
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+def response_json(response: Any, parse_float: Optional[Callable[[str], Any]] = None,
+                  object_pairs_hook: Optional[Callable[[Any], Any]] = None) -> Any:
+    """Decode the body of a response of "requests" or "httpx"
+
+    It is decoded from bytes without decoding to str if possible. (Mock responses have only .text)
+    """
+    if parse_float is None and object_pairs_hook is None and get_codec() == 'orjson':
+        content = getattr(response, 'content', None)
+        return orjson.loads(content if content is not None else response.text)
+    kwargs = {'parse_float': parse_float, 'object_pairs_hook': object_pairs_hook}
+    return response.json(**{k: v for k, v in kwargs.items() if v is not None})
+
+
+def encode_json_kwarg(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the parameter `json=data` of a request by encoded `data` if a fast codec is selected"""
+    if kwargs.get('json') is None or get_codec() == 'json':
+        return kwargs
+    kwargs = kwargs.copy()
+    kwargs['data'] = orjson.dumps(kwargs.pop('json'))
+    kwargs['headers'] = dict(kwargs.get('headers') or {}, **{'Content-Type': 'application/json'})
+    return kwargs
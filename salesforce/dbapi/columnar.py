@@ -0,0 +1,50 @@
+"""
+Column oriented batches of query results for analytics
+
+The output formats are:
+    'python': a dict of lists by column names (default)
+    'numpy':  a dict of NumPy arrays by column names (requires the package "numpy")
+    'arrow':  a pyarrow.RecordBatch (requires the package "pyarrow")
+
+Types of NumPy arrays and Arrow columns are inferred from values, with the dtype `object`
+for NumPy columns that are not homogeneous.
+"""
+import importlib
+from typing import Any, List
+
+from salesforce.dbapi.exceptions import InterfaceError
+
+OUTPUTS = ('python', 'numpy', 'arrow')
+
+
+def check_output(output: str) -> None:
+    if output not in OUTPUTS:
+        raise InterfaceError("Invalid output {!r} of columns, expected one of {}".format(output, OUTPUTS))
+
+
+def _import(package: str) -> Any:
+    try:
+        return importlib.import_module(package)
+    except ImportError:
+        raise InterfaceError("The package {!r} is required for the output of columns".format(package))
+
+
+def make_batch(names: List[str], columns: List[List[Any]], output: str = 'python') -> Any:
+    """Make a batch in the `output` format from columns of values"""
+    check_output(output)
+    if output == 'numpy':
+        numpy = _import('numpy')
+        return {name: numpy_array(numpy, values) for name, values in zip(names, columns)}
+    if output == 'arrow':
+        pyarrow = _import('pyarrow')
+        return pyarrow.RecordBatch.from_arrays([pyarrow.array(values) for values in columns], names=names)
+    return dict(zip(names, columns))
+
+
+def numpy_array(numpy: Any, values: List[Any]) -> Any:
+    try:
+        return numpy.array(values)
+    except ValueError:  # e.g. lists of different lengths
+        ret = numpy.empty(len(values), dtype=object)
+        ret[:] = values
+        return ret
@@ -1,7 +1,8 @@
 import re
 import threading
 import time
-from typing import Any, cast, Callable, Dict, Optional
+from collections import OrderedDict
+from typing import Any, cast, Callable, Dict, Hashable, Optional
 
 # Dependencies of salesforce.dbapi on Django are minimalized.
 # The biggest challenges are django.conf.settings, django.db.connections and django.test.
@@ -61,5 +62,53 @@ class TimeStatistics:
         return match.groups()[0]
 
 
+class LRUCache:
+    """Bounded cache of the least recently used items, shared by threads
+
+    The size is read from settings by the name `size_setting` (0 = disabled).
+    """
+
+    def __init__(self, size_setting: str, default_size: int = 256) -> None:
+        self.size_setting = size_setting
+        self.default_size = default_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # type: OrderedDict[Hashable, Any]
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self) -> int:
+        return cast(int, getattr(settings, self.size_setting, self.default_size) or 0)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        maxsize = self.maxsize
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 time_statistics = TimeStatistics(300)
 thread_loc = threading.local()
@@ -3,10 +3,13 @@ import decimal
 import json
 import logging
 import pprint
+import queue
 import re
 import sys
+import threading
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from itertools import islice
 from typing import (
@@ -17,19 +20,26 @@ from urllib.parse import urlencode
 
 import pytz
 import requests
-from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
 
 import salesforce
 from salesforce.auth import SalesforceAuth
-from salesforce.dbapi.common import get_max_retries, get_thread_connections, time_statistics as time_statistics
+from salesforce.dbapi.bulk import BulkQueryJob
+from salesforce.dbapi.codec import encode_json_kwarg, response_json
+from salesforce.dbapi.common import get_thread_connections, time_statistics as time_statistics
 from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+from salesforce.dbapi.governor import get_rate_governor
+from salesforce.dbapi.metrics import endpoint_class, metrics_registry
+from salesforce.dbapi.pool import get_http_adapter
+from salesforce.dbapi.retry import RetryState
 from salesforce.dbapi.exceptions import (  # NOQA pylint: disable=unused-import
     Error as Error, InterfaceError as InterfaceError, DatabaseError as DatabaseError, DataError as DataError,
     OperationalError as OperationalError, IntegrityError as IntegrityError, InternalError as InternalError,
     ProgrammingError as ProgrammingError, NotSupportedError as NotSupportedError,
     SalesforceError as SalesforceError, SalesforceWarning as SalesforceWarning,
     warn_sf, FakeReq, FakeResp, GenResponse)
-from salesforce.dbapi.subselect import QQuery, _TRow
+from salesforce.dbapi.columnar import check_output, make_batch
+from salesforce.dbapi.subselect import DecoderPlan, get_qquery, QQuery, _TRow
 
 try:
     import beatbox as beatbox  # type: ignore[import]  # pylint: disable=unused-import,useless-import-alias
@@ -43,6 +53,14 @@ log = logging.getLogger(__name__)
 # Values of seconds are with 3 decimal places in SF, but they are rounded to
 # whole seconds for the most of fields.
 SALESFORCE_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+0000'
+# the maximal number of subrequests in a 'composite/batch' request
+COMPOSITE_BATCH_SIZE = 25
+# the maximal number of records in a sObject Collections create, update or delete request
+COLLECTIONS_BATCH_SIZE = 200
+# the maximal number of Ids in a sObject Collections retrieve request
+RETRIEVE_BATCH_SIZE = 2000
+# the range of the batch size of query results requested by 'Sforce-Query-Options' header
+MIN_QUERY_BATCH_SIZE, MAX_QUERY_BATCH_SIZE = 200, 2000
 
 # ---
 
@@ -100,6 +118,9 @@ class RawConnection:
         self._api_version = settings_dict.get('API_VERSION', salesforce.API_VERSION)  # type: str
         self.debug_verbs = []        # type: List[str]
         self.composite_type = 'sobject-collections'  # 'sobject-collections' or 'composite'
+        # client-side rate governor shared by threads (see salesforce.dbapi.governor) or None
+        self.governor = get_rate_governor(self.alias, settings_dict.get('OPTIONS', {}))
+        self.metrics = metrics_registry.get(self.alias)  # see salesforce.dbapi.metrics
 
         self.sf_auth = SalesforceAuth.create_subclass_instance(db_alias=self.alias,
                                                                settings_dict=self.settings_dict)
@@ -178,7 +199,9 @@ class RawConnection:
             sf_session.auth = self.sf_auth  # a name for "requests" package
             if sf_instance_url and sf_instance_url not in sf_session.adapters:
                 # a repeated mount to the same prefix would cause a warning about unclosed SSL socket
-                sf_requests_adapter = HTTPAdapter(max_retries=get_max_retries())
+                # The adapter with a pool of connections is shared by threads (see salesforce.dbapi.pool)
+                sf_requests_adapter = get_http_adapter(self.alias, sf_instance_url,
+                                                       self.settings_dict.get('OPTIONS', {}))
                 sf_session.mount(sf_instance_url, sf_requests_adapter)
             # Additional headers work, but the same are added automatically by "requests' package.
             # sf_session.header = {'accept-encoding': 'gzip, deflate', 'connection': 'keep-alive'}
@@ -231,7 +254,7 @@ class RawConnection:
     def handle_api_exceptions(self, method: str, *url_parts: str, **kwargs: Any) -> requests.Response:
         """Call REST API and handle exceptions
         Params:
-            method:  'HEAD', 'GET', 'POST', 'PATCH' or 'DELETE'
+            method:  'HEAD', 'GET', 'POST', 'PATCH', 'PUT' or 'DELETE'
             url_parts: like in rest_api_url() method
             api_ver:   like in rest_api_url() method
             kwargs: other parameters passed to requests.request,
@@ -242,7 +265,7 @@ class RawConnection:
                     data=json.dumps(data))
         """
         # The outer part - about error handler
-        assert method in ('HEAD', 'GET', 'POST', 'PATCH', 'DELETE')
+        assert method in ('HEAD', 'GET', 'POST', 'PATCH', 'PUT', 'DELETE')
         cursor_context = kwargs.pop('cursor_context', None)
         errorhandler = cursor_context.errorhandler if cursor_context else self.errorhandler
         if not errorhandler:
@@ -260,48 +283,96 @@ class RawConnection:
         global request_count  # used only in single thread tests - OK # pylint:disable=global-statement
         # log.info("request %s %s", method, '/'.join(url_parts))
         api_ver = kwargs.pop('api_ver', None)
+        # atomic: a POST request can be retried after a transient error (see salesforce.dbapi.retry)
+        retry = RetryState(method, '/'.join(url_parts), atomic=kwargs.pop('atomic', False), metrics=self.metrics)
         url = self.rest_api_url(*url_parts, api_ver=api_ver)
         # The 'verify' option is about verifying TLS certificates
         kwargs_in = {'timeout': getattr(settings, 'SALESFORCE_QUERY_TIMEOUT', (4, 15)),
                      'verify': True}
         kwargs_in.update(kwargs)
+        kwargs_in = encode_json_kwarg(kwargs_in)
         log.debug('Request API URL: %s', url)
         request_count += 1
         session = self.sf_session
+        if self.governor and self.governor.limits_poll_due():
+            self.update_limits()
 
-        try:
-            time_statistics.update_callback(url, self.ping_connection)
-            response = session.request(method, url, **kwargs_in)
-        except requests.exceptions.Timeout:
-            raise SalesforceError("Timeout, URL=%s" % url)
-        except requests.exceptions.ConnectionError as exc:
-            raise SalesforceError("ConnectionError, URL=%s, %r" % (url, exc))
-        if (response.status_code == 401                      # Unauthorized
-                and 'json' in response.headers['content-type']
-                and response.json()[0]['errorCode'] == 'INVALID_SESSION_ID'):
-            # Reauthenticate and retry (expired or invalid session ID or OAuth)
-            token = session.auth.reauthenticate()
-            if token:
-                if 'headers' in kwargs:
-                    kwargs['headers'].update(Authorization='OAuth %s' % token)
-                try:
-                    response = session.request(method, url, **kwargs_in)
-                except requests.exceptions.Timeout:
+        while True:
+            try:
+                time_statistics.update_callback(url, self.ping_connection)
+                response = self._send_request(session, method, url, **kwargs_in)
+            except requests.exceptions.Timeout as exc:
+                delay = retry.next_delay(exc_reason=exc_retry_reason(exc))
+                if delay is None:
                     raise SalesforceError("Timeout, URL=%s" % url)
-
-        if response.status_code < 400:  # OK
-            # 200 "OK" (GET, POST)
-            # 201 "Created" (POST)
-            # 204 "No Content" (DELETE)
-            # 300 ambiguous items for external ID.
-            # 304 "Not Modified" (after conditional HEADER request for metadata),
-            self.api_usage.update(response.headers.get('Sforce-Limit-Info'))
-            return response
+                time.sleep(delay)
+                continue
+            except requests.exceptions.ConnectionError as exc:
+                delay = retry.next_delay(exc_reason=exc_retry_reason(exc))
+                if delay is None:
+                    raise SalesforceError("ConnectionError, URL=%s, %r" % (url, exc))
+                time.sleep(delay)
+                continue
+            if (response.status_code == 401                      # Unauthorized
+                    and 'json' in response.headers['content-type']
+                    and response.json()[0]['errorCode'] == 'INVALID_SESSION_ID'):
+                # Reauthenticate and retry (expired or invalid session ID or OAuth)
+                token = session.auth.reauthenticate()
+                self.metrics.record_reauthentication()
+                if token:
+                    if 'headers' in kwargs_in:
+                        kwargs_in['headers'].update(Authorization='OAuth %s' % token)
+                    try:
+                        response = self._send_request(session, method, url, **kwargs_in)
+                    except requests.exceptions.Timeout:
+                        raise SalesforceError("Timeout, URL=%s" % url)
+
+            if response.status_code < 400:  # OK
+                # 200 "OK" (GET, POST)
+                # 201 "Created" (POST)
+                # 204 "No Content" (DELETE)
+                # 300 ambiguous items for external ID.
+                # 304 "Not Modified" (after conditional HEADER request for metadata),
+                self.api_usage.update(response.headers.get('Sforce-Limit-Info'))
+                self.metrics.update_usage(self.api_usage.api_usage, self.api_usage.api_limit)
+                if self.governor:
+                    self.governor.update_usage(self.api_usage.api_usage, self.api_usage.api_limit)
+                return response
+            delay = retry.next_delay(response=response)
+            if delay is None:
+                break
+            time.sleep(delay)
         # status codes docs (400, 403, 404, 405, 415, 500)
         # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/errorcodes.htm
         self.raise_errors(response)
         return  # type: ignore[return-value]
 
+    def _send_request(self, session: requests.Session, method: str, url: str, **kwargs: Any
+                      ) -> requests.Response:
+        """Send one HTTP request governed by the rate governor and measured by metrics"""
+        start = time.monotonic()
+        try:
+            if self.governor is None:
+                response = session.request(method, url, **kwargs)
+            else:
+                with self.governor.request():
+                    response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as exc:
+            self.metrics.observe(endpoint_class(url), method, type(exc).__name__, time.monotonic() - start)
+            raise
+        self.metrics.observe_response(method, url, response, time.monotonic() - start)
+        return response
+
+    def update_limits(self) -> None:
+        """Read the daily API usage from the resource '/limits' (it is also counted as a request)"""
+        data = response_json(self.handle_api_exceptions('GET', 'limits/'))
+        daily = data.get('DailyApiRequests')
+        if daily:
+            self.api_usage.api_limit = daily['Max']
+            self.api_usage.api_usage = daily['Max'] - daily['Remaining']
+            if self.governor:
+                self.governor.update_usage(self.api_usage.api_usage, self.api_usage.api_limit)
+
     @staticmethod
     def raise_errors(response: GenResponse) -> None:
         """The innermost part - report errors by exceptions"""
@@ -348,6 +419,8 @@ class RawConnection:
         url = self.rest_api_url(*url_parts, api_ver=api_ver)
         url = re.sub(r'^\w+://[^/]+', '', url)
         data = [{'method': 'GET', 'url': url, 'referenceId': 'subrequest_0'}]
+        if kwargs.get('headers'):
+            data[0]['httpHeaders'] = kwargs['headers']
         return self.composite_request(data)
 
     def composite_request(self, data: List[Dict[str, Any]]) -> requests.Response:
@@ -359,11 +432,63 @@ class RawConnection:
         """
         # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/resources_composite_sobjects_collections.htm
         post_data = {'compositeRequest': data, 'allOrNone': True}
-        resp = self.handle_api_exceptions('POST', 'composite', json=post_data)
-        comp_resp = resp.json()['compositeResponse']
+        resp = self.handle_api_exceptions('POST', 'composite', json=post_data, atomic=True)
+        comp_resp = response_json(resp)['compositeResponse']
+        if self._check_composite_response(data, comp_resp, resp.headers['Content-Type']):
+            return resp
+        return  # type: ignore[return-value]  # TODO analyze whether this line is accessible in the case of 404 code
+
+    def batch_request(self, url_parts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Run independent GET requests (e.g. queries) by 'composite/batch' requests, get the results
+
+        Up to 25 subrequests are sent in one request. The url_parts are relative
+        to the API version, e.g. 'query/?q=SELECT+Id+FROM+Account'.
+        """
+        # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/resources_composite_batch.htm
+        results = []  # type: List[Dict[str, Any]]
+        for i in range(0, len(url_parts), COMPOSITE_BATCH_SIZE):
+            urls = ['v{}/{}'.format(self.api_ver, x) for x in url_parts[i:i + COMPOSITE_BATCH_SIZE]]
+            post_data = {'batchRequests': [{'method': 'GET', 'url': url} for url in urls], 'haltOnError': False}
+            resp = self.handle_api_exceptions('POST', 'composite/batch', json=post_data, atomic=True)
+            batch_results = response_json(resp)['results']
+            for j, (url, result) in enumerate(zip(urls, batch_results)):
+                if result['statusCode'] >= 400:
+                    bad_req = FakeReq('GET', url, '', context={i + j: url})
+                    bad_resp = FakeResp(result['statusCode'], {'Content-Type': resp.headers['Content-Type']},
+                                        json.dumps(result['result']), bad_req)
+                    self.raise_errors(bad_resp)  # type: ignore[arg-type]
+            results.extend(x['result'] for x in batch_results)
+        return results
+
+    def graph_request(self, graphs: List[Dict[str, Any]]) -> List[Dict[str, Dict[str, Any]]]:
+        """Call a 'composite/graph' request, raise the error of a failed graph
+
+        Every graph is a transaction with up to 500 nodes: subrequests like in composite_request(),
+        that can reference the results of previous nodes e.g. "@{refAccount.id}".
+        The result is a dict of subresponses by referenceId for every graph.
+        """
+        # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/resources_composite_graph.htm
+        resp = self.handle_api_exceptions('POST', 'composite/graph', json={'graphs': graphs}, atomic=True)
+        graph_responses = {x['graphId']: x for x in response_json(resp)['graphs']}
+        results = []
+        for graph in graphs:
+            graph_resp = graph_responses[graph['graphId']]
+            comp_resp = graph_resp['graphResponse']['compositeResponse']
+            if not graph_resp['isSuccessful']:
+                by_ref = {x['referenceId']: x for x in comp_resp}
+                self._check_composite_response(
+                    graph['compositeRequest'], [by_ref[x['referenceId']] for x in graph['compositeRequest']],
+                    resp.headers['Content-Type'])
+            results.append({x['referenceId']: x for x in comp_resp})
+        return results
+
+    @classmethod
+    def _check_composite_response(cls, data: List[Dict[str, Any]], comp_resp: List[Dict[str, Any]],
+                                  content_type: str) -> bool:
+        """Check a 'composite' response and raise the error of the bad subrequest, if any"""
         is_ok = all(x['httpStatusCode'] < 400 for x in comp_resp)
         if is_ok:
-            return resp
+            return True
 
         # construct an equivalent of individual bad request/response
         bad_responses = {
@@ -382,13 +507,13 @@ class RawConnection:
         body = [merge_dict(x, referenceId=bad_response['referenceId'])
                 for x in bad_response['body']]
         bad_resp_headers = bad_response['httpHeaders'].copy()
-        bad_resp_headers.update({'Content-Type': resp.headers['Content-Type']})
+        bad_resp_headers.update({'Content-Type': content_type})
 
         bad_resp = FakeResp(bad_response['httpStatusCode'], bad_resp_headers, json.dumps(body), bad_req
                             )  # type: requests.Response # type: ignore[assignment]
 
-        self.raise_errors(bad_resp)
-        return  # type: ignore[return-value]  # TODO analyze whether this line is accessible in the case of 404 code
+        cls.raise_errors(bad_resp)
+        return False
 
     @staticmethod
     def _group_results(resp_data: List[Dict[str, Any]], records: Sequence[Dict[str, Any]], all_or_none: bool
@@ -418,27 +543,88 @@ class RawConnection:
                                     all_or_none: bool = True
                                     ) -> List[str]:
         # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/resources_composite_composite.htm
-        # pylint:disable=too-many-locals
+        records, kwargs = self._prepare_collections_request(method, records, all_or_none)
+        resp = self.handle_api_exceptions(method, 'composite/sobjects', atomic=bool(all_or_none), **kwargs)
+        return self._process_collections_response(response_json(resp), records, all_or_none)
+
+    def sobject_collections_parallel(self, method: str, records: Sequence[Any], all_or_none: Optional[bool] = None,
+                                     batch_size: int = COLLECTIONS_BATCH_SIZE) -> List[str]:
+        """Write any number of records by 'composite/sobjects' requests of `batch_size` records in parallel threads
+
+        The Ids are in the order of records. Every request is a separate transaction.
+        After a failed request no next request is started, except with `all_or_none=False` that tries
+        all requests. The first error by the order of records is raised after all started requests finished.
+        The number of threads is limited by `settings.SF_PARALLEL_MAX_WORKERS` (default 8).
+        """
+        batch_size = min(batch_size, COLLECTIONS_BATCH_SIZE)
+        batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+        if len(batches) <= 1:
+            return self.sobject_collections_request(method, records, all_or_none=all_or_none)
+        failed = threading.Event()
+
+        def send(batch: Sequence[Any]) -> Optional[List[str]]:
+            if failed.is_set():
+                return None
+            try:
+                return self.sobject_collections_request(method, batch, all_or_none=all_or_none)
+            except Exception:
+                if all_or_none is not False:
+                    failed.set()
+                raise
+
+        with connection_thread_pool(self, len(batches)) as pool:
+            futures = [pool.submit(send, batch) for batch in batches]
+        ids = []  # type: List[str]
+        for future in futures:
+            exc = future.exception()
+            if exc is not None:
+                raise exc
+            ids.extend(future.result() or [])
+        return ids
+
+    def sobject_collections_retrieve(self, sobject: str, ids: Sequence[str], fields: Sequence[str]
+                                     ) -> List[Optional[Dict[str, Any]]]:
+        """Retrieve records by Ids by 'composite/sobjects/{sobject}' requests (up to 2000 Ids per request)
+
+        The records are in the same format as records of a query. It is None if an Id is not found.
+        """
+        # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/resources_composite_sobjects_collections_retrieve.htm
+        results = []  # type: List[Optional[Dict[str, Any]]]
+        for i in range(0, len(ids), RETRIEVE_BATCH_SIZE):
+            post_data = {'ids': list(ids[i:i + RETRIEVE_BATCH_SIZE]), 'fields': list(fields)}
+            # a POST without any change of data, that can be retried
+            resp = self.handle_api_exceptions('POST', 'composite/sobjects', sobject, json=post_data, atomic=True)
+            results.extend(response_json(resp))
+        return results
+
+    @staticmethod
+    def _prepare_collections_request(method: str, records: Sequence[Dict[str, Any]], all_or_none: bool
+                                     ) -> Tuple[Sequence[Dict[str, Any]], Dict[str, Any]]:
+        """Get records and request kwargs for a 'composite/sobjects' request
+
+        (common for the sync and async driver)
+        """
         assert method in ('GET', 'POST', 'PATCH', 'DELETE')
         if method == 'DELETE':
             assert all(isinstance(x, str) for x in records)
             ids = cast(Sequence[str], records)
             params = dict(ids=','.join(ids), allOrNone=str(bool(all_or_none)).lower())
-            resp = self.handle_api_exceptions(method, 'composite/sobjects', params=params)
+            return records, {'params': params}
+        assert all(isinstance(x, dict) for x in records)
+        if method in ('POST', 'PATCH'):
+            records = [merge_dict(x, attributes={'type': x['type_']}) for x in records]
+            for x in records:
+                x.pop('type_')
+            post_data = {'records': records, 'allOrNone': all_or_none}
         else:
-            assert all(isinstance(x, dict) for x in records)
-            if method in ('POST', 'PATCH'):
-                records = [merge_dict(x, attributes={'type': x['type_']}) for x in records]
-                for x in records:
-                    x.pop('type_')
-                post_data = {'records': records, 'allOrNone': all_or_none}
-            else:
-                raise NotSupportedError("Method {} not implemended".format(method))
-
-            resp = self.handle_api_exceptions(method, 'composite/sobjects', json=post_data)
-        resp_data = resp.json()
-
-        x_ok, x_err, x_roll = self._group_results(resp_data, records, all_or_none)  # pylint:disable=unused-variable
+            raise NotSupportedError("Method {} not implemended".format(method))
+        return records, {'json': post_data}
+
+    @classmethod
+    def _process_collections_response(cls, resp_data: List[Dict[str, Any]], records: Sequence[Dict[str, Any]],
+                                      all_or_none: bool) -> List[str]:
+        """Get the list of Ids from a 'composite/sobjects' response or raise errors"""
+        x_ok, x_err, x_roll = cls._group_results(resp_data, records, all_or_none)  # pylint:disable=unused-variable
         is_ok = not x_err
         if is_ok:
             return [x['id'] for i, x in x_ok]  # for .lastrowid
@@ -482,6 +668,17 @@ Connection = RawConnection
 
 
 # DB API function
+def exc_retry_reason(exc: requests.exceptions.RequestException) -> str:
+    """Classify a request without response for the retry policy (see salesforce.dbapi.retry)
+
+    'ConnectError' if the request has certainly not been sent, 'Timeout' or 'ConnectionError' otherwise
+    """
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    if isinstance(exc, requests.exceptions.ConnectTimeout) or isinstance(reason, ConnectTimeoutError):
+        return 'ConnectError'  # also NewConnectionError, a subclass of ConnectTimeoutError
+    return 'Timeout' if isinstance(exc, requests.exceptions.Timeout) else 'ConnectionError'
+
+
 def connect(**params: Any) -> Connection:
     return Connection(**params)
 
@@ -492,6 +689,22 @@ def get_connection(alias: str, **params: Any) -> Connection:
     return cast(Connection, get_thread_connections()[alias])
 
 
+def connection_thread_pool(connection: Connection, max_workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """Get a thread pool where the existing connection can be used by cursors in all threads
+
+    The number of threads is limited by `settings.SF_PARALLEL_MAX_WORKERS` (default 8)
+    because Salesforce limits the number of concurrent long running requests.
+    """
+    limit = getattr(settings, 'SF_PARALLEL_MAX_WORKERS', 8)  # type: int
+    max_workers = min(max_workers or limit, limit)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sf-parallel',
+                              initializer=_register_connection, initargs=(connection,))
+
+
+def _register_connection(connection: Connection) -> None:
+    get_thread_connections()[connection.alias] = connection
+
+
 class Cursor(Generic[_TRow]):
     """Cursor (local part is simple, remote part is stateless for small result sets)
 
@@ -537,9 +750,21 @@ class Cursor(Generic[_TRow]):
         self._next_records_url = None     # type: Optional[str]
         self.handle = None                # type: Optional[str]
         self.qquery = None                # type: Optional[QQuery]
+        # types of columns of the next SELECT, e.g. 'datetime' (see DecoderPlan)
+        self.column_types = None          # type: Optional[Sequence[Optional[str]]]
+        self._decoder = None              # type: Optional[DecoderPlan]
         self._raw_iterator = None         # type: Optional[Iterator[Dict[str, Any]]]
+        # JSON records from the current position, shared by rows and columns (see _gen_records)
+        self._records = None              # type: Optional[Iterator[Dict[str, Any]]]
         self._iter = not_executed_yet()   # type: Iterator[_TRow]
         self.closed = False
+        # the number of next chunks that are read ahead by a background thread (0 = disabled)
+        self.prefetch_chunks = 0
+        # the requested number of rows in a chunk of query results (None = the default of Salesforce)
+        self.batch_size = None            # type: Optional[int]
+        self._prefetcher = None           # type: Optional[ChunkPrefetcher]
+        # next result sets of executemany(): (soql, the first chunk)
+        self._result_sets = []            # type: List[Tuple[str, Dict[str, Any]]]
 
     # -- DB API methods
 
@@ -550,15 +775,39 @@ class Cursor(Generic[_TRow]):
         self.closed = True
 
     def execute(self, soql: str, parameters: Optional[Iterable[Any]] = None, query_all: bool = False,
-                tooling_api: bool = False) -> None:
+                tooling_api: bool = False, prefetch_chunks: Optional[int] = None, bulk: bool = False,
+                first_chunk: Optional[Dict[str, Any]] = None, batch_size: Optional[int] = None,
+                column_types: Optional[Sequence[Optional[str]]] = None) -> None:
+        """Execute a query
+
+        bulk: True: The SELECT is executed as a Bulk API 2.0 query job, that is efficient for
+            millions of rows. Values are strings, except None and datetime. (see `execute_bulk_select`)
+        first_chunk: The first chunk of the SELECT result if it has been fetched yet,
+            e.g. by `RawConnection.batch_request`. Next chunks are fetched normally.
+        batch_size: The requested number of rows in chunks of a SELECT result, that is clamped
+            to the range 200 to 2000 supported by Salesforce. It is only a hint for Salesforce.
+        column_types: Types of columns of a SELECT for the decoder of rows: 'datetime', 'date',
+            other string for values without conversion or None if unknown (see DecoderPlan).
+            The type of unknown columns is guessed by the first not null value of the column.
+        """
         self._clean()
+        self.column_types = column_types
+        if prefetch_chunks is not None:
+            self.prefetch_chunks = prefetch_chunks
+        if batch_size is not None:
+            self.batch_size = max(MIN_QUERY_BATCH_SIZE, min(batch_size, MAX_QUERY_BATCH_SIZE))
         parameters = parameters or []
         if 'use_debug_info' in self.connection.debug_verbs:
             processed_soql = str(soql) % tuple(arg_to_soql(x) for x in parameters)
             self.connection.debug_info['soql'] = (soql, parameters, processed_soql)
         sqltype = soql.split(None, 1)[0].upper()
-        if sqltype == 'SELECT':
-            self.execute_select(soql, parameters, query_all=query_all, tooling_api=tooling_api)
+        if sqltype == 'SELECT' and bulk:
+            if tooling_api:
+                raise NotSupportedError("Bulk API query is not supported by Tooling API")
+            self.execute_bulk_select(soql, parameters, query_all=query_all)
+        elif sqltype == 'SELECT':
+            self.execute_select(soql, parameters, query_all=query_all, tooling_api=tooling_api,
+                                first_chunk=first_chunk)
         elif sqltype == 'EXPLAIN':
             assert not tooling_api
             self.execute_explain(soql, parameters, query_all=query_all)
@@ -567,7 +816,20 @@ class Cursor(Generic[_TRow]):
             raise ProgrammingError("Unexpected command '{}'".format(sqltype))
 
     def executemany(self, operation: str, seq_of_parameters: Iterable[Iterable[Any]]) -> None:
+        """Execute a command for every parameters
+
+        SELECT queries are executed together by 'composite/batch' requests (25 queries per request).
+        The cursor is positioned on the result of the first query and the next results
+        are selected by nextset().
+        """
         self._clean()
+        if operation.split(None, 1)[0].upper() == 'SELECT':
+            url_parts = [self.select_url(operation, params) for params in seq_of_parameters]
+            if url_parts:
+                chunks = self.connection.batch_request(url_parts)
+                self._result_sets = [(operation, chunk) for chunk in chunks]
+                self.nextset()
+            return
         for param in seq_of_parameters:
             self.execute(operation, param)
 
@@ -585,6 +847,43 @@ class Cursor(Generic[_TRow]):
         self._check_data()
         return list(self)
 
+    def fetch_columns(self, size: Optional[int] = None, output: str = 'python') -> Any:
+        """Fetch the next `size` rows (all remaining rows if None) as columns
+
+        output: 'python': a dict of lists by column names, 'numpy': a dict of NumPy arrays,
+            'arrow': a pyarrow.RecordBatch (see salesforce.dbapi.columnar)
+        Columns of a normal query are decoded directly from JSON records without row objects.
+        """
+        check_output(output)
+        return make_batch(self._column_names(), self._fetch_columns(size), output)
+
+    def iter_batches(self, size: int = MAX_QUERY_BATCH_SIZE, output: str = 'python') -> Iterator[Any]:
+        """Iterate over the remaining rows by batches of columns with up to `size` rows (see fetch_columns)"""
+        check_output(output)
+        names = self._column_names()
+        while True:
+            columns = self._fetch_columns(size)
+            if not columns or not columns[0]:
+                break
+            yield make_batch(names, columns, output)
+
+    def _column_names(self) -> List[str]:
+        self._check_data()
+        return [x[0] for x in self.description or []]
+
+    def _fetch_columns(self, size: Optional[int]) -> List[List[Any]]:
+        if self._records is not None and self._decoder is not None:
+            assert self.rownumber is not None
+            records = list(islice(self._records, size))
+            self.rownumber += len(records)
+            return self._decoder.decode_columns(records)
+        # the rows are transposed for other queries, e.g. aggregations or Bulk API queries
+        rows = self.fetchall() if size is None else self.fetchmany(size)
+        names = self._column_names()
+        if rows and isinstance(rows[0], dict):
+            return [[cast(Dict[str, Any], row)[name] for row in rows] for name in names]
+        return [list(x) for x in zip(*rows)] if rows else [[] for _ in names]
+
     def scroll(self, value: int, mode: str = 'relative') -> None:
         # TODO It is a beta based on an undocumented information
         # The undocumented structure of 'nextRecordsUrl' is
@@ -600,6 +899,7 @@ class Cursor(Generic[_TRow]):
 
         assert self._chunk_offset is not None and self.rownumber is not None
         new_offset = int(value) + (0 if mode == 'absolute' else self.rownumber)
+        self._stop_prefetch()
         if not self._chunk_offset <= new_offset < self._chunk_offset + len(self._chunk):
             url = '{}-{}'.format(self.handle, new_offset)
             self.query_more(url)
@@ -609,9 +909,18 @@ class Cursor(Generic[_TRow]):
             rel_offs = new_offset - self._chunk_offset
             next(islice(self._raw_iterator, rel_offs, rel_offs), None)
         self.rownumber = new_offset
-        self._iter = iter(self._gen())
-
-    # .nextset()  not implemented
+        self._start_iter()
+
+    def nextset(self) -> Optional[bool]:
+        """Skip to the next result set of executemany(), return None if there are no more sets"""
+        if not self._result_sets:
+            return None
+        result_sets = self._result_sets
+        soql, chunk = result_sets.pop(0)
+        self._clean()
+        self._result_sets = result_sets
+        self._start_select(soql, chunk)
+        return True
 
     def setinputsizes(self, sizes: Any) -> None:
         pass  # this method is allowed to do nothing
@@ -653,40 +962,112 @@ class Cursor(Generic[_TRow]):
     def __iter__(self) -> 'Cursor[_TRow]':
         return self
 
-    def _gen(self) -> Iterator[_TRow]:
-        assert self._chunk_offset is not None and self.rownumber is not None
-        assert self.qquery
+    def _start_iter(self) -> None:
+        self._records = self._gen_records()
+        if self.qquery is not None and self.qquery.has_child_rel_field:
+            self._records = map(self._complete_child_records, self._records)
+        self._iter = iter(self._gen())
 
-        while True:
+    def _gen(self) -> Iterator[_TRow]:
+        assert self.rownumber is not None and self.qquery and self._records is not None
+        for row in self.qquery.parse_rest_response(self._records, self.rowcount,
+                                                   row_type=self.row_type, plan=self._decoder):
+            self.rownumber += 1
+            yield cast(_TRow, row)
+
+    def _gen_records(self) -> Iterator[Dict[str, Any]]:
+        """Get JSON records from the current position, the next chunks are fetched when necessary"""
+        assert self._chunk_offset is not None
+        if self._raw_iterator is None:
             self._raw_iterator = iter(self._chunk)
-            for row in self.qquery.parse_rest_response(self._raw_iterator, self.rowcount,
-                                                       row_type=self.row_type):
-                yield cast(_TRow, row)
-                self.rownumber += 1
+        while True:
+            yield from self._raw_iterator
             if not self._next_records_url:
                 break
             new_offset = self._chunk_offset + len(self._chunk)
-            self.query_more(self._next_records_url)
+            # release the consumed chunk before the next is fetched
+            self._chunk = []
+            self._raw_iterator = None
+            if self._prefetcher:
+                self._set_chunk(self._prefetcher.get())
+            else:
+                self.query_more(self._next_records_url)
             self._chunk_offset = new_offset
+            self._raw_iterator = iter(self._chunk)
+
+    def _complete_child_records(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch the next chunks of child records of parent-to-child subqueries in the record if not `done`"""
+        for key, value in list(record.items()):
+            if isinstance(value, dict) and 'records' in value and not value.get('done', True):
+                records = list(value['records'])
+                chunk = value
+                while not chunk['done']:
+                    chunk = self._fetch_chunk(self.connection, chunk['nextRecordsUrl'])
+                    records.extend(chunk['records'])
+                record = dict(record)
+                record[key] = {'totalSize': value['totalSize'], 'done': True, 'records': records}
+        return record
 
     def execute_select(self, soql: str, parameters: Iterable[Any], query_all: bool = False,
-                       tooling_api: bool = False) -> None:
+                       tooling_api: bool = False, first_chunk: Optional[Dict[str, Any]] = None) -> None:
+        if first_chunk is None:
+            url_part = self.select_url(soql, parameters, query_all=query_all, tooling_api=tooling_api)
+            self._check()
+            first_chunk = self._fetch_chunk(self.connection, url_part)
+        self._start_select(soql, first_chunk)
+
+    @staticmethod
+    def select_url(soql: str, parameters: Iterable[Any], query_all: bool = False, tooling_api: bool = False
+                   ) -> str:
         processed_sql = str(soql) % tuple(arg_to_soql(x) for x in parameters)
         service = '' if not tooling_api else 'tooling/'
         service += 'query' if not query_all else 'queryAll'
+        return '/?'.join((service, urlencode(dict(q=processed_sql))))
 
-        self.qquery = qquery = QQuery(soql)
+    def _start_select(self, soql: str, first_chunk: Dict[str, Any]) -> None:
+        self.qquery = qquery = get_qquery(soql)
         # TODO better description
         self.description = [(alias, None, None, None, name) for alias, name in
                             zip(qquery.aliases, qquery.fields)]
-
-        url_part = '/?'.join((service, urlencode(dict(q=processed_sql))))
-        self.query_more(url_part)
+        if qquery.supports_decoder_plan:
+            self._decoder = DecoderPlan(qquery, self.column_types)
+        self._set_chunk(first_chunk)
         self._chunk_offset = 0
         self.rownumber = 0
         if self._next_records_url:
             self.handle = self._next_records_url.split('-')[0]
-        self._iter = iter(self._gen())
+            if self.prefetch_chunks > 0:
+                self._prefetcher = ChunkPrefetcher(self, self._next_records_url, self.prefetch_chunks)
+        self._start_iter()
+
+    def execute_bulk_select(self, soql: str, parameters: Iterable[Any], query_all: bool = False) -> None:
+        """Execute a SELECT by a Bulk API 2.0 query job and read CSV results by pages
+
+        Not supported are aggregations, child subqueries (parent-to-child relationships) and OFFSET.
+        The values of other types than DateTime are strings, e.g. 'true', '123.0'.
+        The conversion is done by Django field converters.
+        """
+        processed_sql = str(soql) % tuple(arg_to_soql(x) for x in parameters)
+        self.qquery = qquery = get_qquery(soql)
+        if not qquery.supports_bulk_query:
+            raise NotSupportedError("This query is not supported by Bulk API: {}".format(soql))
+        self.description = [(alias, None, None, None, name) for alias, name in
+                            zip(qquery.aliases, qquery.fields)]
+        job = BulkQueryJob(self.connection, processed_sql, query_all=query_all)
+        job.create()
+        job.wait()
+        self.rowcount = job.info.get('numberRecordsProcessed', -1)
+        self.handle = job.job_id
+        self._chunk_offset = 0
+        self.rownumber = 0
+        self._iter = iter(self._gen_bulk(job))
+
+    def _gen_bulk(self, job: BulkQueryJob) -> Iterator[_TRow]:
+        assert self.qquery and self.rownumber is not None
+        for header, rows in job.iter_pages():
+            for row in self.qquery.parse_csv_rows(header, rows, row_type=self.row_type):
+                self.rownumber += 1
+                yield cast(_TRow, row)
 
     def execute_explain(self, soql: str, parameters: Iterable[Any], query_all: bool = False) -> None:
         # https://developer.salesforce.com/docs/atlas.en-us.api_rest.meta/api_rest/dome_query_explain.htm
@@ -696,7 +1077,7 @@ class Cursor(Generic[_TRow]):
         processed_sql = str(soql) % tuple(arg_to_soql(x) for x in parameters)
         service = 'query' if not query_all else 'queryAll'
 
-        self.qquery = QQuery(soql)
+        self.qquery = get_qquery(soql)
         self.description = [('detail', None, None, None, 'detail')]
         url_part = '/?'.join((service, urlencode(dict(explain=processed_sql))))
         ret = self.handle_api_exceptions('GET', url_part)
@@ -704,15 +1085,26 @@ class Cursor(Generic[_TRow]):
         self._chunk = [{'explain': x} for x in pprint.pformat(ret.json(), indent=1, width=100).split('\n')]
         self._chunk_offset = 0
         self.rownumber = 0
-        self._iter = iter(self._gen())
+        self._start_iter()
 
     def query_more(self, nextRecordsUrl: str) -> None:
         self._check()
+        self._set_chunk(self._fetch_chunk(self.connection, nextRecordsUrl))
+
+    def _fetch_chunk(self, connection: Connection, nextRecordsUrl: str) -> Dict[str, Any]:
+        """Get the JSON data of the chunk (also from another thread by an explicit connection)"""
+        kwargs = {}  # type: Dict[str, Any]
+        if self.batch_size:
+            kwargs['headers'] = {'Sforce-Query-Options': 'batchSize={}'.format(self.batch_size)}
         if len(nextRecordsUrl) < 15500:
-            ret = self.handle_api_exceptions('GET', nextRecordsUrl).json()
+            ret = response_json(connection.handle_api_exceptions('GET', nextRecordsUrl, cursor_context=self,
+                                                                 **kwargs))
         else:
-            ret = self.connection.handle_api_exceptions_big('GET', nextRecordsUrl).json()
+            ret = response_json(connection.handle_api_exceptions_big('GET', nextRecordsUrl, **kwargs))
             ret = ret['compositeResponse'][0]['body']
+        return cast(Dict[str, Any], ret)
+
+    def _set_chunk(self, ret: Dict[str, Any]) -> None:
         self.rowcount = ret['totalSize']  # may be more accurate than the initial approximate value
         self._chunk = ret['records']
         self._next_records_url = ret.get('nextRecordsUrl')
@@ -725,7 +1117,13 @@ class Cursor(Generic[_TRow]):
         if not self._iter:
             raise ProgrammingError('No previous .execute("select...") before .fetch...()')
 
+    def _stop_prefetch(self) -> None:
+        if self._prefetcher:
+            self._prefetcher.stop()
+            self._prefetcher = None
+
     def _clean(self) -> None:
+        self._stop_prefetch()
         self.description = None
         self.rowcount = -1
         self.rownumber = None
@@ -736,8 +1134,12 @@ class Cursor(Generic[_TRow]):
         self._chunk_offset = None
         self.handle = None
         self.qquery = None
+        self.column_types = None
+        self._decoder = None
         self._raw_iterator = None
+        self._records = None
         self._iter = not_executed_yet()
+        self._result_sets = []
         self._check()
 
     def handle_api_exceptions(self, method: str, *url_parts: str, **kwargs: Any) -> requests.Response:
@@ -773,6 +1175,55 @@ class Cursor(Generic[_TRow]):
         return self.handle_api_exceptions('GET', '', api_ver='').json()
 
 
+class ChunkPrefetcher:
+    """Read ahead the next chunks of a query by a background thread
+
+    The consumer gets the JSON data of chunks by `.get()` in the original order.
+    The number of chunks read ahead is limited by `max_chunks` to cap the memory.
+    The connection is shared with the thread of the cursor.
+    """
+    def __init__(self, cursor: 'Cursor[Any]', next_records_url: str, max_chunks: int) -> None:
+        self._cursor = cursor
+        self._connection = cursor.connection
+        self._queue = queue.Queue(maxsize=max_chunks)  # type: queue.Queue[Tuple[Optional[Dict[str, Any]], Optional[BaseException]]]  # noqa
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(next_records_url,), daemon=True,
+                                        name='sf-prefetch')
+        self._thread.start()
+
+    def _run(self, url: Optional[str]) -> None:
+        while url and not self._stop_event.is_set():
+            try:
+                ret = self._cursor._fetch_chunk(self._connection, url)  # pylint:disable=protected-access
+            except BaseException as exc:  # pylint:disable=broad-except  # the error is raised by the consumer
+                self._put((None, exc))
+                return
+            self._put((ret, None))
+            url = ret.get('nextRecordsUrl')
+
+    def _put(self, item: Tuple[Optional[Dict[str, Any]], Optional[BaseException]]) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(self) -> Dict[str, Any]:
+        """Get the next chunk or raise the exception of the request"""
+        ret, exc = self._queue.get()
+        if exc:
+            raise exc
+        assert ret is not None
+        return ret
+
+    def stop(self) -> None:
+        """Stop the thread after the current request (the next chunks are not necessary)"""
+        self._stop_event.set()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
 # ---
 
 CursorDescription = NamedTuple(
@@ -0,0 +1,328 @@
+"""
+Export of Salesforce objects to partitioned CSV or Parquet files
+
+A query is split to partitions by ranges of a key field ('Id' by default or a DateTime field
+e.g. 'CreatedDate'). Partitions are exported by a pool of processes, every partition to its own
+file, e.g. "Contact-0003.csv". A file is written by chunks of rows with a bounded memory and it
+is renamed to the final name only after it is complete. Completed partitions are recorded in
+a checkpoint file e.g. "Contact.checkpoint.json", therefore a repeated export after a crash
+resumes by the remaining partitions. The checkpoint is removed when the export is complete.
+
+Parquet files require the package "pyarrow".
+
+Example:
+    stats = Exporter('salesforce', "SELECT Id, LastName FROM Contact", output_dir='/tmp/export').run()
+"""
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from salesforce.dbapi.codec import response_json
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+from salesforce.dbapi.driver import RawConnection, arg_to_soql, get_connection
+from salesforce.dbapi.exceptions import InterfaceError, NotSupportedError
+from salesforce.dbapi.metrics import metrics_registry
+from salesforce.dbapi.partitions import split_range
+from salesforce.dbapi.subselect import mark_quoted_strings, subst_quoted_strings
+
+FORMATS = ('csv', 'parquet')
+# types of fields in describe that are not exported, because they are compound or binary
+SKIPPED_FIELD_TYPES = ('address', 'location', 'base64')
+# types of Parquet columns by types of fields in describe, other types are strings
+ARROW_TYPES = {
+    'boolean': 'bool',
+    'int': 'int64',
+    'long': 'int64',
+    'double': 'float64',
+    'currency': 'float64',
+    'percent': 'float64',
+    'date': 'date32',
+    'datetime': 'timestamp',
+}
+# types of columns for the decoder of rows by types of fields in describe (see DecoderPlan)
+DECODER_TYPES = {'date': 'date', 'datetime': 'datetime'}
+
+CHECKPOINT_VERSION = 1
+
+
+class PartitionResult(NamedTuple):
+    index: int
+    rows: int
+    requests: int   # the number of API requests
+    api_usage: int  # API requests used per last 24 hours, known after the last request
+    api_limit: int
+
+
+class ExportStats(NamedTuple):
+    name: str
+    rows: int
+    partitions: int
+    skipped: int    # the number of partitions completed by a previous run
+    requests: int
+    seconds: float
+    api_usage: int
+    api_limit: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return ("Exported {} rows of {} by {} partitions ({} resumed) in {:.1f} s ({:.0f} rows/s), "
+                "{} API requests, API usage {}/{}".format(
+                    self.rows, self.name, self.partitions, self.skipped, self.seconds, self.rows_per_second,
+                    self.requests, self.api_usage, self.api_limit))
+
+
+def describe_soql(connection: RawConnection, sobject: str) -> Tuple[str, Dict[str, str]]:
+    """Get SOQL of all exportable fields of the SObject and types of fields by names"""
+    describe = response_json(connection.handle_api_exceptions('GET', 'sobjects', sobject, 'describe/'))
+    fields = [x for x in describe['fields'] if x['type'] not in SKIPPED_FIELD_TYPES]
+    soql = 'SELECT {} FROM {}'.format(', '.join(x['name'] for x in fields), describe['name'])
+    return soql, {x['name']: x['type'] for x in fields}
+
+
+def describe_types(connection: RawConnection, sobject: str) -> Dict[str, str]:
+    """Get types of fields of the SObject by names"""
+    return describe_soql(connection, sobject)[1]
+
+
+def split_soql(soql: str) -> Tuple[str, str, str]:
+    """Split a simple SOQL to (the part "SELECT ... FROM table", the table, the condition after WHERE)"""
+    marked, params = mark_quoted_strings(soql)
+    match = re.match(r'(SELECT\s.*?\sFROM\s+(\w+))(?:\s+WHERE\s+(.*?))?\s*$', marked, re.I | re.S)
+    if not match or re.search(r'\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|OFFSET)\b|\(\s*SELECT\b', marked, re.I):
+        raise NotSupportedError("Only a query without aggregation, child subqueries, ordering or limits "
+                                "can be exported by partitions: {}".format(soql))
+    select_from, table, where = match.groups()
+    n_params = select_from.count('@')
+    return (subst_quoted_strings(select_from, params[:n_params]), table,
+            subst_quoted_strings(where or '', params[n_params:]))
+
+
+def plan_partitions(connection: RawConnection, soql: str, key: str = 'Id', partitions: int = 8) -> List[str]:
+    """Get SOQL of partitions of the query by ranges of the key field (Id or a DateTime field)
+
+    Rows with null value of the key are in the last partition.
+    """
+    select_from, table, where = split_soql(soql)
+    cond = '({}) AND '.format(where) if where else ''
+
+    def bound(order: str) -> Any:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT {key} FROM {table} WHERE {cond}{key} != null ORDER BY {key} {order} LIMIT 1'
+                           .format(key=key, table=table, cond=cond, order=order).replace('%', '%%'))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    low = bound('ASC')
+    high = bound('DESC') if low is not None else None
+    if low is None or partitions <= 1 or low == high:
+        return [soql]
+    if not isinstance(low, (str, datetime.datetime)):
+        raise NotSupportedError("The key {} for partitions must be an Id or a DateTime field".format(key))
+    bounds = [arg_to_soql(x) for x in split_range(low, high, partitions)]
+    conditions = (['{} < {}'.format(key, bounds[0])]
+                  + ['{key} >= {} AND {key} < {}'.format(a, b, key=key) for a, b in zip(bounds, bounds[1:])]
+                  + ['({key} >= {} OR {key} = null)'.format(bounds[-1], key=key)])
+    return ['{} WHERE {}{}'.format(select_from, cond, x) for x in conditions]
+
+
+def csv_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def write_csv(path: str, names: List[str], batches: Any) -> int:
+    """Write batches of columns (dicts of lists by names) to a CSV file with a header"""
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for batch in batches:
+            columns = [[csv_value(x) for x in values] for values in batch.values()]
+            writer.writerows(zip(*columns))
+            rows += len(columns[0])
+    return rows
+
+
+def write_parquet(path: str, names: List[str], batches: Any, types: Dict[str, str]) -> int:
+    try:
+        import pyarrow  # pylint:disable=import-outside-toplevel
+        import pyarrow.parquet  # pylint:disable=import-outside-toplevel
+    except ImportError:
+        raise InterfaceError("The package 'pyarrow' is required for the Parquet format")
+    arrow_types = {
+        'bool': pyarrow.bool_(), 'int64': pyarrow.int64(), 'float64': pyarrow.float64(),
+        'date32': pyarrow.date32(), 'timestamp': pyarrow.timestamp('ms', tz='UTC'), 'string': pyarrow.string(),
+    }
+    types = {k.lower(): v for k, v in types.items()}
+    column_types = [arrow_types[ARROW_TYPES.get(types.get(name.lower(), ''), 'string')] for name in names]
+    schema = pyarrow.schema(list(zip(names, column_types)))
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            columns = list(batch.values())
+            arrays = []
+            for values, type_ in zip(columns, column_types):
+                if type_ == pyarrow.string():
+                    values = [x if x is None or isinstance(x, str) else str(csv_value(x)) for x in values]
+                arrays.append(pyarrow.array(values, type=type_))
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(columns[0])
+    return rows
+
+
+def export_partition(alias: str, index: int, soql: str, path: str, fmt: str = 'csv',
+                     types: Optional[Dict[str, str]] = None, batch_size: int = 2000) -> PartitionResult:
+    """Export one partition to a file. It can run in a worker process."""
+    types = types or {}
+    lower_types = {k.lower(): v for k, v in types.items()}
+    connection = get_connection(alias, settings_dict=settings.DATABASES[alias])
+    metrics = metrics_registry.get(alias)
+    requests_before = sum(metrics.requests.values())
+    tmp_path = path + '.tmp'
+    with connection.cursor() as cursor:
+        cursor.execute(soql.replace('%', '%%'), batch_size=batch_size, column_types=[
+            DECODER_TYPES.get(lower_types[x], 'raw') if x in lower_types else None
+            for x in (x.lower() for x in column_names(soql))])
+        names = [x[0] for x in cursor.description or []]
+        batches = cursor.iter_batches(batch_size)
+        if fmt == 'parquet':
+            rows = write_parquet(tmp_path, names, batches, types)
+        else:
+            rows = write_csv(tmp_path, names, batches)
+    os.replace(tmp_path, path)
+    return PartitionResult(index, rows, sum(metrics.requests.values()) - requests_before,
+                           connection.api_usage.api_usage, connection.api_usage.api_limit)
+
+
+def column_names(soql: str) -> List[str]:
+    """Names of columns of a simple SOQL, without the prefix of the root table"""
+    select_from, table, _ = split_soql(soql)
+    fields = re.sub(r'^SELECT\s+|\s+FROM\s+\w+$', '', select_from, flags=re.I)
+    prefix = table.lower() + '.'
+    return [x[len(prefix):] if x.lower().startswith(prefix) else x for x in (x.strip() for x in fields.split(','))]
+
+
+def _init_worker() -> None:
+    try:
+        import django  # pylint:disable=import-outside-toplevel
+    except ImportError:
+        return
+    django.setup()
+
+
+class Exporter:
+    """Export of one query to partitioned files with a checkpoint
+
+    parameters:
+        alias: the database alias
+        soql: a query without aggregation, ordering or limits
+        name: the prefix of file names (default the table name)
+        fmt: 'csv' or 'parquet'
+        key: 'Id' or a DateTime field that splits the query to partitions
+        workers: the number of processes, 0 = export in the current thread.
+            It is limited by `settings.SF_PARALLEL_MAX_WORKERS` (default 8).
+        types: types of fields by names from describe, they are read by describe if they are
+            required and not specified
+        log: a function for progress messages
+    """
+    # pylint:disable=too-many-instance-attributes,too-many-arguments
+
+    def __init__(self, alias: str, soql: str, name: Optional[str] = None, output_dir: str = '.',
+                 fmt: str = 'csv', key: str = 'Id', partitions: int = 8, workers: int = 4,
+                 batch_size: int = 2000, types: Optional[Dict[str, str]] = None,
+                 log: Optional[Callable[[str], None]] = None) -> None:
+        if fmt not in FORMATS:
+            raise InterfaceError("Invalid format {!r}, expected one of {}".format(fmt, FORMATS))
+        self.alias = alias
+        self.soql = soql
+        self.table = split_soql(soql)[1]
+        self.name = name or self.table
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.key = key
+        self.partitions = partitions
+        self.workers = min(workers, getattr(settings, 'SF_PARALLEL_MAX_WORKERS', 8))
+        self.batch_size = batch_size
+        self.types = types
+        self.log = log or (lambda msg: None)
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.output_dir, '{}.checkpoint.json'.format(self.name))
+
+    def partition_path(self, index: int) -> str:
+        return os.path.join(self.output_dir, '{}-{:04d}.{}'.format(self.name, index, self.fmt))
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if (state.get('version'), state['soql'], state['format'], state['key']) != (
+                CHECKPOINT_VERSION, self.soql, self.fmt, self.key):
+            raise InterfaceError("The checkpoint {} is from a different export. Remove it to start again."
+                                 .format(self.checkpoint_path))
+        return state
+
+    def save_checkpoint(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self) -> ExportStats:
+        t_0 = time.time()
+        os.makedirs(self.output_dir, exist_ok=True)
+        metrics = metrics_registry.get(self.alias)
+        requests_before = sum(metrics.requests.values())
+        state = self.load_checkpoint()
+        if state is None:
+            connection = get_connection(self.alias, settings_dict=settings.DATABASES[self.alias])
+            types = self.types if self.types is not None else describe_types(connection, self.table)
+            state = {'version': CHECKPOINT_VERSION, 'soql': self.soql, 'format': self.fmt, 'key': self.key,
+                     'types': types, 'partitions': plan_partitions(connection, self.soql, self.key, self.partitions),
+                     'completed': {}}
+            self.save_checkpoint(state)
+        else:
+            self.log("Resumed the export of {} after {} completed partitions".format(
+                self.name, len(state['completed'])))
+        requests = sum(metrics.requests.values()) - requests_before
+        skipped = len(state['completed'])
+        todo = [(i, soql) for i, soql in enumerate(state['partitions']) if str(i) not in state['completed']]
+        api_usage = api_limit = 0
+        for result in self._run_partitions(todo, state['types']):
+            state['completed'][str(result.index)] = result.rows
+            self.save_checkpoint(state)
+            requests += result.requests
+            api_usage, api_limit = max(api_usage, result.api_usage), result.api_limit or api_limit
+            self.log("Partition {} of {}: {} rows".format(result.index, self.name, result.rows))
+        os.remove(self.checkpoint_path)
+        return ExportStats(self.name, sum(state['completed'].values()), len(state['partitions']), skipped,
+                           requests, time.time() - t_0, api_usage, api_limit)
+
+    def _run_partitions(self, todo: List[Tuple[int, str]], types: Dict[str, str]) -> Any:
+        args = [(self.alias, i, soql, self.partition_path(i), self.fmt, types, self.batch_size) for i, soql in todo]
+        if self.workers <= 0:
+            for arg in args:
+                yield export_partition(*arg)
+            return
+        # "spawn" - worker processes must not share HTTP connections with the parent
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker) as pool:
+            futures = [pool.submit(export_partition, *arg) for arg in args]  # type: List[Future[PartitionResult]]
+            for future in as_completed(futures):
+                yield future.result()
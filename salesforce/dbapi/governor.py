@@ -0,0 +1,149 @@
+"""
+Client-side rate governor of API requests, shared by all threads of the process per database alias
+
+It limits the number of requests in flight (the concurrent long request limit of Salesforce is 25)
+and the rate of requests by a token bucket. It protects the 24-hour API allocation: low priority
+requests are slowed down or rejected if the daily usage crosses thresholds.
+
+Configured by OPTIONS in settings.DATABASES[alias], e.g. (default values)
+    'RATE_GOVERNOR': {
+        'max_in_flight': 25,        # the maximal number of concurrent requests
+        'reserved_in_flight': 5,    # slots that can not be used by low priority requests
+        'rate': None,               # requests per second (token bucket), None: unlimited
+        'burst': 10,                # the capacity of the token bucket
+        'slow_down_usage': 0.8,     # a fraction of the daily limit, then low priority requests are delayed
+        'slow_down_delay': 1.0,     # seconds
+        'reject_usage': 0.9,        # a fraction of the daily limit, then low priority requests are rejected
+        'poll_limits': 0,           # seconds between requests to the '/limits' resource, 0: never
+    }
+The governor is disabled if 'RATE_GOVERNOR' is not configured.
+
+Low priority work is marked by a context manager:
+    with low_priority():
+        run_batch_job()
+"""
+import contextlib
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from salesforce.dbapi.exceptions import OperationalError
+
+_low_priority = contextvars.ContextVar('sf_low_priority', default=False)
+
+_governors = {}  # type: Dict[str, RateGovernor]
+_governors_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def low_priority() -> Iterator[None]:
+    """Mark requests in this context (thread or asyncio task) as low priority"""
+    token = _low_priority.set(True)
+    try:
+        yield
+    finally:
+        _low_priority.reset(token)
+
+
+def is_low_priority() -> bool:
+    return _low_priority.get()
+
+
+class RateGovernor:
+    # pylint:disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, max_in_flight: int = 25, reserved_in_flight: int = 5, rate: Optional[float] = None,
+                 burst: int = 10, slow_down_usage: float = 0.8, slow_down_delay: float = 1.0,
+                 reject_usage: float = 0.9, poll_limits: float = 0) -> None:
+        self.max_in_flight = max_in_flight
+        self.reserved_in_flight = min(reserved_in_flight, max_in_flight - 1)
+        self.rate = rate
+        self.burst = burst
+        self.slow_down_usage = slow_down_usage
+        self.slow_down_delay = slow_down_delay
+        self.reject_usage = reject_usage
+        self.poll_limits = poll_limits
+        # state
+        self.in_flight = 0
+        self.api_usage = 0
+        self.api_limit = 0
+        self.rejected = 0
+        self.delayed = 0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._last_poll = None  # type: Optional[float]
+        self._cond = threading.Condition()
+        self._bucket_lock = threading.Lock()
+
+    @property
+    def usage_fraction(self) -> float:
+        return self.api_usage / self.api_limit if self.api_limit else 0.0
+
+    def update_usage(self, api_usage: int, api_limit: int) -> None:
+        """Update the daily usage, e.g. from ApiUsage of any connection"""
+        if api_limit:
+            self.api_usage, self.api_limit = api_usage, api_limit
+
+    def limits_poll_due(self) -> bool:
+        """Check if the '/limits' resource should be read now. Only one thread gets True."""
+        if not self.poll_limits:
+            return False
+        with self._bucket_lock:
+            now = time.monotonic()
+            if self._last_poll is not None and now - self._last_poll < self.poll_limits:
+                return False
+            self._last_poll = now
+            return True
+
+    @contextlib.contextmanager
+    def request(self) -> Iterator[None]:
+        """Context of one request: wait for a free slot and a token or reject a low priority request"""
+        low = is_low_priority()
+        if low:
+            usage = self.usage_fraction
+            if usage >= self.reject_usage:
+                self.rejected += 1
+                raise OperationalError(
+                    "Low priority request rejected by the rate governor: API usage {}/{} per 24 hours".format(
+                        self.api_usage, self.api_limit))
+            if usage >= self.slow_down_usage:
+                self.delayed += 1
+                time.sleep(self.slow_down_delay)
+        limit = self.max_in_flight - (self.reserved_in_flight if low else 0)
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_flight < limit)
+            self.in_flight += 1
+        try:
+            self._take_token()
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def _take_token(self) -> None:
+        if not self.rate:
+            return
+        while True:
+            with self._bucket_lock:
+                now = time.monotonic()
+                self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_rate_governor(alias: str, options: Dict[str, Any]) -> Optional[RateGovernor]:
+    """Get the governor shared by threads for the alias or None if it is not configured"""
+    config = options.get('RATE_GOVERNOR')
+    if not config:
+        return None
+    with _governors_lock:
+        governor = _governors.get(alias)
+        if governor is None:
+            governor = RateGovernor(**(config if isinstance(config, dict) else {}))
+            _governors[alias] = governor
+        return governor
@@ -0,0 +1,253 @@
+"""
+Metrics of API requests per database alias: counters, latency histograms, bytes and retries
+
+Requests are classified by endpoint classes:
+    'query', 'queryMore', 'composite', 'sobjects', 'describe', 'auth', 'bulk', 'limits', 'other'
+
+The metrics of the process are in `metrics_registry`. They are exported by a pluggable exporter
+selected by `settings.SF_METRICS_EXPORTER` (a dotted path of a `MetricsExporter` subclass),
+the default is the Prometheus text format, e.g. in a view:
+
+    def metrics_view(request):
+        return HttpResponse(export_metrics(), content_type=PrometheusExporter.content_type)
+"""
+import bisect
+import importlib
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+
+# upper bounds of latency buckets in seconds (the last bucket is +Inf)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_url_prefix_re = re.compile(r'^(?:\w+://[^/]*)?/?(?:services/data/v\d+\.\d/)?(?:tooling/)?')
+
+
+def endpoint_class(url: str) -> str:
+    """Classify a REST API url (absolute or relative to the API version)"""
+    parts = _url_prefix_re.sub('', url).split('?')[0].strip('/').split('/')
+    first = parts[0]
+    if first in ('query', 'queryAll'):
+        return 'queryMore' if len(parts) > 1 and parts[1] else 'query'
+    if first == 'composite':
+        return 'composite'
+    if first == 'sobjects':
+        # e.g. 'sobjects', 'sobjects/Account/describe' or 'sobjects/Account/describe/layouts/...'
+        return 'describe' if len(parts) == 1 or parts[2:3] == ['describe'] else 'sobjects'
+    if first == 'jobs':
+        return 'bulk'
+    if first == 'limits':
+        return 'limits'
+    return 'other'
+
+
+def body_size(body: Any) -> int:
+    """The size of a request or response body in bytes"""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0  # a stream or a generator
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # not cumulative, the last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """[(le, count), ...] including '+Inf'"""
+        ret = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            ret.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return ret
+
+
+class AliasMetrics:
+    """Metrics of one database alias, shared by threads"""
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, alias: str) -> None:
+        self.alias = alias
+        self.requests = Counter()  # type: Counter[Tuple[str, str, str]]  # (endpoint, method, status)
+        self.latency = {}  # type: Dict[str, Histogram]
+        self.request_bytes = Counter()  # type: Counter[str]
+        self.response_bytes = Counter()  # type: Counter[str]
+        self.retries = Counter()  # type: Counter[str]
+        self.reauthentications = 0
+        self.api_usage = 0
+        self.api_limit = 0
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, method: str, status: Any, seconds: float,
+                request_bytes: int = 0, response_bytes: int = 0) -> None:
+        """Record one HTTP request. The status is a HTTP status code or an error name e.g. 'Timeout'"""
+        with self._lock:
+            self.requests[(endpoint, method, str(status))] += 1
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram()
+            histogram.observe(seconds)
+            self.request_bytes[endpoint] += request_bytes
+            self.response_bytes[endpoint] += response_bytes
+
+    def observe_response(self, method: str, url: str, response: Any, seconds: float) -> None:
+        """Record a response of "requests" or "httpx" (or a mock response)"""
+        request = getattr(response, 'request', None)
+        request_body = getattr(request, 'body', None) if not hasattr(request, 'content') else request.content
+        content = getattr(response, 'content', None)
+        self.observe(endpoint_class(url), method, response.status_code, seconds,
+                     request_bytes=body_size(request_body),
+                     response_bytes=body_size(content if content is not None else response.text))
+
+    def record_retry(self, reason: str) -> None:
+        with self._lock:
+            self.retries[reason] += 1
+
+    def record_reauthentication(self) -> None:
+        with self._lock:
+            self.reauthentications += 1
+
+    def update_usage(self, api_usage: int, api_limit: int) -> None:
+        if api_limit:
+            self.api_usage, self.api_limit = api_usage, api_limit
+
+    def snapshot(self) -> 'AliasMetrics':
+        """A consistent copy for exporters"""
+        ret = AliasMetrics(self.alias)
+        with self._lock:
+            ret.requests.update(self.requests)
+            for endpoint, histogram in self.latency.items():
+                copy = ret.latency[endpoint] = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = histogram.counts[:], histogram.sum, histogram.count
+            ret.request_bytes.update(self.request_bytes)
+            ret.response_bytes.update(self.response_bytes)
+            ret.retries.update(self.retries)
+            ret.reauthentications = self.reauthentications
+            ret.api_usage, ret.api_limit = self.api_usage, self.api_limit
+        return ret
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.request_bytes.clear()
+            self.response_bytes.clear()
+            self.retries.clear()
+            self.reauthentications = 0
+
+
+class MetricsRegistry:
+    """Metrics of all database aliases in this process"""
+
+    def __init__(self) -> None:
+        self._aliases = {}  # type: Dict[str, AliasMetrics]
+        self._lock = threading.Lock()
+
+    def get(self, alias: str) -> AliasMetrics:
+        metrics = self._aliases.get(alias)
+        if metrics is None:
+            with self._lock:
+                metrics = self._aliases.setdefault(alias, AliasMetrics(alias))
+        return metrics
+
+    def __iter__(self) -> Iterator[AliasMetrics]:
+        with self._lock:
+            aliases = list(self._aliases.values())
+        return iter(sorted(aliases, key=lambda x: x.alias))
+
+    def reset(self) -> None:
+        for metrics in list(self._aliases.values()):
+            metrics.reset()
+
+
+class MetricsExporter:
+    """Base class of exporters"""
+    content_type = 'text/plain'
+
+    def export(self, registry: MetricsRegistry) -> str:
+        raise NotImplementedError
+
+
+class PrometheusExporter(MetricsExporter):
+    """Prometheus text exposition format"""
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+    prefix = 'salesforce'
+
+    def export(self, registry: MetricsRegistry) -> str:
+        lines = []  # type: List[str]
+        p = self.prefix
+        all_metrics = [metrics.snapshot() for metrics in registry]
+
+        def family(name: str, type_: str, help_: str, samples: Iterable[Tuple[str, Dict[str, str], Any]]) -> None:
+            lines.append('# HELP {}_{} {}'.format(p, name, help_))
+            lines.append('# TYPE {}_{} {}'.format(p, name, type_))
+            for suffix, labels, value in samples:
+                lines.append('{}_{}{}{} {}'.format(p, name, suffix, self.labels(labels), value))
+
+        family('requests_total', 'counter', 'Number of API requests',
+               (('', dict(alias=m.alias, endpoint=endpoint, method=method, status=status), count)
+                for m in all_metrics for (endpoint, method, status), count in sorted(m.requests.items())))
+        family('request_duration_seconds', 'histogram', 'Latency of API requests',
+               (sample for m in all_metrics for endpoint, histogram in sorted(m.latency.items())
+                for sample in self.histogram_samples(dict(alias=m.alias, endpoint=endpoint), histogram)))
+        family('request_bytes_total', 'counter', 'Size of request bodies',
+               (('', dict(alias=m.alias, endpoint=endpoint), size)
+                for m in all_metrics for endpoint, size in sorted(m.request_bytes.items())))
+        family('response_bytes_total', 'counter', 'Size of response bodies',
+               (('', dict(alias=m.alias, endpoint=endpoint), size)
+                for m in all_metrics for endpoint, size in sorted(m.response_bytes.items())))
+        family('retries_total', 'counter', 'Number of retried requests by reason',
+               (('', dict(alias=m.alias, reason=reason), count)
+                for m in all_metrics for reason, count in sorted(m.retries.items())))
+        family('reauthentications_total', 'counter', 'Number of reauthentications after an expired session',
+               (('', dict(alias=m.alias), m.reauthentications) for m in all_metrics))
+        family('api_usage', 'gauge', 'API requests used per last 24 hours',
+               (('', dict(alias=m.alias), m.api_usage) for m in all_metrics))
+        family('api_limit', 'gauge', 'API requests limit per 24 hours',
+               (('', dict(alias=m.alias), m.api_limit) for m in all_metrics))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def histogram_samples(labels: Dict[str, str], histogram: Histogram) -> List[Tuple[str, Dict[str, str], Any]]:
+        samples = [('_bucket', dict(labels, le=le), count)
+                   for le, count in histogram.cumulative()]  # type: List[Tuple[str, Dict[str, str], Any]]
+        samples.append(('_sum', labels, repr(histogram.sum)))
+        samples.append(('_count', labels, histogram.count))
+        return samples
+
+    @staticmethod
+    def labels(labels: Dict[str, str]) -> str:
+        def escape(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join('{}="{}"'.format(k, escape(v)) for k, v in labels.items()) + '}'
+
+
+def get_exporter() -> MetricsExporter:
+    path = getattr(settings, 'SF_METRICS_EXPORTER', None)
+    if not path:
+        return PrometheusExporter()
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def export_metrics(exporter: Optional[MetricsExporter] = None) -> str:
+    """Export metrics of all database aliases by the configured exporter"""
+    return (exporter or get_exporter()).export(metrics_registry)
+
+
+metrics_registry = MetricsRegistry()
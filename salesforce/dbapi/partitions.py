@@ -0,0 +1,61 @@
+"""
+Split ranges of Salesforce Id or DateTime values into partitions for parallel queries
+
+The boundaries are interpolated between the minimal and the maximal value.
+Records need not be distributed uniformly, the result is correct anyway,
+only the size of partitions can be different.
+"""
+import datetime
+from typing import Any, List, Union
+
+BASE62_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+ID_SUFFIX_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ012345'
+
+RangeValue = Union[str, datetime.datetime]
+
+
+def id_to_int(sf_id: str) -> int:
+    """Convert the case sensitive part of Salesforce Id (15 characters) to an integer"""
+    ret = 0
+    for char in sf_id[:15]:
+        ret = ret * 62 + BASE62_CHARS.index(char)
+    return ret
+
+
+def int_to_id(number: int) -> str:
+    """Convert an integer to a Salesforce Id with 18 characters"""
+    chars = []
+    for _ in range(15):
+        number, rem = divmod(number, 62)
+        chars.append(BASE62_CHARS[rem])
+    assert number == 0, "The number is too big for a Salesforce Id"
+    return id_18(''.join(reversed(chars)))
+
+
+def id_18(sf_id: str) -> str:
+    """Get a case insensitive Salesforce Id with 18 characters from the Id with 15 or 18 characters"""
+    if len(sf_id) == 18:
+        return sf_id
+    assert len(sf_id) == 15
+    suffix = ''
+    for i in range(0, 15, 5):
+        bits = sum(1 << j for j, char in enumerate(sf_id[i:i + 5]) if 'A' <= char <= 'Z')
+        suffix += ID_SUFFIX_CHARS[bits]
+    return sf_id + suffix
+
+
+def split_range(low: RangeValue, high: RangeValue, partitions: int) -> List[Any]:
+    """Get an ascending list of inner boundaries that split the range to partitions
+
+    The result can be shorter than `partitions - 1` if the range is too small.
+    The first and the last partition should be open: (< boundary[0]) and (>= boundary[-1])
+    """
+    if isinstance(low, datetime.datetime):
+        assert isinstance(high, datetime.datetime)
+        step = (high - low) / partitions
+        bounds = [low + step * i for i in range(1, partitions)]  # type: List[Any]
+        return sorted({x for x in bounds if low < x <= high})
+    assert isinstance(high, str)
+    low_i, high_i = id_to_int(low), id_to_int(high)
+    int_bounds = {low_i + (high_i - low_i) * i // partitions for i in range(1, partitions)}
+    return [int_to_id(x) for x in sorted(int_bounds) if low_i < x <= high_i]
@@ -0,0 +1,133 @@
+"""
+Process-wide HTTP connection pools shared by all threads, one per database alias
+
+Connections are thread-local (one RawConnection for every thread), but the HTTP adapter
+with a pool of keep-alive TLS connections is shared by all threads of the process.
+Warm connections are reused by other threads and idle connections are closed after
+a timeout.
+
+The pool is configured by OPTIONS in settings.DATABASES[alias]:
+    'POOL_CONNECTIONS': the number of cached pools for different hosts (default 10)
+    'POOL_MAXSIZE': the maximal number of connections saved in the pool for a host (default 10)
+    'POOL_BLOCK': True: the number of live connections is limited by POOL_MAXSIZE and requests
+        wait for a free connection. False: more connections can be opened temporarily. (default False)
+    'POOL_IDLE_TIMEOUT': seconds after that an idle connection is closed (default 120, None: never)
+    'SHARED_POOL': False: every thread has its own pool like in old versions (default True)
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from salesforce.dbapi.common import get_max_retries
+
+DEFAULT_IDLE_TIMEOUT = 120
+
+_shared_adapters = {}  # type: Dict[Tuple[str, str], SharedHTTPAdapter]
+_shared_adapters_lock = threading.Lock()
+
+
+class IdleReapingPoolMixin:
+    """Mixin for urllib3 connection pools that remembers when a connection became idle"""
+    pool = None  # type: Any
+
+    def _put_conn(self, conn: Any) -> None:
+        if conn is not None:
+            conn.sf_idle_since = time.monotonic()
+        super()._put_conn(conn)  # type: ignore[misc]
+
+    def reap_idle(self, max_idle: float) -> int:
+        """Close connections idle for more than max_idle seconds. Return their number."""
+        pool = self.pool
+        if pool is None:
+            return 0
+        limit = time.monotonic() - max_idle
+        expired = []  # type: List[Any]
+        with pool.mutex:
+            for i, conn in enumerate(pool.queue):
+                if conn is not None and getattr(conn, 'sf_idle_since', limit) < limit:
+                    pool.queue[i] = None  # a free slot for a new connection
+                    expired.append(conn)
+        for conn in expired:
+            conn.close()
+        return len(expired)
+
+
+class ReapingHTTPConnectionPool(IdleReapingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class ReapingHTTPSConnectionPool(IdleReapingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """HTTP adapter shared by sessions in more threads
+
+    It is not closed by `session.close()`, but only by `shutdown()`.
+    """
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT, **kwargs: Any) -> None:
+        self.idle_timeout = idle_timeout
+        self._last_reap = time.monotonic()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': ReapingHTTPConnectionPool,
+                                                   'https': ReapingHTTPSConnectionPool}
+
+    def send(self, request: Any, *args: Any, **kwargs: Any) -> Any:  # pylint:disable=signature-differs
+        self.reap_idle()
+        return super().send(request, *args, **kwargs)
+
+    def reap_idle(self, force: bool = False) -> int:
+        """Close idle connections. It is checked at most once in a half of idle timeout."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic()
+        if not force and now - self._last_reap < self.idle_timeout / 2:
+            return 0
+        self._last_reap = now
+        pools = self.poolmanager.pools
+        count = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if isinstance(pool, IdleReapingPoolMixin):
+                count += pool.reap_idle(self.idle_timeout)
+        return count
+
+    def close(self) -> None:
+        """Ignore closing by a session in one thread"""
+
+    def shutdown(self) -> None:
+        super().close()
+
+
+def get_http_adapter(alias: str, url: str, options: Dict[str, Any]) -> HTTPAdapter:
+    """Get an HTTP adapter for the alias and the instance url, shared by threads if it is configured"""
+    kwargs = dict(
+        pool_connections=options.get('POOL_CONNECTIONS', 10),
+        pool_maxsize=options.get('POOL_MAXSIZE', 10),
+        pool_block=options.get('POOL_BLOCK', False),
+        max_retries=get_max_retries(),
+    )
+    if not options.get('SHARED_POOL', True):
+        return HTTPAdapter(**kwargs)
+    with _shared_adapters_lock:
+        adapter = _shared_adapters.get((alias, url))
+        if adapter is None:
+            adapter = SharedHTTPAdapter(idle_timeout=options.get('POOL_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT),
+                                        **kwargs)
+            _shared_adapters[(alias, url)] = adapter
+        return adapter
+
+
+def close_shared_adapters(alias: Optional[str] = None) -> None:
+    """Close all connections of shared pools (for the alias or for all aliases)"""
+    with _shared_adapters_lock:
+        keys = [key for key in _shared_adapters if alias is None or key[0] == alias]
+        adapters = [_shared_adapters.pop(key) for key in keys]
+    for adapter in adapters:
+        adapter.shutdown()
@@ -0,0 +1,169 @@
+"""
+Retry policy for transient errors of Salesforce REST API with exponential backoff and jitter
+
+The policy is configured by `settings.SF_RETRY_POLICY`, e.g. (default values)
+    SF_RETRY_POLICY = {
+        'max_retries': 3,     # the maximal number of retries of one request
+        'backoff': 0.25,      # the initial delay in seconds, doubled by every retry
+        'max_backoff': 8.0,   # the maximal delay before adding a random jitter
+        'error_codes': {      # the maximal number of retries for an error code (0 = no retry)
+            'REQUEST_LIMIT_EXCEEDED': 3, ...
+        },
+    }
+    SF_RETRY_POLICY = {'max_retries': 0}  # disable retries
+
+Idempotency:
+    If the request has been certainly rejected by Salesforce (e.g. UNABLE_TO_LOCK_ROW or HTTP 503)
+    then it is retried for all methods except POST. A POST is retried only if it is atomic,
+    e.g. a composite request with all-or-none semantics.
+    If the request has certainly not been sent (a failed connect 'ConnectError') then it is
+    retried for all methods.
+    If the result of the request is unknown (a gateway timeout 502/504, a read timeout or
+    a connection dropped after the request has been sent 'ConnectionError')
+    then only idempotent methods GET, HEAD, PUT and DELETE are retried.
+"""
+import json
+import logging
+import random
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+from salesforce.dbapi.common import settings  # i.e. django.conf.settings
+
+log = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+# Errors that reject the request without any change in the database
+REJECTED_ERROR_CODES = ('REQUEST_LIMIT_EXCEEDED', 'SERVER_UNAVAILABLE', 'UNABLE_TO_LOCK_ROW', 'HTTP_503')
+
+DEFAULT_ERROR_CODES = {
+    'REQUEST_LIMIT_EXCEEDED': 3,  # the limit of concurrent long requests, not the daily limit
+    'SERVER_UNAVAILABLE': 3,
+    'UNABLE_TO_LOCK_ROW': 3,
+    'HTTP_502': 2,
+    'HTTP_503': 3,
+    'HTTP_504': 2,
+    'Timeout': 0,  # a slow query would be probably slow again
+    'ConnectError': 0,  # retried by REQUESTS_MAX_RETRIES in HTTPAdapter
+    'ConnectionError': 0,
+}
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, backoff: float = 0.25, max_backoff: float = 8.0,
+                 error_codes: Optional[Dict[str, int]] = None) -> None:
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.error_codes = dict(DEFAULT_ERROR_CODES, **(error_codes or {}))
+
+    @classmethod
+    def from_settings(cls) -> 'RetryPolicy':
+        return cls(**getattr(settings, 'SF_RETRY_POLICY', None) or {})
+
+    def retry_reason(self, method: str, response: Any = None, exc_reason: Optional[str] = None,
+                     atomic: bool = False) -> Optional[str]:
+        """Get the reason (an error code) if the failed request can be retried, otherwise None
+
+        parameters:
+            response: an error response of "requests" or "httpx" (status >= 400)
+            exc_reason: 'Timeout', 'ConnectError' or 'ConnectionError' if no response has been received
+        """
+        if exc_reason == 'ConnectError':
+            return exc_reason if self.error_codes.get(exc_reason, 0) > 0 else None  # not sent
+        if exc_reason:
+            reason, rejected = exc_reason, False
+        else:
+            error_code, message = get_error_code(response)
+            if error_code == 'REQUEST_LIMIT_EXCEEDED' and 'TotalRequests' in message:
+                return None  # the daily limit of API requests
+            if error_code in REJECTED_ERROR_CODES:
+                reason = error_code
+            elif response.status_code in (502, 503, 504):
+                reason = 'HTTP_%d' % response.status_code
+            else:
+                return None
+            rejected = reason in REJECTED_ERROR_CODES
+        if rejected:
+            is_safe = method != 'POST' or atomic
+        else:
+            is_safe = method in IDEMPOTENT_METHODS
+        return reason if is_safe and self.error_codes.get(reason, 0) > 0 else None
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with a random jitter (between a half and the full delay)"""
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+
+class RetryState:
+    """Retries of one request"""
+
+    def __init__(self, method: str, url: str, atomic: bool = False, metrics: Any = None) -> None:
+        self.method = method
+        self.url = url
+        self.atomic = atomic
+        self.metrics = metrics  # AliasMetrics of salesforce.dbapi.metrics
+        self.attempt = 0
+        self.counts = Counter()  # type: Counter[str]
+        self._policy = None  # type: Optional[RetryPolicy]
+
+    @property
+    def policy(self) -> RetryPolicy:
+        if self._policy is None:
+            self._policy = RetryPolicy.from_settings()  # only after an error
+        return self._policy
+
+    def next_delay(self, response: Any = None, exc_reason: Optional[str] = None) -> Optional[float]:
+        """Get the delay before the next retry or None if the request should not be retried"""
+        policy = self.policy
+        if self.attempt >= policy.max_retries:
+            return None
+        reason = policy.retry_reason(self.method, response=response, exc_reason=exc_reason, atomic=self.atomic)
+        if reason is None or self.counts[reason] >= policy.error_codes[reason]:
+            return None
+        delay = policy.delay(self.attempt)
+        self.attempt += 1
+        self.counts[reason] += 1
+        retry_statistics.update(reason)
+        if self.metrics is not None:
+            self.metrics.record_retry(reason)
+        log.warning("Retry %d of %s %s after %s in %.2f s", self.attempt, self.method, self.url, reason, delay)
+        return delay
+
+
+class RetryStatistics:
+    """Numbers of retries by reasons in this process"""
+
+    def __init__(self) -> None:
+        self.counts = Counter()  # type: Counter[str]
+        self._lock = threading.Lock()
+
+    def update(self, reason: str) -> None:
+        with self._lock:
+            self.counts[reason] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+
+
+def get_error_code(response: Any) -> Tuple[Optional[str], str]:
+    """Get (errorCode, message) from the first error in a JSON response"""
+    if 'json' not in response.headers.get('Content-Type', '') or not response.text:
+        return None, ''
+    try:
+        data = json.loads(response.text)
+    except ValueError:
+        return None, ''
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return data[0].get('errorCode'), data[0].get('message', '')
+    return None, ''
+
+
+retry_statistics = RetryStatistics()
@@ -15,10 +15,13 @@ require a combined parser for parentheses and commas.
 
 Unsupported GROUP BY ROLLUP and GROUP BY CUBE (their syntax for reports).
 """
-from typing import Any, Callable, Dict, Iterable, List, Optional, overload, Sequence, Type, TypeVar, Tuple, Union
+from typing import (
+    Any, Callable, cast, Dict, Iterable, Iterator, List, Optional, overload, Sequence, Type, TypeVar, Tuple, Union,
+)
 import datetime
 import re
 import pytz
+from salesforce.dbapi.common import LRUCache
 from salesforce.dbapi.exceptions import ProgrammingError
 
 _TRow = TypeVar('_TRow', Tuple[Any, ...], List[Any], Dict[str, Any])
@@ -167,10 +170,17 @@ class QQuery:
     def parse_rest_response(self, records: Iterable[Dict[str, Any]], rowcount: int,
                             ) -> Iterable[Tuple[Any, ...]]: ...
     def parse_rest_response(self, records: Iterable[Dict[str, Any]], # type: ignore[no-untyped-def] # noqa
-                            rowcount: int, row_type=tuple) -> Iterable[Any]:
-        """Parse the REST API response to DB API cursor flat response"""
+                            rowcount: int, row_type=tuple, plan: Optional['DecoderPlan'] = None
+                            ) -> Iterable[Any]:
+        """Parse the REST API response to DB API cursor flat response
+
+        The rows are decoded by the `plan` if it is given, otherwise by a generic flattening
+        and guessing of DateTime values.
+        """
         assert row_type in (dict, list, tuple)
-        if self.is_plain_count:
+        if plan is not None:
+            yield from plan.decode(records, row_type)
+        elif self.is_plain_count:
             # result of "SELECT COUNT() FROM ... WHERE ..."
             assert list(records) == []
             if issubclass(row_type, dict):
@@ -186,8 +196,8 @@ class QQuery:
                 else:
                     assert self.is_aggregation == (row_deep['attributes']['type'] == 'AggregateResult')
                     row_flat = self._make_flat(row_deep, path=(), subroots=self.subroots)
-                    # TODO Will be the expression "or x['done']" really correct also for long subrequests?
-                    assert all(not isinstance(x, dict) or x['done'] for x in row_flat)
+                    # the next chunks of long child subqueries are fetched by the cursor before
+                    assert all(not isinstance(x, dict) or 'records' not in x or x['done'] for x in row_flat.values())
                     if issubclass(row_type, dict):
                         yield {k: fix_data_type(row_flat[k.lower()]) for k in self.aliases}
                     elif issubclass(row_type, list):
@@ -195,9 +205,47 @@ class QQuery:
                     elif issubclass(row_type, tuple):
                         yield tuple(fix_data_type(row_flat[k.lower()]) for k in self.aliases)
 
+    @property
+    def supports_decoder_plan(self) -> bool:
+        """Check if rows can be decoded by a DecoderPlan (no aggregation or child subquery, only fields)"""
+        return not (self.is_aggregation or self.is_plain_count or self.has_child_rel_field
+                    or any(not isinstance(x, str) or not re.match(r'\w+(?:\.\w+)*$', x) for x in self.fields))
+
+    @property
+    def supports_bulk_query(self) -> bool:
+        """Check if the query can be run by Bulk API 2.0 query (no aggregation, subquery or OFFSET)"""
+        return not (self.is_aggregation or self.is_plain_count or self.has_child_rel_field
+                    or re.search(r'\b(?:OFFSET|TYPEOF)\b', nz(self.soql), re.I))
+
+    def parse_csv_rows(self, header: List[str], rows: Iterable[List[str]], row_type: Type[Any] = tuple
+                       ) -> Iterator[Any]:
+        """Parse rows of CSV results of Bulk API query to DB API cursor rows
+
+        The values are strings, except None for empty values and datetime for DateTime fields.
+        """
+        assert row_type in (dict, list, tuple)
+        prefix = nz(self.root_table).lower() + '.'
+        columns = {}  # type: Dict[str, int]
+        for i, name in enumerate(header):
+            name = name.lower()
+            columns[name[len(prefix):] if name.startswith(prefix) else name] = i
+        try:
+            indexes = [columns[alias.lower()] for alias in self.aliases]
+        except KeyError as exc:
+            raise ProgrammingError("Missing column {} in Bulk API query results {}".format(exc, header))
+        for row in rows:
+            values = [fix_data_type(row[i]) if row[i] != '' else None for i in indexes]
+            if issubclass(row_type, dict):
+                yield dict(zip(self.aliases, values))
+            elif issubclass(row_type, list):
+                yield values
+            else:
+                yield tuple(values)
+
 
 SALESFORCE_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f+0000'
-SF_DATETIME_PATTERN = re.compile(r'[1-3]\d{3}-[01]\d-[0-3]\dT[0-2]\d:[0-5]\d:[0-6]\d.\d{3}\+0000$')
+# the format with 'Z' is used by CSV results of Bulk API
+SF_DATETIME_PATTERN = re.compile(r'[1-3]\d{3}-[01]\d-[0-3]\dT[0-2]\d:[0-5]\d:[0-6]\d.\d{3}(?:\+0000|Z)$')
 
 
 def fix_data_type(data: Any, tzinfo: Optional[datetime.timezone] = None) -> Any:
@@ -206,12 +254,147 @@ def fix_data_type(data: Any, tzinfo: Optional[datetime.timezone] = None) -> Any:
     # Only a DateTime field has so specific regexp that the guess is
     # acceptable.
     if isinstance(data, str) and SF_DATETIME_PATTERN.match(data):
+        if data.endswith('Z'):
+            data = data[:-1] + '+0000'
         datim = datetime.datetime.strptime(data, SALESFORCE_DATETIME_FORMAT)
         datim = datim.replace(tzinfo=tzinfo or pytz.utc)
         return datim
     return data
 
 
+# parsed queries by SOQL with placeholders, the size is `settings.SF_SOQL_CACHE_SIZE` (0 = disabled)
+qquery_cache = LRUCache('SF_SOQL_CACHE_SIZE', 256)
+
+
+def get_qquery(soql: str) -> QQuery:
+    """Get a parsed query from the cache or parse it. The result must not be modified."""
+    qquery = qquery_cache.get(soql)
+    if qquery is None:
+        qquery = QQuery(soql)
+        qquery_cache.put(soql, qquery)
+    return cast(QQuery, qquery)
+
+
+def parse_datetime(data: Any) -> Any:
+    """Fast parser of a DateTime value e.g. '2024-01-02T03:04:05.000+0000' (or with 'Z')
+
+    Other values are returned by `fix_data_type`.
+    """
+    if isinstance(data, str) and len(data) in (24, 28) and data[10] == 'T' and data[19] == '.':
+        try:
+            return datetime.datetime(int(data[:4]), int(data[5:7]), int(data[8:10]),
+                                     int(data[11:13]), int(data[14:16]), int(data[17:19]),
+                                     int(data[20:23]) * 1000, tzinfo=pytz.utc)
+        except ValueError:
+            pass
+    return fix_data_type(data)
+
+
+def parse_date(data: Any) -> Any:
+    """Fast parser of a Date value e.g. '2024-01-02'. Other values are returned unchanged."""
+    if isinstance(data, str) and len(data) == 10 and data[4] == '-' and data[7] == '-':
+        try:
+            return datetime.date(int(data[:4]), int(data[5:7]), int(data[8:10]))
+        except ValueError:
+            pass
+    return data
+
+
+# converters by column types of DecoderPlan, other known types are not converted
+DECODER_CONVERTERS = {
+    'datetime': parse_datetime,
+    'date': parse_date,
+}  # type: Dict[str, Callable[[Any], Any]]
+
+
+class DecoderPlan:
+    """Decoder of rows of one query, prepared once for all rows
+
+    Every column has a precompiled path of keys in the nested JSON record
+    and a converter selected by the column type:
+        'datetime', 'date':  parsed by a fast parser
+        other string e.g. 'raw':  not converted
+        None (unknown):  the type is guessed once by the first not null value of the column
+    """
+    def __init__(self, qquery: QQuery, column_types: Optional[Sequence[Optional[str]]] = None) -> None:
+        assert qquery.supports_decoder_plan
+        self.aliases = qquery.aliases
+        # missing types at the end (e.g. extra columns of ordering) are unknown
+        column_types = list(column_types or [])[:len(self.aliases)]
+        self.column_types = column_types + [None] * (len(self.aliases) - len(column_types))
+        # prefixes of the lowercase path e.g. (('account',), ('account', 'name'))
+        self.paths = [tuple(tuple(parts[:i + 1]) for i in range(len(parts)))
+                      for parts in (alias.lower().split('.') for alias in self.aliases)]
+        # the real names of keys in JSON records by lowercase names, learned from the first records
+        self._keys = {}  # type: Dict[Tuple[str, ...], str]
+        self.converters = [self._converter(i, x) for i, x in enumerate(self.column_types)]
+
+    def _converter(self, index: int, column_type: Optional[str]) -> Optional[Callable[[Any], Any]]:
+        if column_type is None:
+            def guess(data: Any) -> Any:
+                if data is None:
+                    return None
+                # the type is known since the first not null value
+                guessed = 'datetime' if isinstance(data, str) and SF_DATETIME_PATTERN.match(data) else 'raw'
+                self.column_types[index] = guessed
+                self.converters[index] = DECODER_CONVERTERS.get(guessed)
+                return fix_data_type(data)
+            return guess
+        return DECODER_CONVERTERS.get(column_type)
+
+    def _get(self, record: Dict[str, Any], path: Tuple[Tuple[str, ...], ...]) -> Any:
+        value = record  # type: Any
+        for prefix in path:
+            if value is None:  # an empty outer join
+                return None
+            key = self._keys.get(prefix)
+            if key is None or key not in value:
+                key = self._learn_key(value, prefix)
+            value = value[key]
+        return value
+
+    def _learn_key(self, record: Dict[str, Any], path: Tuple[str, ...]) -> str:
+        for key in record:
+            if key.lower() == path[-1]:
+                self._keys[path] = key
+                return key
+        raise KeyError('.'.join(path))
+
+    def decode_columns(self, records: Sequence[Dict[str, Any]]) -> List[List[Any]]:
+        """Decode records to a list of columns, without row objects"""
+        get = self._get
+        columns = []
+        for i, path in enumerate(self.paths):
+            values = [get(record, path) for record in records]
+            converter = self.converters[i]
+            for j, value in enumerate(values):
+                if converter is None:
+                    break
+                if value is not None:
+                    values[j] = converter(value)
+                    converter = self.converters[i]  # can be changed by the first value of unknown type
+            columns.append(values)
+        return columns
+
+    def decode(self, records: Iterable[Dict[str, Any]], row_type: Type[Any] = tuple) -> Iterator[Any]:
+        paths = self.paths
+        converters = self.converters
+        indexes = range(len(paths))
+        get = self._get
+        for record in records:
+            values = [get(record, paths[i]) for i in indexes]
+            for i in indexes:
+                converter = converters[i]
+                if converter is not None and values[i] is not None:
+                    values[i] = converter(values[i])
+            if issubclass(row_type, dict):
+                yield dict(zip(self.aliases, values))
+            elif issubclass(row_type, list):
+                yield values
+            else:
+                yield tuple(values)
+
+
 def mark_quoted_strings(sql: str) -> Tuple[str, List[str]]:
     """Mark all quoted strings in the SOQL by '@' and get them as params,
     with respect to all escaped backslashes and quotes.
@@ -0,0 +1,80 @@
+"""
+Export Salesforce objects to partitioned CSV or Parquet files (see salesforce.dbapi.export)
+
+Examples:
+    python manage.py sf_export Contact Account --output-dir=/data/export
+    python manage.py sf_export example.Contact --format=parquet --partition-key=CreatedDate
+    python manage.py sf_export --soql="SELECT Id, Name FROM Account WHERE Type = 'Customer'"
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from salesforce.dbapi.driver import arg_to_soql
+from salesforce.dbapi.exceptions import Error
+from salesforce.dbapi.export import FORMATS, Exporter, describe_soql
+
+
+def queryset_soql(queryset: Any) -> str:
+    """Get SOQL of a queryset with substituted parameters"""
+    soql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    return soql % tuple(arg_to_soql(x) for x in params)
+
+
+class Command(BaseCommand):
+    help = ("Export SObjects (API names), models (app_label.ModelName) or a SOQL query to partitioned "
+            "CSV or Parquet files, by a pool of processes. An interrupted export is resumed from a checkpoint.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help="SObject API names or models 'app_label.ModelName'")
+        parser.add_argument('--soql', help="Export a SOQL query without ORDER BY, LIMIT and aggregation")
+        parser.add_argument('--database', default='salesforce', help="The database alias (default 'salesforce')")
+        parser.add_argument('--output-dir', default='.', help="The directory of output files")
+        parser.add_argument('--format', default='csv', choices=FORMATS, dest='fmt')
+        parser.add_argument('--partition-key', default='Id', help="Id or a DateTime field e.g. CreatedDate")
+        parser.add_argument('--partitions', type=int, default=8, help="The number of partitions per target")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="The number of processes, 0 = export in this process")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per request and per write")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        alias = options['database']
+        connection = connections[alias]
+        if connection.vendor != 'salesforce':
+            raise CommandError("The database {!r} is not a Salesforce database".format(alias))
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        if not options['targets'] and not options['soql']:
+            raise CommandError("Specify SObjects, models or --soql")
+        verbosity = int(options['verbosity'])
+        try:
+            for soql, types in self.get_queries(raw_connection, options['targets'], options['soql']):
+                exporter = Exporter(
+                    alias, soql, output_dir=options['output_dir'], fmt=options['fmt'],
+                    key=options['partition_key'], partitions=options['partitions'], workers=options['workers'],
+                    batch_size=options['batch_size'], types=types,
+                    log=self.stdout.write if verbosity >= 2 else None)
+                stats = exporter.run()
+                if verbosity >= 1:
+                    self.stdout.write(str(stats))
+        except Error as exc:
+            raise CommandError(str(exc))
+
+    @staticmethod
+    def get_queries(raw_connection: Any, targets: List[str], soql: Optional[str]
+                    ) -> List[Tuple[str, Optional[Dict[str, str]]]]:
+        ret = []  # type: List[Tuple[str, Optional[Dict[str, str]]]]
+        for target in targets:
+            if '.' in target:
+                try:
+                    model = apps.get_model(target)
+                except (LookupError, ValueError) as exc:
+                    raise CommandError(str(exc))
+                ret.append((queryset_soql(model._default_manager.order_by()), None))  # without Meta.ordering
+            else:
+                ret.append(describe_soql(raw_connection, target))
+        if soql:
+            ret.append((soql, None))
+        return ret
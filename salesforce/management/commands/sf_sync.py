@@ -0,0 +1,50 @@
+"""
+Incremental synchronization of Salesforce objects to a local database (see salesforce.sync)
+
+Examples:
+    python manage.py sf_sync example.Account example.Contact
+    python manage.py sf_sync example.Contact --target=mirror --batch-size=10000 --full
+"""
+from typing import Any
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from salesforce.dbapi.exceptions import Error
+from salesforce.sync import sync_model
+
+
+class Command(BaseCommand):
+    help = ("Pull rows of models (app_label.ModelName) changed in Salesforce since the last run to a local "
+            "database, including deletes. Parent models should be specified before child models.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='+', help="Extended models 'app_label.ModelName'")
+        parser.add_argument('--database', default='salesforce', help="The Salesforce database (default 'salesforce')")
+        parser.add_argument('--target', default='default', help="The local database (default 'default')")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per request and per transaction")
+        parser.add_argument('--full', action='store_true', help="Ignore the high-water mark and pull all rows")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        source, target = options['database'], options['target']
+        if connections[source].vendor != 'salesforce':
+            raise CommandError("The database {!r} is not a Salesforce database".format(source))
+        if connections[target].vendor == 'salesforce':
+            raise CommandError("The target database {!r} must not be a Salesforce database".format(target))
+        try:
+            models = [apps.get_model(x) for x in options['models']]
+        except (LookupError, ValueError) as exc:
+            raise CommandError(str(exc))
+        verbosity = int(options['verbosity'])
+        for model in models:
+            if getattr(model, '_salesforce_object', None) != 'extended':
+                raise CommandError("The model {} is not a subclass of salesforce.models_extend.SalesforceModel"
+                                   .format(model._meta.label))
+            try:
+                stats = sync_model(model, source, target, batch_size=options['batch_size'], full=options['full'],
+                                   log=self.stdout.write if verbosity >= 2 else None)
+            except Error as exc:
+                raise CommandError(str(exc))
+            if verbosity >= 1:
+                self.stdout.write(str(stats))
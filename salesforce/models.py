@@ -25,6 +25,7 @@ from django.db.models.base import ModelBase
 from django.db.models import PROTECT, DO_NOTHING  # NOQA pylint:disable=unused-wildcard-import,wildcard-import
 # from django.db.models import CASCADE, PROTECT, SET_NULL, SET, DO_NOTHING
 
+from salesforce.backend import query_cache
 from salesforce.defaults import DefaultedOnCreate, DEFAULTED_ON_CREATE
 from salesforce.fields import (
     SalesforceAutoField as SalesforceAutoField, SF_PK, SfField, ForeignKey as ForeignKey)
@@ -86,9 +87,21 @@ class SalesforceModelBase(ModelBase):
             if hasattr(value.meta, 'sf_tooling_api_model'):
                 sf_tooling_api_model = value.meta.sf_tooling_api_model
                 delattr(value.meta, 'sf_tooling_api_model')
+            # seconds of caching query results by default (see salesforce.backend.query_cache)
+            # (it is removed from Meta only temporarily for Django, because Meta can be inherited)
+            meta = value.meta
+            sf_cache_ttl = getattr(meta, 'sf_cache_ttl', None)
+            own_cache_ttl = meta is not None and 'sf_cache_ttl' in vars(meta)
+            if own_cache_ttl:
+                delattr(meta, 'sf_cache_ttl')
             super(SalesforceModelBase, cls).add_to_class(name, value)  # type: ignore[misc]
+            if own_cache_ttl:
+                setattr(meta, 'sf_cache_ttl', sf_cache_ttl)
+            if sf_cache_ttl:
+                query_cache.enable()
             setattr(cls._meta, 'sf_custom', sf_custom)  # type: ignore[attr-defined]
             setattr(cls._meta, 'sf_tooling_api_model', sf_tooling_api_model)  # type: ignore[attr-defined]
+            setattr(cls._meta, 'sf_cache_ttl', sf_cache_ttl)  # type: ignore[attr-defined]
         else:
             if type(value) is models.manager.Manager:  # pylint:disable=unidiomatic-typecheck
                 # this is for better migrations because: obj._constructor_args = (args, kwargs)
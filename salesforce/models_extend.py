@@ -8,6 +8,7 @@ usage purposes e.g.:
     if the primary key still exists in salesforce.
   - Create a new non-salesforce object with an automatic uuid pk.
   - Use it as a much faster alternative than "data sandbox refresh".
+    Changed rows are pulled incrementally by `salesforce.sync` or by "manage.py sf_sync".
 
 The non-salesforce database uses a default uuid() key or a provided salesforce Id value.
 
@@ -0,0 +1,325 @@
+# django-salesforce
+
+"""
+Streaming API client (CometD / Bayeux long polling) for Change Data Capture and PushTopic events
+
+Events are pushed by Salesforce, therefore a local mirror and caches can be kept fresh without
+polling by queries. The client uses the HTTP session of the database connection (authentication,
+metrics, rate governor) and the endpoint "/cometd/<api_version>".
+
+Replay ids of processed events are saved to a replay store after all handlers of the event
+finished successfully. A consumer restarted after a crash continues by the next event. Events
+are retained by Salesforce for 72 hours. The client reconnects with an exponential backoff after
+network errors and it repeats the handshake if the server requests it.
+
+Built-in handlers:
+    MirrorHandler: apply create/update/delete/undelete events to a `salesforce.models_extend` model
+        in a local database. Gap and overflow events are resolved by queries.
+    CacheInvalidationHandler: invalidate cached query results of the SObject (see salesforce.backend.query_cache)
+        and send the signal `sobject_changed` for other caches.
+
+Example:
+    client = StreamingClient('salesforce', replay_store=FileReplayStore('replay.json'))
+    client.register('/data/ContactChangeEvent', MirrorHandler(Contact))
+    client.register('/data/ContactChangeEvent', CacheInvalidationHandler())
+    client.run()
+"""
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import django.dispatch
+from django.db import connections, models
+
+from salesforce.backend import query_cache
+from salesforce.dbapi.codec import response_json
+from salesforce.dbapi.exceptions import InterfaceError, OperationalError, SalesforceAuthError, SalesforceError
+from salesforce.dbapi.retry import RetryPolicy
+from salesforce.sync import apply_batch, sync_model
+
+log = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+Handler = Callable[[Message], None]
+
+# replay id of new events only (the default) or of all retained events (72 hours)
+REPLAY_NEW = -1
+REPLAY_ALL = -2
+# the server holds a long polling request up to 110 seconds
+LONG_POLLING_TIMEOUT = 120
+PUSH_TOPIC_CHANGE_TYPES = {'created': 'CREATE', 'updated': 'UPDATE', 'deleted': 'DELETE', 'undeleted': 'UNDELETE'}
+
+# The signal is sent by CacheInvalidationHandler with `sender` = the SObject API name
+# and keyword arguments `record_ids` (a list) and `change_type` (e.g. 'UPDATE')
+sobject_changed = django.dispatch.Signal()
+
+
+class ReplayStore:
+    """Replay ids of the last processed events by channels in memory"""
+
+    def __init__(self) -> None:
+        self.replay_ids = {}  # type: Dict[str, int]
+
+    def get(self, channel: str) -> Optional[int]:
+        return self.replay_ids.get(channel)
+
+    def set(self, channel: str, replay_id: int) -> None:
+        self.replay_ids[channel] = replay_id
+
+
+class FileReplayStore(ReplayStore):
+    """Replay ids saved in a JSON file, replaced atomically after every event"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.replay_ids = json.load(f)
+
+    def set(self, channel: str, replay_id: int) -> None:
+        super().set(channel, replay_id)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.replay_ids, f)
+        os.replace(tmp_path, self.path)
+
+
+class StreamingClient:
+    """CometD client with a registry of handlers by channels
+
+    parameters:
+        alias: the Salesforce database alias
+        replay_store: where to save replay ids (default in memory)
+        replay_default: the replay id of a channel without a saved id, REPLAY_NEW or REPLAY_ALL
+        max_backoff: the maximal delay in seconds between reconnects
+    """
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(self, alias: str = 'salesforce', replay_store: Optional[ReplayStore] = None,
+                 replay_default: int = REPLAY_NEW, max_backoff: float = 60.0) -> None:
+        self.alias = alias
+        self.replay_store = replay_store if replay_store is not None else ReplayStore()
+        self.replay_default = replay_default
+        self.backoff_policy = RetryPolicy(backoff=1.0, max_backoff=max_backoff)
+        self.handlers = defaultdict(list)  # type: Dict[str, List[Handler]]
+        self.client_id = None  # type: Optional[str]
+        self.subscribed = set()  # type: set
+        self.attempt = 0  # the number of failed attempts to reconnect in series
+        self.stopped = False
+
+    def register(self, channel: str, handler: Handler) -> None:
+        """Register a handler of messages of the channel e.g. '/data/ContactChangeEvent'
+
+        The channel is subscribed by the next handshake or by the next poll.
+        """
+        self.handlers[channel].append(handler)
+
+    def request(self, messages: List[Message], timeout: Any = None) -> List[Message]:
+        connections[self.alias].ensure_connection()
+        connection = connections[self.alias].connection
+        kwargs = {'json': messages}  # type: Dict[str, Any]
+        if timeout:
+            kwargs['timeout'] = timeout
+        try:
+            response = connection.handle_api_exceptions('POST', '/cometd/{}'.format(connection.api_ver), **kwargs)
+        except (SalesforceAuthError, OperationalError):
+            raise
+        except SalesforceError as exc:  # e.g. a timeout or a connection error
+            raise OperationalError(str(exc))
+        return response_json(response)
+
+    def handshake(self) -> None:
+        self.client_id = None
+        self.subscribed = set()
+        reply = self.request([{'channel': '/meta/handshake', 'version': '1.0',
+                               'supportedConnectionTypes': ['long-polling'], 'ext': {'replay': True}}])[0]
+        if not reply.get('successful'):
+            raise OperationalError("CometD handshake failed: {}".format(reply.get('error')))
+        self.client_id = reply['clientId']
+        log.info("CometD handshake, clientId %s", self.client_id)
+
+    def subscribe(self, channel: str) -> None:
+        replay_id = self.replay_store.get(channel)
+        reply = self.request([{
+            'channel': '/meta/subscribe', 'clientId': self.client_id, 'subscription': channel,
+            'ext': {'replay': {channel: replay_id if replay_id is not None else self.replay_default}},
+        }])[0]
+        if not reply.get('successful'):
+            raise OperationalError("CometD subscription of {} failed: {}".format(channel, reply.get('error')))
+        self.subscribed.add(channel)
+
+    def poll(self) -> int:
+        """Receive and dispatch events by one long polling request. Return the number of events."""
+        if self.client_id is None:
+            self.handshake()
+        for channel in self.handlers:
+            if channel not in self.subscribed:
+                self.subscribe(channel)
+        replies = self.request([{'channel': '/meta/connect', 'clientId': self.client_id,
+                                 'connectionType': 'long-polling'}],
+                               timeout=(4, LONG_POLLING_TIMEOUT))
+        count = 0
+        for message in replies:
+            if message['channel'] == '/meta/connect':
+                if not message.get('successful'):
+                    reconnect = message.get('advice', {}).get('reconnect', 'handshake')
+                    if reconnect == 'none':
+                        raise InterfaceError("CometD connection refused: {}".format(message.get('error')))
+                    log.info("CometD reconnect by %s after: %s", reconnect, message.get('error'))
+                    if reconnect == 'handshake':
+                        self.client_id = None
+            elif not message['channel'].startswith('/meta/'):
+                self.dispatch(message)
+                count += 1
+        return count
+
+    def dispatch(self, message: Message) -> None:
+        """Call handlers of the message and save the replay id after them"""
+        channel = message['channel']
+        for handler in self.handlers.get(channel, []):
+            handler(message)
+        replay_id = message.get('data', {}).get('event', {}).get('replayId')
+        if replay_id is not None:
+            self.replay_store.set(channel, replay_id)
+
+    def run(self, max_events: Optional[int] = None) -> int:
+        """Receive events until `stop()` is called or until `max_events` are received
+
+        Errors of network and of the server (OperationalError) are retried with an exponential
+        backoff after a new handshake, also if they are raised by a handler. Events not yet
+        processed are received again then, because their replay ids have not been saved.
+        Other errors and a connection refused by the server are raised.
+        """
+        count = 0
+        self.stopped = False
+        while not self.stopped and (max_events is None or count < max_events):
+            try:
+                count += self.poll()
+            except OperationalError as exc:
+                delay = self.backoff_policy.delay(self.attempt)
+                self.attempt += 1
+                log.warning("CometD reconnect %d in %.1f s after: %s", self.attempt, delay, exc)
+                self.client_id = None
+                time.sleep(delay)
+            else:
+                self.attempt = 0
+        return count
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def disconnect(self) -> None:
+        if self.client_id is not None:
+            self.request([{'channel': '/meta/disconnect', 'clientId': self.client_id}])
+            self.client_id = None
+
+
+def change_event(message: Message) -> Dict[str, Any]:
+    """Get the change of a CDC or PushTopic message normalized as
+    {'entity': ..., 'change_type': ..., 'record_ids': [...], 'values': {...}, 'nulled': [...], 'partial': ...}
+
+    Change types of PushTopic events 'created', 'updated', 'deleted', 'undeleted' are converted
+    to 'CREATE', 'UPDATE', 'DELETE', 'UNDELETE', but values of PushTopic events are partial.
+    """
+    data = message['data']
+    if 'payload' in data:
+        payload = dict(data['payload'])
+        header = payload.pop('ChangeEventHeader')
+        return {'entity': header['entityName'], 'change_type': header['changeType'],
+                'record_ids': header['recordIds'], 'values': payload,
+                'nulled': header.get('nulledFields', []), 'partial': header['changeType'] == 'UPDATE'}
+    sobject = dict(data['sobject'])
+    record_id = sobject.pop('Id')
+    return {'entity': None, 'change_type': PUSH_TOPIC_CHANGE_TYPES[data['event']['type']],
+            'record_ids': [record_id], 'values': sobject, 'nulled': [], 'partial': True}
+
+
+def event_values(model: Type[models.Model], values: Dict[str, Any], nulled: Optional[List[str]] = None
+                 ) -> Dict[str, Any]:
+    """Convert values of an event by API names to values by attnames of the model
+
+    Compound fields e.g. {"Name": {"FirstName": ..., "LastName": ...}} are flattened.
+    Values None are omitted if they are not in `nulled` (they are unchanged fields in an update).
+    """
+    by_column = {field.column: field for field in model._meta.concrete_fields if not field.primary_key}
+    flat = {}  # type: Dict[str, Any]
+    for name, value in values.items():
+        if isinstance(value, dict):
+            flat.update(value)
+        else:
+            flat[name] = value
+    ret = {}
+    for name, value in flat.items():
+        field = by_column.get(name)
+        if field is not None and value is not None:
+            ret[field.attname] = field.to_python(value)
+    for name in nulled or []:
+        field = by_column.get(name.split('.')[-1])
+        if field is not None:
+            ret[field.attname] = None
+    return ret
+
+
+class MirrorHandler:
+    """Apply change events to a local mirror of an extended model (see salesforce.models_extend)
+
+    Updated rows that are not in the mirror and rows of gap events are read by a query.
+    An overflow of events is resolved by an incremental sync (salesforce.sync.sync_model).
+    """
+
+    def __init__(self, model: Type[models.Model], target: str = 'default', source: str = 'salesforce') -> None:
+        self.model = model
+        self.target = target
+        self.source = source
+
+    def __call__(self, message: Message) -> None:
+        change = change_event(message)
+        if change['entity'] not in (None, self.model._meta.db_table):
+            return  # an event of other SObject in a channel of more SObjects
+        change_type, record_ids = change['change_type'], change['record_ids']
+        manager = self.model._default_manager.db_manager(self.target)
+        if change_type.startswith('GAP_'):
+            if change_type == 'GAP_OVERFLOW' or not record_ids:
+                sync_model(self.model, self.source, self.target)
+            elif change_type == 'GAP_DELETE':
+                manager.filter(pk__in=record_ids).delete()
+            else:
+                self.reload(record_ids)
+        elif change_type == 'DELETE':
+            manager.filter(pk__in=record_ids).delete()
+        elif change['partial']:
+            values = event_values(self.model, change['values'], change['nulled'])
+            updated = manager.filter(pk__in=record_ids).update(**values) if values else 0
+            if updated < len(record_ids):
+                existing = set(manager.filter(pk__in=record_ids).values_list('pk', flat=True))
+                self.reload([x for x in record_ids if x not in existing])
+        else:
+            values = event_values(self.model, change['values'])
+            apply_batch(self.model, self.target, [self.model(pk=pk, **values) for pk in record_ids])
+
+    def reload(self, record_ids: List[str]) -> None:
+        if record_ids:
+            rows = list(self.model._default_manager.using(self.source).filter(pk__in=record_ids))
+            apply_batch(self.model, self.target, rows)
+
+
+class CacheInvalidationHandler:
+    """Invalidate cached query results of the SObject and send the signal `sobject_changed`
+
+    The SObject name of PushTopic events is not in the event. It is specified by the parameter.
+    """
+
+    def __init__(self, sobject: Optional[str] = None) -> None:
+        self.sobject = sobject
+
+    def __call__(self, message: Message) -> None:
+        change = change_event(message)
+        sobject = change['entity'] or self.sobject
+        if sobject:
+            query_cache.invalidate_table(sobject)
+        sobject_changed.send(sender=sobject, record_ids=change['record_ids'],
+                             change_type=change['change_type'])
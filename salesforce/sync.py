@@ -0,0 +1,143 @@
+# django-salesforce
+
+"""
+Incremental synchronization of Salesforce objects to a local database (a mirror)
+
+The models are extended models `salesforce.models_extend.SalesforceModel` with real Salesforce Ids
+also in the local database. Only rows changed since the previous run are pulled. The high-water mark
+is the maximal value of `SystemModstamp` (or `LastModifiedDate`) in the local table, therefore
+no other state is stored and a sync interrupted by an error is resumed after the last completed batch.
+Rows are pulled by "queryAll" with their `IsDeleted` flag and the deleted rows are deleted locally.
+
+The model must have a field with db_column 'SystemModstamp' (recommended) or 'LastModifiedDate',
+a field with db_column 'IsDeleted' is required for propagation of deletes, e.g.:
+
+    class Contact(models_extend.SalesforceModel):
+        ...
+        system_modstamp = models.DateTimeField(db_column='SystemModstamp', sf_read_only=models.READ_ONLY,
+                                               null=True)
+        is_deleted = models.BooleanField(db_column='IsDeleted', sf_read_only=models.READ_ONLY, default=False)
+
+Example:
+    for model in (Account, Contact):  # parents before children
+        print(sync_model(model))
+"""
+import datetime
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Type
+
+from django.db import models, transaction
+from django.db.models import Max
+
+from salesforce.dbapi.exceptions import NotSupportedError
+
+MODSTAMP_COLUMNS = ('SystemModstamp', 'LastModifiedDate')
+
+
+class SyncStats(NamedTuple):
+    model: str
+    created: int
+    updated: int
+    deleted: int
+    mark: Optional[datetime.datetime]  # the new high-water mark
+
+    def __str__(self) -> str:
+        return "Synchronized {}: {} created, {} updated, {} deleted, high-water mark {}".format(
+            self.model, self.created, self.updated, self.deleted,
+            self.mark.isoformat() if self.mark else None)
+
+
+def get_field_by_column(model: Type[models.Model], *columns: str) -> Optional[models.Field]:
+    """Get the first field of the model found by db_column names in the order of columns"""
+    by_column = {field.column: field for field in model._meta.concrete_fields}
+    for column in columns:
+        if column in by_column:
+            return by_column[column]
+    return None
+
+
+def get_mark(model: Type[models.Model], target: str) -> Optional[datetime.datetime]:
+    """Get the high-water mark of the model in the target database"""
+    modstamp = get_modstamp_field(model)
+    return model._default_manager.using(target).aggregate(mark=Max(modstamp.name))['mark']
+
+
+def get_modstamp_field(model: Type[models.Model]) -> models.Field:
+    field = get_field_by_column(model, *MODSTAMP_COLUMNS)
+    if field is None:
+        raise NotSupportedError("The model {} can not be synchronized without a field 'SystemModstamp' "
+                                "or 'LastModifiedDate'".format(model._meta.label))
+    return field
+
+
+def changed_rows(model: Type[models.Model], source: str = 'salesforce', mark: Optional[datetime.datetime] = None
+                 ) -> 'models.QuerySet[Any]':
+    """Queryset of rows changed at or after the high-water mark, including deleted rows if possible
+
+    Rows with the same timestamp as the mark are pulled again, because other rows with the same
+    timestamp could be committed in Salesforce after the previous run. Deleted rows are not pulled
+    without a mark, because they are not in the target database.
+    """
+    modstamp = get_modstamp_field(model)
+    qs = model._default_manager.using(source)
+    if mark is not None:
+        if get_field_by_column(model, 'IsDeleted'):
+            qs = qs.sf(query_all=True)
+        qs = qs.filter(**{modstamp.name + '__gte': mark})
+    return qs.order_by(modstamp.name, 'pk')
+
+
+def apply_batch(model: Type[models.Model], target: str, rows: List[models.Model]) -> SyncStats:
+    """Upsert or delete a batch of rows in the target database in one transaction"""
+    is_deleted = get_field_by_column(model, 'IsDeleted')
+    deleted_pks = [x.pk for x in rows if is_deleted and getattr(x, is_deleted.attname)]
+    live = [x for x in rows if not (is_deleted and getattr(x, is_deleted.attname))]
+    manager = model._default_manager.db_manager(target)
+    update_fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+    with transaction.atomic(using=target):
+        existing = set(manager.filter(pk__in=[x.pk for x in live]).values_list('pk', flat=True))
+        new = [x for x in live if x.pk not in existing]
+        old = [x for x in live if x.pk in existing]
+        for obj in live:
+            obj._state.db = target  # pylint:disable=protected-access
+            obj._state.adding = obj.pk not in existing  # pylint:disable=protected-access
+        if new:
+            manager.bulk_create(new, batch_size=len(new))
+        if old:
+            manager.bulk_update(old, update_fields, batch_size=len(old))
+        deleted = manager.filter(pk__in=deleted_pks).delete()[1].get(model._meta.label, 0) if deleted_pks else 0
+    modstamp = get_field_by_column(model, *MODSTAMP_COLUMNS)
+    marks = [getattr(x, modstamp.attname) for x in rows] if modstamp else []
+    return SyncStats(model._meta.label, len(new), len(old), deleted,
+                     max((x for x in marks if x is not None), default=None))
+
+
+def iter_batches(rows: Any, batch_size: int) -> Iterator[List[Any]]:
+    batch = []  # type: List[Any]
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sync_model(model: Type[models.Model], source: str = 'salesforce', target: str = 'default',
+               batch_size: int = 2000, full: bool = False,
+               log: Optional[Callable[[str], None]] = None) -> SyncStats:
+    """Pull rows of the model changed in Salesforce since the last run to the target database
+
+    parameters:
+        full: ignore the high-water mark and pull all rows
+        log: a function for progress messages after every batch
+    """
+    mark = None if full else get_mark(model, target)
+    qs = changed_rows(model, source, mark)
+    created = updated = deleted = 0
+    for batch in iter_batches(qs.iterator(chunk_size=batch_size), batch_size):
+        stats = apply_batch(model, target, batch)
+        created, updated, deleted = created + stats.created, updated + stats.updated, deleted + stats.deleted
+        mark = stats.mark or mark
+        if log:
+            log(str(stats))
+    return SyncStats(model._meta.label, created, updated, deleted, mark)
@@ -5,6 +5,7 @@ Tests that do not need to connect servers
 
 from typing import Type
 from django.apps.registry import Apps
+from django.db import NotSupportedError
 from django.test import TestCase
 from django.db.models import DO_NOTHING, Subquery
 from salesforce import fields, models
@@ -188,6 +189,25 @@ class TestTopologyCompiler(TestCase):
         self.assertTopo(alias_map_items, {'C': 'C', 'A': 'C.A', 'B': 'C.B'})
 
 
+class SelectRelatedDepthTest(TestCase):
+    def test_max_depth(self):
+        qs = OpportunityContactRole.objects.select_related()
+        self.assertIn('OpportunityContactRole.Contact.LastName', str(qs.query))
+        self.assertNotIn('OpportunityContactRole.Contact.Owner.', str(qs.query))
+        qs = OpportunityContactRole.objects.sf(max_depth=2).select_related()
+        self.assertIn('OpportunityContactRole.Contact.Owner.Username', str(qs.query))
+        with self.assertRaises(NotSupportedError):
+            OpportunityContactRole.objects.sf(max_depth=6)
+
+    def test_too_deep(self):
+        alias_map_items = [(None, 'T0', None, 'T0')] + [
+            ('T%d' % i, 'T%d' % (i + 1), (('PId', 'Id'),), 'T%d' % (i + 1)) for i in range(6)]
+        compiler = Contact.objects.none().query.get_compiler('salesforce')
+        self.assertEqual(compiler.query_topology(alias_map_items[:6])['T5'], 'T0.P.P.P.P.P')
+        with self.assertRaises(NotSupportedError):
+            Contact.objects.none().query.get_compiler('salesforce').query_topology(alias_map_items)
+
+
 class QueryTest(TestCase):
     def test_where_related_in(self):
         qs = TestModel.objects.filter(contact__name__in=('a', 'b')).values('pk')
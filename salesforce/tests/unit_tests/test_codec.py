@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+
+from salesforce.dbapi import codec
+from salesforce.dbapi.exceptions import InterfaceError
+
+
+class FakeResponse:
+    """Response with only a text body, like in mock tests"""
+    def __init__(self, text):
+        self.text = text
+
+    def json(self, **kwargs):
+        return codec.json.loads(self.text, **kwargs)
+
+
+@skipUnless(codec.orjson, "the package 'orjson' is required")
+@override_settings(SF_JSON_CODEC='orjson')
+class TestOrjsonCodec(SimpleTestCase):
+    def test_loads(self):
+        self.assertEqual(codec.loads(b'{"a": 1.5, "b": [null, true]}'), {'a': 1.5, 'b': [None, True]})
+        self.assertEqual(codec.response_json(FakeResponse('{"a": 1.5}')), {'a': 1.5})
+        # hooks are supported by the fallback to the standard library
+        self.assertEqual(codec.response_json(FakeResponse('{"a": 1.5}'), parse_float=Decimal), {'a': Decimal('1.5')})
+        data = codec.loads('{"b": 1, "a": 2}', object_pairs_hook=OrderedDict)
+        self.assertIsInstance(data, OrderedDict)
+        self.assertEqual(list(data), ['b', 'a'])
+
+    def test_encode(self):
+        kwargs = codec.encode_json_kwarg({'json': {'a': 'č'}, 'headers': {'Accept': 'x'}, 'timeout': 5})
+        self.assertEqual(kwargs, {'data': '{"a":"č"}'.encode('utf-8'), 'timeout': 5,
+                                  'headers': {'Accept': 'x', 'Content-Type': 'application/json'}})
+        self.assertEqual(codec.dumps([1, None]), '[1,null]')
+        with self.assertRaises(TypeError):  # like the standard library, values are converted before
+            codec.dumps({'a': Decimal('1.5')})
+
+
+class StubOrjson:
+    """A stub of orjson by the standard library: bytes output, str or bytes input"""
+    @staticmethod
+    def loads(data):
+        assert isinstance(data, (str, bytes))
+        return codec.json.loads(data)
+
+    @staticmethod
+    def dumps(obj):
+        return codec.json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+@override_settings(SF_JSON_CODEC='orjson')
+class TestOrjsonBranch(SimpleTestCase):
+    """The orjson branch of the codec, also if the package orjson is not installed"""
+    def setUp(self):
+        patcher = mock.patch.object(codec, 'orjson', StubOrjson)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_response_bytes(self):
+        response = FakeResponse('{"a": "č"}')
+        response.content = '{"a": "č"}'.encode('utf-8')
+        with mock.patch.object(response, 'json') as json_method:
+            self.assertEqual(codec.response_json(response), {'a': 'č'})
+        json_method.assert_not_called()  # decoded directly from bytes
+        self.assertEqual(codec.response_json(FakeResponse('[1]')), [1])  # only text in mock responses
+
+    def test_encode(self):
+        self.assertEqual(codec.dumps({'a': 'č'}), '{"a":"č"}')
+        kwargs = codec.encode_json_kwarg({'json': [1]})
+        self.assertEqual(kwargs, {'data': b'[1]', 'headers': {'Content-Type': 'application/json'}})
+        self.assertEqual(codec.encode_json_kwarg({'json': None, 'data': 'x'}), {'json': None, 'data': 'x'})
+
+
+class TestDefaultCodec(SimpleTestCase):
+    def test_default(self):
+        kwargs = {'json': {'a': 1}}
+        self.assertIs(codec.encode_json_kwarg(kwargs), kwargs)
+        self.assertEqual(codec.dumps({'a': 1}), '{"a": 1}')
+
+    @override_settings(SF_JSON_CODEC='invalid')
+    def test_invalid(self):
+        with self.assertRaises(InterfaceError):
+            codec.loads('{}')
@@ -0,0 +1,67 @@
+import threading
+import time
+from unittest import TestCase
+
+from salesforce.dbapi.exceptions import OperationalError
+from salesforce.dbapi.governor import RateGovernor, get_rate_governor, is_low_priority, low_priority
+
+
+class TestRateGovernor(TestCase):
+    def test_get_rate_governor(self):
+        self.assertIsNone(get_rate_governor('test_governor', {}))
+        governor = get_rate_governor('test_governor', {'RATE_GOVERNOR': {'max_in_flight': 3}})
+        self.assertEqual(governor.max_in_flight, 3)
+        self.assertIs(get_rate_governor('test_governor', {'RATE_GOVERNOR': True}), governor)
+
+    def test_low_priority(self):
+        governor = RateGovernor(slow_down_usage=0.5, slow_down_delay=0, reject_usage=0.9)
+        self.assertFalse(is_low_priority())
+        governor.update_usage(600, 1000)
+        with governor.request():
+            pass
+        with low_priority():
+            self.assertTrue(is_low_priority())
+            with governor.request():
+                pass
+            self.assertEqual(governor.delayed, 1)
+            governor.update_usage(950, 1000)
+            with self.assertRaises(OperationalError):
+                with governor.request():
+                    pass
+        self.assertEqual(governor.rejected, 1)
+        with governor.request():  # high priority is never rejected
+            pass
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_in_flight(self):
+        governor = RateGovernor(max_in_flight=2, reserved_in_flight=1)
+        max_seen = []
+        lock = threading.Lock()
+
+        def work():
+            with governor.request():
+                with lock:
+                    max_seen.append(governor.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(max_seen), 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    def test_token_bucket(self):
+        governor = RateGovernor(rate=100, burst=2)
+        start = time.monotonic()
+        for _ in range(5):
+            with governor.request():
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.025)  # 3 tokens above the burst
+
+    def test_limits_poll_due(self):
+        self.assertFalse(RateGovernor().limits_poll_due())
+        governor = RateGovernor(poll_limits=60)
+        self.assertTrue(governor.limits_poll_due())
+        self.assertFalse(governor.limits_poll_due())
@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase, override_settings
+
+from salesforce.auth import SalesforcePasswordAuth
+from salesforce.dbapi.exceptions import SalesforceAuthError
+from salesforce.dbapi.metrics import (
+    AliasMetrics, MetricsExporter, MetricsRegistry, PrometheusExporter, endpoint_class, export_metrics,
+    metrics_registry)
+
+
+class FakeRequest:
+    body = '{"a": 1}'
+
+
+class FakeResponse:
+    status_code = 200
+    request = FakeRequest()
+    text = '{"b": "č"}'
+
+
+class JsonExporter(MetricsExporter):
+    def export(self, registry):
+        return 'aliases: ' + ','.join(m.alias for m in registry)
+
+
+class TestMetrics(SimpleTestCase):
+    def test_endpoint_class(self):
+        self.assertEqual(endpoint_class('https://na1.salesforce.com/services/data/v63.0/query/?q=SELECT'), 'query')
+        self.assertEqual(endpoint_class('/services/data/v63.0/query/01gD0000002HU6KIAW-2000'), 'queryMore')
+        self.assertEqual(endpoint_class('/services/data/v63.0/tooling/queryAll?q=SELECT'), 'query')
+        self.assertEqual(endpoint_class('composite/sobjects'), 'composite')
+        self.assertEqual(endpoint_class('sobjects/Contact/003000000000001AAA'), 'sobjects')
+        self.assertEqual(endpoint_class('sobjects/Contact/describe/'), 'describe')
+        self.assertEqual(endpoint_class('sobjects/'), 'describe')
+        self.assertEqual(endpoint_class('/services/data/v63.0/sobjects/Contact/describe/layouts/'), 'describe')
+        self.assertEqual(endpoint_class('sobjects/Contact'), 'sobjects')
+        self.assertEqual(endpoint_class('jobs/ingest/750/batches'), 'bulk')
+        self.assertEqual(endpoint_class('limits/'), 'limits')
+        self.assertEqual(endpoint_class(''), 'other')
+
+    def test_observe(self):
+        metrics = AliasMetrics('test')
+        metrics.observe_response('POST', 'composite', FakeResponse(), 0.3)
+        metrics.observe('query', 'GET', 'ReadTimeout', 40)
+        metrics.record_retry('HTTP_503')
+        self.assertEqual(metrics.requests, {('composite', 'POST', '200'): 1, ('query', 'GET', 'ReadTimeout'): 1})
+        self.assertEqual((metrics.request_bytes['composite'], metrics.response_bytes['composite']), (8, 11))
+        self.assertEqual(metrics.latency['composite'].cumulative()[2:4], [('0.25', 0), ('0.5', 1)])
+        self.assertEqual(metrics.latency['query'].cumulative()[-1], ('+Inf', 1))
+        metrics.reset()
+        self.assertEqual((metrics.requests, metrics.retries), ({}, {}))
+
+    def test_failed_auth(self):
+        class FakeSession:
+            def post(self, url, **kwargs):
+                response = FakeResponse()
+                response.status_code = 400
+                return response
+
+            def get(self, url, **kwargs):  # ping
+                return FakeResponse()
+
+        settings_dict = {'HOST': 'https://login.example.com', 'CONSUMER_KEY': 'k', 'CONSUMER_SECRET': 's',
+                         'USER': 'u', 'PASSWORD': 'p'}
+        auth = SalesforcePasswordAuth('metrics_test', settings_dict, _session=FakeSession())
+        metrics_registry.get('metrics_test').reset()
+        with self.assertRaises(SalesforceAuthError):
+            auth.authenticate()
+        self.assertEqual(metrics_registry.get('metrics_test').requests, {('auth', 'POST', '400'): 1})
+
+    def test_prometheus(self):
+        registry = MetricsRegistry()
+        metrics = registry.get('sf')
+        self.assertIs(registry.get('sf'), metrics)
+        metrics.observe('query', 'GET', 200, 0.07, response_bytes=100)
+        metrics.update_usage(10, 5000)
+        text = PrometheusExporter().export(registry)
+        self.assertIn('# TYPE salesforce_requests_total counter\n'
+                      'salesforce_requests_total{alias="sf",endpoint="query",method="GET",status="200"} 1\n', text)
+        self.assertIn('salesforce_request_duration_seconds_bucket{alias="sf",endpoint="query",le="0.05"} 0\n'
+                      'salesforce_request_duration_seconds_bucket{alias="sf",endpoint="query",le="0.1"} 1\n', text)
+        self.assertIn('salesforce_request_duration_seconds_count{alias="sf",endpoint="query"} 1\n', text)
+        self.assertIn('salesforce_response_bytes_total{alias="sf",endpoint="query"} 100\n', text)
+        self.assertIn('salesforce_api_usage{alias="sf"} 10\n', text)
+        self.assertEqual(PrometheusExporter.labels({'a': 'x"y'}), '{a="x\\"y"}')
+
+    @override_settings(SF_METRICS_EXPORTER='salesforce.tests.unit_tests.test_metrics.JsonExporter')
+    def test_pluggable_exporter(self):
+        self.assertTrue(export_metrics().startswith('aliases: '))
@@ -0,0 +1,25 @@
+import datetime
+from unittest import TestCase
+
+from salesforce.dbapi.partitions import id_18, id_to_int, int_to_id, split_range
+
+
+class TestPartitions(TestCase):
+    def test_id_18(self):
+        self.assertEqual(id_18('001A000001K7YaX'), '001A000001K7YaXIAV')
+        self.assertEqual(id_18('001A000001K7YaXIAV'), '001A000001K7YaXIAV')
+        self.assertEqual(int_to_id(id_to_int('003000000000001')), '003000000000001AAA')
+
+    def test_split_id_range(self):
+        bounds = split_range('001A000001K7YaXIAV', '001A000001K9aaaIAV', 4)
+        self.assertEqual(len(bounds), 3)
+        self.assertEqual([id_to_int(x) for x in bounds], sorted(id_to_int(x) for x in bounds))
+        self.assertTrue(all(len(x) == 18 for x in bounds))
+        # a too small range is not split to empty partitions
+        self.assertEqual(split_range('003000000000001AAA', '003000000000003AAA', 4), ['003000000000002AAA'])
+        self.assertEqual(split_range('003000000000001AAA', '003000000000002AAA', 4), [])
+
+    def test_split_datetime_range(self):
+        low = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        bounds = split_range(low, low + datetime.timedelta(days=4), 4)
+        self.assertEqual(bounds, [low + datetime.timedelta(days=i) for i in (1, 2, 3)])
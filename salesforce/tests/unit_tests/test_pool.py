@@ -0,0 +1,51 @@
+import time
+from unittest import TestCase
+
+import requests
+
+from salesforce.dbapi.pool import (
+    HTTPAdapter, ReapingHTTPSConnectionPool, SharedHTTPAdapter, close_shared_adapters, get_http_adapter)
+
+
+class FakeConn:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestPool(TestCase):
+    def tearDown(self):
+        close_shared_adapters('test_pool')
+
+    def test_shared_adapter(self):
+        adapter = get_http_adapter('test_pool', 'https://a.example.com', {'POOL_MAXSIZE': 20})
+        self.assertIsInstance(adapter, SharedHTTPAdapter)
+        self.assertIs(get_http_adapter('test_pool', 'https://a.example.com', {}), adapter)
+        self.assertIsNot(get_http_adapter('test_pool', 'https://b.example.com', {}), adapter)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        not_shared = get_http_adapter('test_pool', 'https://a.example.com', {'SHARED_POOL': False})
+        self.assertIs(type(not_shared), HTTPAdapter)
+
+    def test_session_close(self):
+        adapter = get_http_adapter('test_pool', 'https://a.example.com', {})
+        pool = adapter.poolmanager.connection_from_url('https://a.example.com')
+        session = requests.Session()
+        session.mount('https://a.example.com', adapter)
+        session.close()
+        self.assertIs(adapter.poolmanager.connection_from_url('https://a.example.com'), pool)
+
+    def test_reap_idle(self):
+        adapter = SharedHTTPAdapter(idle_timeout=60)
+        pool = adapter.poolmanager.connection_from_url('https://a.example.com')
+        self.assertIsInstance(pool, ReapingHTTPSConnectionPool)
+        old_conn, new_conn = FakeConn(), FakeConn()
+        pool.pool.get(block=False), pool.pool.get(block=False)  # two free slots
+        pool._put_conn(old_conn)
+        old_conn.sf_idle_since = time.monotonic() - 100
+        pool._put_conn(new_conn)
+        self.assertEqual(adapter.reap_idle(), 0)  # not checked too early
+        self.assertEqual(adapter.reap_idle(force=True), 1)
+        self.assertEqual((old_conn.closed, new_conn.closed), (True, False))
+        self.assertEqual(pool.pool.queue[-2:], [None, new_conn])
+        adapter.shutdown()
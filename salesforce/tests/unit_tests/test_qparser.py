@@ -1,7 +1,12 @@
+import datetime
 from unittest import TestCase
+
+import pytz
+
 from salesforce.dbapi.subselect import (
     find_closing_parenthesis, split_subquery, transform_except_subquery,
     mark_quoted_strings, subst_quoted_strings, simplify_expression,
+    DecoderPlan, QQuery, fix_data_type, parse_date, parse_datetime,
 )
 
 
@@ -63,3 +68,45 @@ class ReplaceQuotedStringsTest(TestCase):
 
     def test_simplify_expression(self):
         self.assertEqual(simplify_expression(' a \t b  c . . d '), 'a b c..d')
+
+
+class DecoderPlanTest(TestCase):
+    def test_typed_columns(self):
+        qquery = QQuery("SELECT Contact.Id, Contact.Birthdate, Contact.Description, Contact.Account.CreatedDate "
+                        "FROM Contact")
+        plan = DecoderPlan(qquery, ['raw', 'date', 'raw', 'datetime'])
+        records = [
+            {'attributes': {'type': 'Contact'}, 'Id': '003A', 'Birthdate': '2024-01-02',
+             'Description': '2024-01-02T03:04:05.000+0000',
+             'Account': {'attributes': {'type': 'Account'}, 'CreatedDate': '2024-01-02T03:04:05.678+0000'}},
+            {'attributes': {'type': 'Contact'}, 'Id': '003B', 'Birthdate': None, 'Description': None,
+             'Account': None},
+        ]
+        self.assertEqual(list(plan.decode(records)), [
+            ('003A', datetime.date(2024, 1, 2), '2024-01-02T03:04:05.000+0000',
+             datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=pytz.utc)),
+            ('003B', None, None, None),
+        ])
+        self.assertEqual(list(plan.decode(records[1:], row_type=dict)),
+                         [{'Id': '003B', 'Birthdate': None, 'Description': None, 'Account.CreatedDate': None}])
+
+    def test_guessed_columns(self):
+        qquery = QQuery("SELECT Contact.LastModifiedDate, Contact.LastName FROM Contact")
+        plan = DecoderPlan(qquery)
+        # the case of keys in the response can differ from the query
+        records = [{'attributes': {}, 'lastmodifieddate': None, 'LastName': 'a'},
+                   {'attributes': {}, 'lastmodifieddate': '2024-01-02T03:04:05.000Z', 'LastName': 'b'}]
+        self.assertEqual(list(plan.decode(records, row_type=list)), [
+            [None, 'a'], [datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=pytz.utc), 'b']])
+        self.assertEqual(plan.column_types, ['datetime', 'raw'])
+
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime('2024-01-02T03:04:05.006+0000'),
+                         fix_data_type('2024-01-02T03:04:05.006+0000'))
+        self.assertEqual(parse_datetime('not a date'), 'not a date')
+        self.assertEqual(parse_date('2024-02-30'), '2024-02-30')
+
+    def test_unsupported(self):
+        self.assertFalse(QQuery("SELECT Id, (SELECT Id FROM Contacts) FROM Account").supports_decoder_plan)
+        self.assertFalse(QQuery("SELECT COUNT() FROM Account").supports_decoder_plan)
+        self.assertFalse(QQuery("SELECT MAX(Name) m FROM Account").supports_decoder_plan)
@@ -0,0 +1,75 @@
+import json
+from http.client import RemoteDisconnected
+from unittest import TestCase
+
+import requests
+from urllib3.connectionpool import HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from salesforce.dbapi.driver import exc_retry_reason
+from salesforce.dbapi.retry import RetryPolicy, RetryState, retry_statistics
+
+
+class FakeResponse:
+    def __init__(self, status_code, error_code=None, message=''):
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'application/json'} if error_code else {}
+        self.text = json.dumps([{'errorCode': error_code, 'message': message}]) if error_code else ''
+
+
+class TestRetryPolicy(TestCase):
+    def test_retry_reason(self):
+        policy = RetryPolicy()
+        lock = FakeResponse(400, 'UNABLE_TO_LOCK_ROW', 'unable to obtain exclusive access to this record')
+        self.assertEqual(policy.retry_reason('PATCH', response=lock), 'UNABLE_TO_LOCK_ROW')
+        # a POST is retried only if it is atomic
+        self.assertEqual(policy.retry_reason('POST', response=lock), None)
+        self.assertEqual(policy.retry_reason('POST', response=lock, atomic=True), 'UNABLE_TO_LOCK_ROW')
+        # an unknown result is retried only for idempotent methods
+        self.assertEqual(policy.retry_reason('GET', response=FakeResponse(504)), 'HTTP_504')
+        self.assertEqual(policy.retry_reason('POST', response=FakeResponse(504), atomic=True), None)
+        self.assertEqual(policy.retry_reason('POST', response=FakeResponse(503), atomic=True), 'HTTP_503')
+        # the daily limit is not a transient error
+        daily = FakeResponse(403, 'REQUEST_LIMIT_EXCEEDED', 'TotalRequests Limit exceeded.')
+        self.assertEqual(policy.retry_reason('GET', response=daily), None)
+        self.assertEqual(policy.retry_reason('GET', response=FakeResponse(400, 'MALFORMED_QUERY')), None)
+        self.assertEqual(policy.retry_reason('GET', exc_reason='Timeout'), None)  # disabled by default
+        self.assertEqual(RetryPolicy(error_codes={'Timeout': 1}).retry_reason('GET', exc_reason='Timeout'), 'Timeout')
+
+    def test_connection_errors(self):
+        policy = RetryPolicy(error_codes={'ConnectError': 1, 'ConnectionError': 1})
+        # the request has not been sent
+        self.assertEqual(policy.retry_reason('POST', exc_reason='ConnectError'), 'ConnectError')
+        # the connection has been dropped after the request has been sent
+        self.assertEqual(policy.retry_reason('POST', exc_reason='ConnectionError', atomic=True), None)
+        self.assertEqual(policy.retry_reason('GET', exc_reason='ConnectionError'), 'ConnectionError')
+
+    def test_exc_retry_reason(self):
+        url = 'https://example.com/services/data'
+        pool = HTTPSConnectionPool('example.com')
+        new_connection = NewConnectionError(None, 'Failed to establish a new connection')
+        self.assertEqual(exc_retry_reason(requests.exceptions.ConnectionError(
+            MaxRetryError(pool, url, new_connection))), 'ConnectError')
+        self.assertEqual(exc_retry_reason(requests.exceptions.ConnectTimeout()), 'ConnectError')
+        self.assertEqual(exc_retry_reason(requests.exceptions.ConnectionError(
+            ProtocolError('Connection aborted.', RemoteDisconnected('Remote end closed connection')))),
+            'ConnectionError')
+        self.assertEqual(exc_retry_reason(requests.exceptions.ReadTimeout()), 'Timeout')
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=4)
+        self.assertTrue(0.5 <= policy.delay(0) <= 1)
+        self.assertTrue(2 <= policy.delay(2) <= 4)
+        self.assertTrue(2 <= policy.delay(5) <= 4)
+
+    def test_retry_state(self):
+        retry_statistics.reset()
+        retry = RetryState('GET', 'query')
+        retry._policy = RetryPolicy(max_retries=3, error_codes={'HTTP_502': 2})
+        self.assertIsNotNone(retry.next_delay(response=FakeResponse(502)))
+        self.assertIsNotNone(retry.next_delay(response=FakeResponse(502)))
+        self.assertIsNone(retry.next_delay(response=FakeResponse(502)))  # the limit for the error code
+        self.assertIsNotNone(retry.next_delay(response=FakeResponse(503)))
+        self.assertIsNone(retry.next_delay(response=FakeResponse(503)))  # max_retries
+        self.assertEqual(retry_statistics.counts, {'HTTP_502': 2, 'HTTP_503': 1})
+        self.assertEqual(retry_statistics.total, 3)
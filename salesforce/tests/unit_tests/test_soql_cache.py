@@ -0,0 +1,100 @@
+import threading
+import time
+from unittest import TestCase, mock
+
+from django.test import override_settings
+
+from salesforce.backend import query_cache
+from salesforce.backend.compiler import fix_field_cache, topology_cache
+from salesforce.dbapi.common import LRUCache
+from salesforce.dbapi.subselect import get_qquery, qquery_cache
+from salesforce.testrunner.example.models import Contact
+
+
+class TestLRUCache(TestCase):
+    @override_settings(TEST_CACHE_SIZE=2)
+    def test_eviction(self):
+        cache = LRUCache('TEST_CACHE_SIZE')
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is now the least recently used
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    @override_settings(TEST_CACHE_SIZE=0)
+    def test_disabled(self):
+        cache = LRUCache('TEST_CACHE_SIZE')
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+
+class TestSoqlCache(TestCase):
+    def setUp(self):
+        for cache in (qquery_cache, topology_cache, fix_field_cache):
+            cache.clear()
+
+    def test_same_shape(self):
+        def compile_(name):
+            qs = Contact.objects.filter(account__BillingCity=name).order_by('last_name').only('last_name')
+            return qs.query.get_compiler('salesforce').as_sql()
+
+        soql, params = compile_('a')
+        misses = (topology_cache.misses, fix_field_cache.misses)
+        soql_2, params_2 = compile_('b')
+        self.assertEqual(soql_2, soql)
+        self.assertEqual((params, params_2), (('a',), ('b',)))
+        self.assertEqual((topology_cache.misses, fix_field_cache.misses), misses)
+        self.assertGreater(fix_field_cache.hits, 0)
+
+    def test_qquery(self):
+        soql = "SELECT Contact.Id, Contact.Account.Name FROM Contact WHERE Contact.LastName = %s"
+        qquery = get_qquery(soql)
+        self.assertIs(get_qquery(soql), qquery)
+        self.assertEqual(qquery.aliases, ['Id', 'Account.Name'])
+
+
+class TestQueryCache(TestCase):
+    def setUp(self):
+        query_cache.get_cache().clear()
+
+    def test_single_flight(self):
+        calls = []
+
+        def query():
+            calls.append(1)
+            time.sleep(0.05)
+            return ['row']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(query_cache.get_or_query('k', 60, query)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [['row']] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_versions(self):
+        key = query_cache.cache_key('salesforce', ['Contact', 'Account'], 'SELECT ...', ['a'])
+        self.assertEqual(query_cache.cache_key('salesforce', ['Account', 'Contact'], 'SELECT ...', ['a']), key)
+        query_cache.invalidate_table('Account')
+        self.assertNotEqual(query_cache.cache_key('salesforce', ['Contact', 'Account'], 'SELECT ...', ['a']), key)
+
+    def test_invalidate_after_write(self):
+        used = query_cache._used  # pylint:disable=protected-access
+        try:
+            query_cache._used = False  # pylint:disable=protected-access
+            with mock.patch.object(query_cache, 'invalidate_table') as invalidate_table:
+                query_cache.invalidate_after_write(['Account'])
+                invalidate_table.assert_not_called()
+                query_cache.enable()
+                invalidate_table.side_effect = ValueError('cache error')
+                with self.assertLogs('salesforce.backend.query_cache', 'WARNING'):
+                    query_cache.invalidate_after_write(['Account'])
+                invalidate_table.assert_called_once_with('Account')
+        finally:
+            query_cache._used = used  # pylint:disable=protected-access
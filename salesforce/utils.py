@@ -10,11 +10,19 @@ are available in the SOAP API. We are using `beatbox` as
 a workaround for those specific actions (such as Lead-Contact
 conversion).
 """
-from typing import Any, Dict, Optional
-from django.db import connections
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import copy
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, router
 
 import salesforce
-from salesforce.dbapi.driver import beatbox, DatabaseError, InterfaceError
+from salesforce.backend import query_cache
+from salesforce.backend.query import SalesforceQuerySet
+from salesforce.backend.utils import CursorWrapper, extract_insert_values
+from salesforce.fields import NOT_CREATEABLE
+from salesforce.dbapi.driver import beatbox, Cursor, DatabaseError, InterfaceError, NotSupportedError
+from salesforce.router import is_sf_database
 
 
 def get_soap_client(db_alias: str, client_class: 'beatbox.PythonClient' = None) -> 'beatbox.PythonClient':
@@ -109,3 +117,179 @@ def convert_lead(lead: Any, converted_status: Optional[str] = None, **kwargs: An
         raise DatabaseError("The Lead conversion failed: {0}, leadId={1}"
                             .format(ret['errors'], ret['leadId']))
     return ret
+
+
+class LazyCount:
+    """The count() of a queryset that is evaluated later by gather()"""
+    def __init__(self, queryset: SalesforceQuerySet) -> None:
+        self.queryset = queryset
+
+
+def lazy_count(queryset: SalesforceQuerySet) -> LazyCount:
+    return LazyCount(queryset)
+
+
+def gather(*items: Union[SalesforceQuerySet, LazyCount]) -> List[Any]:
+    """
+    Evaluate independent querysets and counts together by 'composite/batch' requests
+
+    Up to 25 queries are sent in one request. The results are returned in the same order:
+    a list for a queryset and an int for lazy_count(queryset). The querysets are evaluated
+    in place (their result cache is filled). Next chunks of big results are fetched normally.
+
+    Example:
+        contacts, accounts, n_leads = gather(Contact.objects.filter(...), Account.objects.all(),
+                                             lazy_count(Lead.objects.all()))
+    """
+    results = [None] * len(items)  # type: List[Any]
+    # the planned queries by database aliases: (index, sql, params, query_all, tooling_api)
+    planned = defaultdict(list)  # type: Dict[str, List[Tuple[int, str, Any, bool, bool]]]
+    for i, item in enumerate(items):
+        is_count = isinstance(item, LazyCount)
+        qs = item.queryset if isinstance(item, LazyCount) else item
+        if not isinstance(qs, SalesforceQuerySet) or not is_sf_database(qs.db):
+            raise NotSupportedError("Only Salesforce querysets can be gathered, not {!r}".format(qs))
+        if qs._result_cache is not None:  # pylint:disable=protected-access
+            results[i] = len(qs._result_cache) if is_count else qs._result_cache  # pylint:disable=protected-access
+            continue
+        if qs.query.combinator or (is_count and qs.query.annotations):
+            results[i] = qs.count() if is_count else list(qs)  # not batched
+            continue
+        if is_count:
+            compiled = qs.count_sql()
+        else:
+            try:
+                compiled = qs.query.get_compiler(using=qs.db).as_sql()
+            except EmptyResultSet:
+                compiled = None
+        if compiled is None or not compiled[0]:
+            results[i] = 0 if is_count else []
+            continue
+        sql, params = compiled
+        planned[qs.db].append((i, sql, params, qs.query.sf_params.query_all,
+                               qs.model._meta.sf_tooling_api_model))
+
+    for db, queries in planned.items():
+        connections[db].ensure_connection()
+        url_parts = [Cursor.select_url(sql, params, query_all=query_all, tooling_api=tooling_api)
+                     for _, sql, params, query_all, tooling_api in queries]
+        chunks = connections[db].connection.batch_request(url_parts)
+        for (i, _, _, _, _), chunk in zip(queries, chunks):
+            item = items[i]
+            if isinstance(item, LazyCount):
+                results[i] = chunk['totalSize']
+                continue
+            clone = item._chain()  # pylint:disable=protected-access
+            clone.query.sf_params = sf_params = copy.copy(clone.query.sf_params)
+            sf_params.first_chunk = chunk
+            sf_params.parallel = None
+            sf_params.bulk_query = False
+            clone._fetch_all()  # pylint:disable=protected-access
+            item._result_cache = results[i] = clone._result_cache  # pylint:disable=protected-access
+            item._prefetch_done = clone._prefetch_done  # pylint:disable=protected-access
+    return results
+
+
+class Graph:
+    """
+    A unit of work: inserts of new related objects by one Composite Graph request (a transaction)
+
+    The objects are inserted after the end of the "with" block, parents before children.
+    A foreign key to an unsaved object in the graph is sent as a reference "@{refId.id}".
+    The new Ids are assigned to the objects. No signals are sent, like by bulk_create().
+
+    Example:
+        with salesforce.graph('salesforce') as g:
+            account = g.add(Account(Name='a'))
+            g.add(Contact(LastName='b', account=account))
+    """
+    max_nodes = 500
+
+    def __init__(self, using: Optional[str] = None) -> None:
+        self.using = using
+        self.objs = []  # type: List[models.Model]
+
+    def __enter__(self) -> 'Graph':
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_type is None:
+            self.execute()
+
+    def add(self, obj: models.Model) -> models.Model:
+        if obj.pk is not None or not obj._state.adding:  # pylint:disable=protected-access
+            raise NotSupportedError("Only new objects can be added to a graph: {!r}".format(obj))
+        if all(x is not obj for x in self.objs):
+            self.objs.append(obj)
+        return obj
+
+    def execute(self) -> None:
+        """Insert the objects now"""
+        objs, self.objs = self.ordered(), []
+        if not objs:
+            return
+        if len(objs) > self.max_nodes:
+            raise NotSupportedError("A graph can contain up to {} objects, not {}".format(self.max_nodes, len(objs)))
+        using = self.using or router.db_for_write(type(objs[0]))
+        if not is_sf_database(using):
+            raise NotSupportedError("A graph can be saved only to a Salesforce database, not {!r}".format(using))
+        connections[using].ensure_connection()
+        raw_connection = connections[using].connection
+        refs = {id(obj): '{}_{}'.format(obj._meta.object_name, i) for i, obj in enumerate(objs)}
+        subrequests = []
+        for obj in objs:
+            opts = obj._meta
+            query = models.sql.InsertQuery(type(obj))
+            query.insert_values(opts.concrete_fields, [obj])
+            record = extract_insert_values(query)[0]
+            CursorWrapper.our_fix_default(record)
+            for field, parent in self.parents(obj):
+                if id(parent) in refs and not getattr(field, 'sf_read_only', 0) & NOT_CREATEABLE:
+                    record[field.column] = '@{%s.id}' % refs[id(parent)]
+                elif parent.pk is None:
+                    raise ValueError("The related object {!r} of {!r} is not saved and not in the graph"
+                                     .format(parent, obj))
+            subrequests.append({'method': 'POST', 'referenceId': refs[id(obj)], 'body': record,
+                                'url': raw_connection.rest_api_url('sobjects', opts.db_table, relative=True)})
+        [results] = raw_connection.graph_request([{'graphId': 'graph_0', 'compositeRequest': subrequests}])
+        query_cache.invalidate_after_write({obj._meta.db_table for obj in objs})
+        for obj in objs:
+            obj.pk = results[refs[id(obj)]]['body']['id']
+            obj._state.adding = False  # pylint:disable=protected-access
+            obj._state.db = using  # pylint:disable=protected-access
+        for obj in objs:
+            for field, parent in self.parents(obj):
+                setattr(obj, field.attname, parent.pk)
+
+    def ordered(self) -> List[models.Model]:
+        """The objects ordered topologically, parents before children"""
+        in_graph = {id(obj) for obj in self.objs}
+        ret = []  # type: List[models.Model]
+        done, visiting = set(), set()  # type: Tuple[Set[int], Set[int]]
+
+        def visit(obj: models.Model) -> None:
+            if id(obj) in done:
+                return
+            if id(obj) in visiting:
+                raise NotSupportedError("Cyclic references between new objects in a graph: {!r}".format(obj))
+            visiting.add(id(obj))
+            for _, parent in self.parents(obj):
+                if id(parent) in in_graph:
+                    visit(parent)
+            visiting.discard(id(obj))
+            done.add(id(obj))
+            ret.append(obj)
+
+        for obj in self.objs:
+            visit(obj)
+        return ret
+
+    @staticmethod
+    def parents(obj: models.Model) -> List[Tuple[Any, models.Model]]:
+        """Cached related objects of foreign keys: [(field, parent), ...]"""
+        return [(field, field.get_cached_value(obj)) for field in obj._meta.concrete_fields
+                if field.many_to_one and field.is_cached(obj) and field.get_cached_value(obj) is not None]
+
+
+def graph(using: Optional[str] = None) -> Graph:
+    return Graph(using)
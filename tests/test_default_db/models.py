@@ -14,6 +14,8 @@ def now_aware_or_naive():
 
 class Account(models_extend.SalesforceModel):
     name = models.CharField(max_length=255)
+    system_modstamp = models.DateTimeField(db_column='SystemModstamp', sf_read_only=models.READ_ONLY, null=True)
+    is_deleted = models.BooleanField(db_column='IsDeleted', sf_read_only=models.READ_ONLY, default=False)
 
 
 class Contact(models_extend.SalesforceModel):
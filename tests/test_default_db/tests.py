@@ -5,6 +5,7 @@ from django.conf import settings
 from django.test import TestCase
 
 from salesforce import defaults
+from salesforce.sync import sync_model
 from .models import Account, Contact, TryDefaults
 
 
@@ -105,6 +106,25 @@ class DefaultDbTest(TestCase):
         obj.delete()
         account.delete()
 
+    def test_sync(self):
+        """Test incremental sync from salesforce to the default db, including a delete"""
+        account = Account(name='sf_test account sync')
+        account.save(using='salesforce')
+        try:
+            stats = sync_model(Account)
+            self.assertGreaterEqual(stats.created, 1)
+            self.assertEqual(Account.objects.using('default').get(pk=account.pk).name, 'sf_test account sync')
+            account.name = 'sf_test account sync 2'
+            account.save(using='salesforce')
+            stats = sync_model(Account)
+            self.assertGreaterEqual(stats.updated, 1)
+            self.assertEqual(Account.objects.using('default').get(pk=account.pk).name, 'sf_test account sync 2')
+        finally:
+            account.delete(using='salesforce')
+        stats = sync_model(Account)
+        self.assertGreaterEqual(stats.deleted, 1)
+        self.assertFalse(Account.objects.using('default').filter(pk=account.pk).exists())
+
 
 class DefaultsTest(TestCase):
     def test_datetime_defaults(self) -> None:
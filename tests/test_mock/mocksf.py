@@ -181,7 +181,9 @@ class MockRequest:
                  req: Union[str, Dict[str, Any], None] = None, resp: Optional[str] = None,
                  request_json: Any = None,
                  request_type: Optional[str] = None, response_type: Optional[str] = None,
-                 status_code: int = 200, check_request: bool = True) -> None:
+                 status_code: int = 200, check_request: bool = True,
+                 response_headers: Optional[Dict[str, str]] = None,
+                 request_headers: Optional[Dict[str, str]] = None) -> None:
         method, url = method_url.split(' ', 1)
         self.method = method
         self.url = url
@@ -192,6 +194,8 @@ class MockRequest:
         self.response_type = response_type
         self.status_code = status_code
         self.check_request = check_request
+        self.response_headers = response_headers or {}
+        self.request_headers = request_headers
 
     def request(self, method: str, url: str, data: Optional[str] = None, json: Any = None,
                 testcase: Optional[SimpleTestCase] = None, **kwargs: Any) -> 'MockResponse':
@@ -218,7 +222,8 @@ class MockRequest:
             request_type = kwargs['headers'].pop('Content-Type', '') or request_type
         response = response_class(self.response_data,
                                   status_code=self.status_code,
-                                  resp_content_type=self.response_type)
+                                  resp_content_type=self.response_type,
+                                  resp_headers=self.response_headers)
         response.request = RequestHint(method, url, body=data, headers={'content-type': request_type})
         if not self.check_request:
             return response
@@ -238,6 +243,8 @@ class MockRequest:
             testcase.assertEqual(request_type.split(';')[0], self.request_type.split(';')[0], msg=msg)
         kwargs.pop('timeout', None)
         assert kwargs.pop('verify', True) is True  # TLS verify must not be False
+        if self.request_headers is not None:
+            testcase.assertEqual(kwargs.pop('headers', {}), self.request_headers, msg=msg)
         if 'headers' in kwargs and not kwargs['headers']:
             del kwargs['headers']
         if kwargs:
@@ -328,18 +335,22 @@ class MockResponse:
     default_type = None  # type: Optional[str]
     request = None  # type: RequestHint
 
-    def __init__(self, text: Optional[str], resp_content_type: Optional[str] = None, status_code: int = 200) -> None:
+    def __init__(self, text: Optional[str], resp_content_type: Optional[str] = None, status_code: int = 200,
+                 resp_headers: Optional[Dict[str, str]] = None) -> None:
         self.text = text
         self.status_code = status_code
         self.content_type = resp_content_type if resp_content_type is not None else self.default_type
+        self.resp_headers = resp_headers or {}
 
-    def json(self, parse_float: Optional[Callable[[str], Any]] = None) -> Any:
+    def json(self, parse_float: Optional[Callable[[str], Any]] = None, **kwargs: Any) -> Any:
         assert self.text
-        return json_mod.loads(self.text.replace('...', ''), parse_float=parse_float)
+        return json_mod.loads(self.text.replace('...', ''), parse_float=parse_float, **kwargs)
 
     @property
     def headers(self) -> Dict[str, str]:
-        return {'Content-Type': self.content_type} if self.content_type else {}
+        headers = {'Content-Type': self.content_type} if self.content_type else {}
+        headers.update(self.resp_headers)
+        return headers
 
 
 class MockJsonResponse(MockResponse):
@@ -0,0 +1,134 @@
+"""
+Tests of the asyncio driver with a fake httpx transport (no network)
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import IsolatedAsyncioTestCase, mock, skipUnless
+
+from django.db import NotSupportedError as DbNotSupportedError
+
+from salesforce.auth import MockAuth
+from salesforce.backend import query_cache
+from salesforce.dbapi import async_driver
+from salesforce.dbapi.async_driver import AsyncConnection, httpx
+from salesforce.dbapi.exceptions import SalesforceError
+from salesforce.testrunner.example.models import Contact
+
+Handler = Callable[[Any], Tuple[int, Any]]
+
+
+class TokenMockAuth(MockAuth):
+    """Mock auth with a token that can be renewed"""
+    token = 'old'
+
+    def authenticate(self) -> Dict[str, str]:
+        return {'instance_url': 'https://mock.example.com', 'access_token': self.token}
+
+    def reauthenticate(self) -> str:
+        TokenMockAuth.token = 'new'
+        return self.token
+
+
+@skipUnless(httpx, "the package 'httpx' is required")
+class AsyncDriverTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.requests = []  # type: List[Any]
+        TokenMockAuth.token = 'old'
+
+    def connect(self, responses: List[Handler], alias: str = 'salesforce') -> AsyncConnection:
+        """Create a connection that answers by a list of handlers (one for every request)"""
+        def handler(request: Any) -> Any:
+            self.requests.append(request)
+            status, data = responses.pop(0)(request)
+            return httpx.Response(status, json=data, headers={'Sforce-Limit-Info': 'api-usage=10/5000'})
+
+        settings_dict = {'AUTH': 'tests.test_mock.test_async.TokenMockAuth', 'API_VERSION': '52.0'}
+        conn = AsyncConnection(settings_dict, alias=alias, _transport=httpx.MockTransport(handler))
+        async_driver.loop_connections.setdefault(asyncio.get_running_loop(), {})[alias] = conn
+        self.addAsyncCleanup(conn.close)
+        return conn
+
+    async def test_query_more(self) -> None:
+        records_1 = [{'attributes': {'type': 'Contact'}, 'Id': '003A', 'LastName': 'a'}]
+        records_2 = [{'attributes': {'type': 'Contact'}, 'Id': '003B', 'LastName': 'b'}]
+        conn = self.connect([
+            lambda req: (200, {'totalSize': 2, 'done': False, 'records': records_1,
+                               'nextRecordsUrl': '/services/data/v52.0/query/01gX-1'}),
+            lambda req: (200, {'totalSize': 2, 'done': True, 'records': records_2}),
+        ])
+        cursor = conn.cursor()
+        await cursor.execute("SELECT Contact.Id, Contact.LastName FROM Contact WHERE Contact.LastName > %s", ['a'])
+        self.assertEqual(await cursor.fetchall(), [('003A', 'a'), ('003B', 'b')])
+        self.assertEqual(cursor.rowcount, 2)
+        self.assertEqual(self.requests[0].url.params['q'],
+                         "SELECT Contact.Id, Contact.LastName FROM Contact WHERE Contact.LastName > 'a'")
+        self.assertEqual(str(self.requests[1].url), 'https://mock.example.com/services/data/v52.0/query/01gX-1')
+        self.assertEqual(conn.api_usage.api_usage, 10)
+
+    async def test_reauthenticate(self) -> None:
+        conn = self.connect([
+            lambda req: (401, [{'errorCode': 'INVALID_SESSION_ID', 'message': 'Session expired'}]),
+            lambda req: (200, {'totalSize': 0, 'done': True, 'records': []}),
+        ])
+        cursor = conn.cursor()
+        await cursor.execute("SELECT Contact.Id FROM Contact")
+        self.assertEqual(await cursor.fetchall(), [])
+        self.assertEqual([x.headers['Authorization'] for x in self.requests], ['OAuth old', 'OAuth new'])
+
+    async def test_collections_error(self) -> None:
+        conn = self.connect([
+            lambda req: (200, [{'success': True, 'id': '001A', 'errors': []},
+                               {'success': False, 'errors': [{'statusCode': 'REQUIRED_FIELD_MISSING',
+                                                              'message': 'Required fields are missing: [Name]',
+                                                              'fields': ['Name']}]}]),
+        ])
+        with self.assertRaises(SalesforceError) as cm:
+            await conn.sobject_collections_request(
+                'POST', [{'type_': 'Account', 'Name': 'a'}, {'type_': 'Account'}], all_or_none=False)
+        self.assertIn('REQUIRED_FIELD_MISSING', str(cm.exception))
+        self.assertEqual(json.loads(self.requests[0].content)['records'][0]['attributes'], {'type': 'Account'})
+
+    async def test_http_error(self) -> None:
+        conn = self.connect([
+            lambda req: (400, [{'errorCode': 'MALFORMED_QUERY', 'message': 'unexpected token'}]),
+        ])
+        with self.assertRaises(SalesforceError) as cm:
+            await conn.cursor().execute("SELECT Contact.Id FROM Contact")
+        self.assertIn('MALFORMED_QUERY', str(cm.exception))
+
+    async def test_queryset(self) -> None:
+        record = {'attributes': {'type': 'Contact'}, 'Id': '003A', 'FirstName': 'a', 'LastName': 'b'}
+        self.connect([
+            lambda req: (200, {'totalSize': 1, 'done': True, 'records': [record]}),
+            lambda req: (200, {'totalSize': 3, 'done': True, 'records': []}),
+            lambda req: (201, {'id': '003C', 'success': True, 'errors': []}),
+        ])
+        qs = Contact.objects.filter(last_name='b').only('first_name', 'last_name')
+        contact = await qs.aget()
+        self.assertEqual((contact.pk, contact.first_name, contact._state.db), ('003A', 'a', 'salesforce'))
+        self.assertEqual(await qs.acount(), 3)
+        self.assertTrue(self.requests[1].url.params['q'].startswith('SELECT COUNT() FROM Contact WHERE '))
+        new_contact = Contact(last_name='c')
+        with mock.patch.object(query_cache, 'invalidate_after_write') as invalidate_after_write:
+            await Contact.objects.abulk_create([new_contact])
+        invalidate_after_write.assert_called_once_with(['Contact'])
+        self.assertEqual(new_contact.pk, '003C')
+        self.assertEqual(json.loads(self.requests[2].content)['LastName'], 'c')
+
+    async def test_sync_only_options(self) -> None:
+        self.connect([])
+        qs = Contact.objects.filter(last_name='b')
+        self.assertTrue(qs._is_async_native())
+        for sync_qs in (qs.sf(cache_ttl=300), qs.sf(bulk_query=True), qs.sf_parallel(partitions=2)):
+            self.assertFalse(sync_qs._is_async_native())
+        self.assertEqual(self.requests, [])
+
+    async def test_bulk_create_unsupported(self) -> None:
+        self.connect([])
+        with self.assertRaises(DbNotSupportedError):
+            await Contact.objects.abulk_create([Contact(last_name='c')], ignore_conflicts=True)
+        with self.assertRaises(DbNotSupportedError):
+            await Contact.objects.abulk_create([Contact(last_name='c')], update_conflicts=True,
+                                               unique_fields=['last_name'])
+        self.assertEqual(self.requests, [])
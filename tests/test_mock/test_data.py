@@ -1,12 +1,52 @@
-from django.db import connections
+from typing import Any, List
+import datetime
+import json
+import os
+import tempfile
+from unittest import skipUnless
 
-from salesforce.dbapi.exceptions import SalesforceError
+import pytz
+
+from django.db import connections, NotSupportedError as DbNotSupportedError
+from django.db.models import Prefetch
+from django.db.models.functions import Lower
+from django.db.models.lookups import In
+from django.db.models.signals import pre_delete
+from django.test import override_settings
+
+import salesforce
+from salesforce.backend import query_cache, DJANGO_40_PLUS, DJANGO_50_PLUS
+from salesforce.dbapi.bulk import bulk_ingest
+from salesforce.dbapi.exceptions import (InterfaceError, NotSupportedError, OperationalError, SalesforceError,
+                                         SalesforceWarning)
+from salesforce.dbapi.export import Exporter, split_soql
+from salesforce.management.commands.sf_export import Command
+from salesforce.streaming import (CacheInvalidationHandler, FileReplayStore, StreamingClient, event_values,
+                                  sobject_changed)
+from salesforce.sync import changed_rows
+from salesforce.backend.query_cache import get_cache
+from salesforce.dbapi.governor import RateGovernor, low_priority
+from salesforce.testrunner.example.models import Account, Contact, Opportunity, OpportunityContactRole, User
 from tests.test_mock.mocksf import MockJsonRequest, MockRequest, MockTestCase
 from tests.test_mock.mocksf import mock  # NOQA pylint:disable=unused-import
 
 # :%s@mock://@mock://@
 
 
+class CachedUser(User):
+    class Meta:
+        proxy = True
+        app_label = 'example'
+        sf_cache_ttl = 300
+
+
+class OrderedContact(Contact):
+    class Meta:
+        proxy = True
+        app_label = 'example'
+        ordering = ['last_name']
+
+
 class MockTest(MockTestCase):
     api_version = '20.0'
 
@@ -190,6 +230,837 @@ class SObjectCollectionsTest(MockTestCase):
         #    ret = self.cursor.db.connection.sobject_collections_request('POST', data, all_or_none=True)
 
 
+class ParallelWriteTest(MockTestCase):
+    """Writes by more sObject Collections requests (run by one thread for deterministic order of requests)"""
+    api_version = '42.0'
+    url = 'mock:///services/data/v42.0/composite/sobjects'
+    error = '{"success": false, "errors": [{"statusCode": "DUPLICATES_DETECTED", "message": "x", "fields": []}]}'
+
+    def patch_request(self, pks: List[str], all_or_none: Any, resp: Any = None) -> MockJsonRequest:
+        records = [{'attributes': {'type': 'Contact'}, 'id': pk, 'LastName': 'x'} for pk in pks]
+        if resp is None:
+            resp = json.dumps([{'id': pk, 'success': True, 'errors': []} for pk in pks])
+        return MockJsonRequest('PATCH ' + self.url, req=json.dumps({'records': records, 'allOrNone': all_or_none}),
+                               resp=resp)
+
+    @override_settings(SF_PARALLEL_MAX_WORKERS=1)
+    def test_update_chunks(self) -> None:
+        pks = ['003%015d' % i for i in range(250)]
+        self.mock_add_expected([self.patch_request(pks[:200], None), self.patch_request(pks[200:], None)])
+        self.assertEqual(Contact.objects.filter(pk__in=pks).update(last_name='x'), 250)
+
+    @override_settings(SF_PARALLEL_MAX_WORKERS=1)
+    def test_bulk_create_chunks(self) -> None:
+        pks = ['003%015d' % i for i in range(250)]
+
+        def post_request(pks: List[str]) -> MockJsonRequest:
+            records = [{'attributes': {'type': 'Contact'}, 'LastName': 'x'} for pk in pks]
+            return MockJsonRequest('POST ' + self.url, req=json.dumps({'records': records, 'allOrNone': None}),
+                                   resp=json.dumps([{'id': pk, 'success': True, 'errors': []} for pk in pks]))
+
+        self.mock_add_expected([post_request(pks[:200]), post_request(pks[200:])])
+        contacts = [Contact(last_name='x') for _ in pks]
+        connection_class = type(self.sf_connection)
+        with mock.patch.object(connection_class, 'sobject_collections_parallel', autospec=True,
+                               side_effect=connection_class.sobject_collections_parallel) as mocked:
+            Contact.objects.bulk_create(contacts)
+        mocked.assert_called_once()
+        self.assertEqual([x.pk for x in contacts], pks)
+        self.assertEqual({x._state.db for x in contacts}, {'salesforce'})
+
+    @override_settings(SF_PARALLEL_MAX_WORKERS=1)
+    def test_bulk_update_stop_after_error(self) -> None:
+        contacts = [Contact(pk='003%015d' % i, last_name='x') for i in range(3)]
+        for obj in contacts:
+            obj._state.db = 'salesforce'
+        # the next chunk is not started after an error
+        self.mock_add_expected(self.patch_request(['003%015d' % i for i in range(2)], True,
+                                                  resp='[%s, %s]' % (self.error, self.error)))
+        with self.assertRaises(SalesforceError) as cm:
+            Contact.objects.bulk_update(contacts, ['last_name'], batch_size=2, all_or_none=True)
+        self.assertIn('DUPLICATES_DETECTED', cm.exception.args[0])
+        # all chunks are tried with all_or_none=False, the first error is raised
+        self.mock_add_expected([
+            self.patch_request(['003%015d' % i for i in range(2)], False,
+                               resp='[%s, {"id": "003000000000000001", "success": true, "errors": []}]' % self.error),
+            self.patch_request(['003000000000000002'], False),
+        ])
+        with self.assertRaises(SalesforceError):
+            Contact.objects.bulk_update(contacts, ['last_name'], batch_size=2, all_or_none=False)
+
+
+class QueryPrefetchTest(MockTestCase):
+    """Read ahead of the next chunks by a background thread"""
+    api_version = '42.0'
+
+    def test_prefetch_chunks(self) -> None:
+        for i in range(3):
+            url = 'query/?q=SELECT+Contact.Id+FROM+Contact' if i == 0 else 'query/01gD-%d' % i
+            next_url = '"nextRecordsUrl": "/services/data/v42.0/query/01gD-%d", ' % (i + 1) if i < 2 else ''
+            self.mock_add_expected(MockJsonRequest(
+                'GET mock:///services/data/v42.0/' + url,
+                resp=('{"totalSize": 3, "done": %s, %s"records": [{'
+                      '"attributes": {"type": "Contact"}, "Id": "003D%d"}]}' % (
+                          'false' if next_url else 'true', next_url, i))
+            ))
+        with connections['salesforce'].cursor() as cursor:
+            cursor.cursor.execute("SELECT Contact.Id FROM Contact", prefetch_chunks=1)
+            self.assertEqual(cursor.fetchall(), [('003D0',), ('003D1',), ('003D2',)])
+            self.assertIsNotNone(cursor.cursor._prefetcher)
+
+    def test_prefetch_error(self) -> None:
+        self.mock_add_expected([
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact',
+                resp=('{"totalSize": 2, "done": false, "nextRecordsUrl": "/services/data/v42.0/query/01gD-1", '
+                      '"records": [{"attributes": {"type": "Contact"}, "Id": "003D0"}]}')),
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/01gD-1', status_code=400,
+                resp='[{"message": "invalid query locator", "errorCode": "INVALID_QUERY_LOCATOR"}]'),
+        ])
+        with connections['salesforce'].cursor() as cursor:
+            cursor.cursor.execute("SELECT Contact.Id FROM Contact", prefetch_chunks=2)
+            self.assertEqual(cursor.fetchone(), ('003D0',))
+            with self.assertRaises(SalesforceError) as cm:
+                cursor.fetchone()
+            self.assertIn('INVALID_QUERY_LOCATOR', str(cm.exception))
+
+
+class ChildSubqueryPrefetchTest(MockTestCase):
+    """prefetch_related() of reverse foreign keys by parent-to-child subqueries"""
+    api_version = '42.0'
+
+    def setUp(self) -> None:
+        super().setUp()
+        connections['salesforce'].introspection._table_description_cache.clear()
+
+    def test_prefetch_related(self) -> None:
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "LastName": "%s"}'
+        self.mock_add_expected([
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/sobjects/Account/describe/',
+                resp='{"fields": [{"name": "Id", "type": "id"}], "childRelationships": ['
+                     '{"childSObject": "Contact", "field": "AccountId", "relationshipName": "Contacts"}]}'),
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/?q=SELECT+Account.Id%2C+Account.Name%2C+'
+                '%28SELECT+Id%2C+LastName+FROM+Contacts+ORDER+BY+LastName+ASC%29+FROM+Account',
+                resp='{"totalSize": 2, "done": true, "records": ['
+                     '{"attributes": {"type": "Account"}, "Id": "001A", "Name": "a", "Contacts": '
+                     '{"totalSize": 3, "done": false, "nextRecordsUrl": "/services/data/v42.0/query/01gA-2", '
+                     '"records": [%s, %s]}}, '
+                     '{"attributes": {"type": "Account"}, "Id": "001B", "Name": "b", "Contacts": null}]}' % (
+                         rec % ('003A', 'x'), rec % ('003B', 'y'))),
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/01gA-2',
+                resp='{"totalSize": 3, "done": true, "records": [%s]}' % (rec % ('003C', 'z'))),
+        ])
+        qs = Account.objects.only('Name').prefetch_related(
+            Prefetch('contact_set', queryset=Contact.objects.order_by('last_name').only('last_name')))
+        accounts = list(qs)
+        self.assertEqual([x.Name for x in accounts], ['a', 'b'])
+        contacts = list(accounts[0].contact_set.all())  # no request
+        self.assertEqual([x.last_name for x in contacts], ['x', 'y', 'z'])
+        self.assertIs(contacts[0].account, accounts[0])
+        self.assertEqual(list(accounts[1].contact_set.all()), [])
+
+
+class SelectRelatedTest(MockTestCase):
+    """Multi-level select_related() by one query"""
+    api_version = '42.0'
+
+    def test_select_related_levels(self) -> None:
+        rec = ('{"attributes": {"type": "OpportunityContactRole"}, "Id": "%s", "ContactId": "003A", '
+               '"Contact": {"attributes": {"type": "Contact"}, "Id": "003A", "AccountId": %s, "Account": %s}}')
+        account = ('{"attributes": {"type": "Account"}, "Id": "001A", "OwnerId": "005A", "Owner": '
+                   '{"attributes": {"type": "User"}, "Id": "005A", "Username": "u@example.com"}}')
+        self.mock_add_expected(MockJsonRequest(
+            'GET mock:///services/data/v42.0/query/?q=SELECT+OpportunityContactRole.Id%2C+'
+            'OpportunityContactRole.ContactId%2C+OpportunityContactRole.Contact.Id%2C+'
+            'OpportunityContactRole.Contact.AccountId%2C+OpportunityContactRole.Contact.Account.Id%2C+'
+            'OpportunityContactRole.Contact.Account.OwnerId%2C+OpportunityContactRole.Contact.Account.Owner.Id%2C+'
+            'OpportunityContactRole.Contact.Account.Owner.Username+FROM+OpportunityContactRole',
+            resp='{"totalSize": 2, "done": true, "records": [%s, %s]}' % (
+                rec % ('00KA', '"001A"', account), rec % ('00KB', 'null', 'null'))))
+        qs = (OpportunityContactRole.objects.select_related('contact__account__Owner')
+              .only('contact__account__Owner__Username'))
+        roles = list(qs)  # an unexpected next request would fail in the mock
+        self.assertEqual(roles[0].contact.account.Owner.Username, 'u@example.com')
+        self.assertIsNone(roles[1].contact.account)
+
+
+class QueryBatchSizeTest(MockTestCase):
+    """The chunk size of .iterator() is requested by 'Sforce-Query-Options' header"""
+    api_version = '42.0'
+
+    def test_iterator_batch_size(self) -> None:
+        headers = {'Sforce-Query-Options': 'batchSize=200'}  # the minimal batch size
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s"}'
+        self.mock_add_expected([
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact', request_headers=headers,
+                resp=('{"totalSize": 3, "done": false, "nextRecordsUrl": "/services/data/v42.0/query/01gD-2", '
+                      '"records": [%s, %s]}' % (rec % '003D0', rec % '003D1'))),
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/01gD-2', request_headers=headers,
+                resp='{"totalSize": 3, "done": true, "records": [%s]}' % (rec % '003D2')),
+        ])
+        iterator = Contact.objects.only('pk').iterator(chunk_size=2)
+        self.assertEqual(next(iterator).pk, '003D0')
+        self.assertEqual([x.pk for x in iterator], ['003D1', '003D2'])
+
+    def test_no_batch_size(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact', request_headers={},
+            resp='{"totalSize": 0, "done": true, "records": []}'))
+        self.assertEqual(list(Contact.objects.only('pk')), [])
+
+
+class ColumnarFetchTest(MockTestCase):
+    """Columns decoded from JSON records of more chunks"""
+    api_version = '42.0'
+
+    def test_fetch_columns(self) -> None:
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "LastModifiedDate": %s}'
+        self.mock_add_expected([
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id%2C+Contact.LastModifiedDate+FROM+Contact',
+                resp=('{"totalSize": 3, "done": false, "nextRecordsUrl": "/services/data/v42.0/query/01gD-2", '
+                      '"records": [%s, %s]}' % (rec % ('003D0', 'null'),
+                                                rec % ('003D1', '"2024-01-02T03:04:05.000+0000"')))),
+            MockJsonRequest('GET mock:///services/data/v42.0/query/01gD-2',
+                            resp='{"totalSize": 3, "done": true, "records": [%s]}' % (rec % ('003D2', 'null'))),
+        ])
+        with connections['salesforce'].cursor() as cursor:
+            cursor.cursor.execute("SELECT Contact.Id, Contact.LastModifiedDate FROM Contact")
+            self.assertEqual(cursor.fetchone(), ('003D0', None))
+            self.assertEqual(cursor.cursor.fetch_columns(), {
+                'Id': ['003D1', '003D2'],
+                'LastModifiedDate': [datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=pytz.utc), None]})
+            self.assertEqual(cursor.cursor.rownumber, 3)
+            self.assertEqual(list(cursor.cursor.iter_batches(2)), [])
+            with self.assertRaises(InterfaceError):
+                cursor.cursor.fetch_columns(output='pandas')
+
+    def test_iter_batches_aggregation(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            'GET mock:///services/data/v42.0/query/?q=SELECT+MAX%28Contact.LastName%29+m+FROM+Contact',
+            resp='{"totalSize": 1, "done": true, "records": [{"attributes": {"type": "AggregateResult"}, "m": "z"}]}'))
+        with connections['salesforce'].cursor() as cursor:
+            cursor.cursor.execute("SELECT MAX(Contact.LastName) m FROM Contact")
+            self.assertEqual(list(cursor.cursor.iter_batches()), [{'m': ['z']}])
+
+
+class ExportTest(MockTestCase):
+    """Export to partitioned CSV files in the current thread and resume from a checkpoint"""
+    api_version = '42.0'
+    url = 'GET mock:///services/data/v42.0/query/?q=SELECT+Id%2C+LastName+FROM+Contact+WHERE+'
+    resp = '{"totalSize": %d, "done": true, "records": [%s]}'
+    last_cond = '%28Id+%3E%3D+%27003000000000005AAA%27+OR+Id+%3D+null%29'
+    headers = {'Sforce-Query-Options': 'batchSize=2000'}
+    rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "LastName": "%s"}'
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint:disable=consider-using-with
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def read(self, name: str) -> str:
+        with open(os.path.join(self.tmp_dir.name, name), newline='', encoding='utf-8') as f:
+            return f.read()
+
+    def test_export(self) -> None:
+        url_id = 'GET mock:///services/data/v42.0/query/?q=SELECT+Id+FROM+Contact+WHERE+Id+%21%3D+null+ORDER+BY+Id+'
+        self.mock_add_expected([
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/sobjects/Contact/describe/',
+                resp='{"name": "Contact", "fields": [{"name": "Id", "type": "id"}, '
+                     '{"name": "LastName", "type": "string"}, {"name": "MailingAddress", "type": "address"}]}'),
+            MockJsonRequest(url_id + 'ASC+LIMIT+1', resp=self.resp % (1, self.rec % ('003000000000001AAA', 'a'))),
+            MockJsonRequest(url_id + 'DESC+LIMIT+1', resp=self.resp % (1, self.rec % ('003000000000009AAA', 'c'))),
+            MockJsonRequest(self.url + 'Id+%3C+%27003000000000005AAA%27', request_headers=self.headers,
+                            resp=self.resp % (1, self.rec % ('003000000000001AAA', 'a'))),
+            MockJsonRequest(self.url + self.last_cond, request_headers=self.headers,
+                            resp=self.resp % (2, ', '.join((self.rec % ('003000000000009AAA', 'c'),
+                                                            self.rec % ('00300000000000AAAA', 'x,y'))))),
+        ])
+        stats = Exporter('salesforce', 'SELECT Id, LastName FROM Contact', output_dir=self.tmp_dir.name,
+                         partitions=2, workers=0).run()
+        self.assertEqual((stats.rows, stats.partitions, stats.skipped, stats.requests), (3, 2, 0, 5))
+        self.assertEqual(self.read('Contact-0000.csv'), 'Id,LastName\r\n003000000000001AAA,a\r\n')
+        self.assertEqual(self.read('Contact-0001.csv'),
+                         'Id,LastName\r\n003000000000009AAA,c\r\n00300000000000AAAA,"x,y"\r\n')
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ['Contact-0000.csv', 'Contact-0001.csv'])
+
+    def test_model_query(self) -> None:
+        [(soql, types)] = Command.get_queries(None, ['example.OrderedContact'], None)
+        self.assertTrue(soql.startswith('SELECT Contact.Id, Contact.AccountId, Contact.LastName, '), soql)
+        self.assertEqual(split_soql(soql), (soql, 'Contact', ''))  # without ORDER BY of Meta.ordering
+        self.assertIsNone(types)
+
+    def test_resume(self) -> None:
+        soql = 'SELECT Id, LastName FROM Contact'
+        exporter = Exporter('salesforce', soql, output_dir=self.tmp_dir.name, workers=0)
+        exporter.save_checkpoint({
+            'version': 1, 'soql': soql, 'format': 'csv', 'key': 'Id', 'types': {},
+            'partitions': [soql + " WHERE Id < '003000000000005AAA'",
+                           soql + " WHERE (Id >= '003000000000005AAA' OR Id = null)"],
+            'completed': {'0': 7}})
+        self.mock_add_expected(
+            MockJsonRequest(self.url + self.last_cond, request_headers=self.headers,
+                            resp=self.resp % (1, self.rec % ('003000000000009AAA', 'c'))))
+        stats = exporter.run()
+        self.assertEqual((stats.rows, stats.skipped, stats.requests), (8, 1, 1))
+        self.assertFalse(os.path.exists(exporter.checkpoint_path))
+        with self.assertRaises(InterfaceError):
+            exporter.save_checkpoint({'version': 1, 'soql': soql, 'format': 'parquet', 'key': 'Id'})
+            exporter.run()
+
+
+class SyncQueryTest(MockTestCase):
+    """Query of rows changed since the high-water mark"""
+    api_version = '42.0'
+
+    def test_changed_rows(self) -> None:
+        mark = datetime.datetime(2024, 1, 2, tzinfo=pytz.utc)
+        qs = changed_rows(Account, 'salesforce', mark)
+        sql, params = qs.query.get_compiler('salesforce').as_sql()
+        self.assertTrue(sql.endswith(' FROM Account WHERE Account.LastModifiedDate >= %s '
+                                     'ORDER BY Account.LastModifiedDate ASC, Account.Id ASC'))
+        self.assertEqual(params, (mark,))
+        # no 'IsDeleted' field, deleted rows can not be recognized
+        self.assertFalse(qs.query.sf_params.query_all)
+        self.assertNotIn('WHERE', changed_rows(Account).query.get_compiler('salesforce').as_sql()[0])
+        with self.assertRaises(NotSupportedError):
+            changed_rows(Contact, 'salesforce', mark)
+
+
+class StreamingTest(MockTestCase):
+    """CometD client by a stand-in endpoint, replay ids and reconnect"""
+    api_version = '42.0'
+    url = 'POST mock:///cometd/42.0'
+    handshake = MockJsonRequest(
+        url, req=[{"channel": "/meta/handshake", "version": "1.0", "supportedConnectionTypes": ["long-polling"],
+                   "ext": {"replay": True}}],
+        resp='[{"channel": "/meta/handshake", "successful": true, "clientId": "c1"}]')
+    connect_req = [{"channel": "/meta/connect", "clientId": "c1", "connectionType": "long-polling"}]
+    event = {"channel": "/data/ContactChangeEvent", "data": {
+        "schema": "s1", "event": {"replayId": 5},
+        "payload": {"ChangeEventHeader": {"entityName": "Contact", "changeType": "UPDATE",
+                                          "recordIds": ["003A"], "nulledFields": ["Email"]},
+                    "Name": {"FirstName": "a", "LastName": None}, "Email": None}}}
+
+    def subscribe(self, replay_id: int) -> MockJsonRequest:
+        channel = '/data/ContactChangeEvent'
+        return MockJsonRequest(
+            self.url, req=[{"channel": "/meta/subscribe", "clientId": "c1", "subscription": channel,
+                            "ext": {"replay": {channel: replay_id}}}],
+            resp='[{"channel": "/meta/subscribe", "successful": true, "subscription": "%s"}]' % channel)
+
+    def test_events_and_rehandshake(self) -> None:
+        self.mock_add_expected([
+            self.handshake, self.subscribe(-1),
+            MockJsonRequest(self.url, req=self.connect_req, resp=json.dumps([
+                self.event, {"channel": "/meta/connect", "successful": False, "advice": {"reconnect": "handshake"}}
+            ])),
+            self.handshake, self.subscribe(5),
+            MockJsonRequest(self.url, req=self.connect_req, resp='[{"channel": "/meta/connect", "successful": true}]'),
+        ])
+        received = []  # type: List[Any]
+        signals = []  # type: List[Any]
+
+        def receiver(sender: Any, **kwargs: Any) -> None:
+            signals.append((sender, kwargs['record_ids'], kwargs['change_type']))
+
+        sobject_changed.connect(receiver)
+        self.addCleanup(sobject_changed.disconnect, receiver)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'replay.json')
+            client = StreamingClient('salesforce', replay_store=FileReplayStore(path))
+            client.register('/data/ContactChangeEvent', received.append)
+            client.register('/data/ContactChangeEvent', CacheInvalidationHandler())
+            self.assertEqual(client.run(max_events=1), 1)
+            self.assertEqual(FileReplayStore(path).get('/data/ContactChangeEvent'), 5)
+            self.assertEqual(client.poll(), 0)
+        self.assertEqual(received, [self.event])
+        self.assertEqual(signals, [('Contact', ['003A'], 'UPDATE')])
+
+    def test_reconnect_after_error(self) -> None:
+        self.mock_add_expected([
+            self.handshake, self.subscribe(-1),
+            MockJsonRequest(self.url, req=self.connect_req, status_code=503,
+                            resp='[{"errorCode": "SERVER_UNAVAILABLE", "message": "unavailable"}]'),
+            self.handshake, self.subscribe(-1),
+            MockJsonRequest(self.url, req=self.connect_req, resp=json.dumps([self.event])),
+        ])
+        client = StreamingClient('salesforce', max_backoff=0)
+        client.register('/data/ContactChangeEvent', lambda message: None)
+        self.assertEqual(client.run(max_events=1), 1)
+        self.assertEqual(client.replay_store.get('/data/ContactChangeEvent'), 5)
+
+    def test_event_values(self) -> None:
+        payload = dict(self.event['data']['payload'], AccountId='001A', LastModifiedDate='2024-01-02T03:04:05.000Z')
+        del payload['ChangeEventHeader']
+        self.assertEqual(event_values(Contact, payload, ['Email']), {'first_name': 'a', 'account_id': '001A',
+                                                                     'email': None})
+
+
+class QueryCacheTest(MockTestCase):
+    """Read-through cache of query results invalidated by writes"""
+    api_version = '42.0'
+    url = 'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.LastName+FROM+Contact'
+    resp = '{"totalSize": 1, "done": true, "records": [{"attributes": {"type": "Contact"}, "LastName": "%s"}]}'
+
+    def setUp(self) -> None:
+        super().setUp()
+        get_cache().clear()
+
+    def test_cache_and_invalidation(self) -> None:
+        self.mock_add_expected(MockJsonRequest(self.url, resp=self.resp % 'a'))
+        qs = Contact.objects.sf(cache_ttl=60).values_list('last_name', flat=True)
+        self.assertEqual(list(qs), ['a'])
+        self.assertEqual(list(qs.all()), ['a'])  # cached, no request
+        self.mock_add_expected([
+            MockJsonRequest('PATCH mock:///services/data/v42.0/sobjects/Contact/003A', req={'LastName': 'b'},
+                            status_code=204),
+            MockJsonRequest(self.url, resp=self.resp % 'b'),
+        ])
+        Contact.objects.filter(pk='003A').update(last_name='b')
+        self.assertEqual(list(qs.all()), ['b'])
+        self.assertEqual(list(qs.all()), ['b'])
+
+    def test_change_event_and_disabled(self) -> None:
+        url = self.url.replace('SELECT+', 'SELECT+Contact.Id%2C+')
+        resp = self.resp.replace('"LastName"', '"Id": "003A", "LastName"')
+        self.mock_add_expected([MockJsonRequest(url, resp=resp % x) for x in 'abc'])
+        qs = Contact.objects.sf(cache_ttl=60)
+        self.assertEqual([x.last_name for x in qs.only('last_name')], ['a'])
+        CacheInvalidationHandler()(StreamingTest.event)
+        self.assertEqual([x.last_name for x in qs.only('last_name')], ['b'])
+        self.assertEqual([x.last_name for x in qs.sf(cache_ttl=0).only('last_name')], ['c'])
+        self.assertEqual([x.last_name for x in qs.only('last_name')], ['b'])
+
+    def test_meta_default(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            'GET mock:///services/data/v42.0/query/?q=SELECT+COUNT%28Id%29+x_sf_count+FROM+User',
+            resp='{"totalSize": 1, "done": true, "records": [{"attributes": {"type": "AggregateResult"}, '
+                 '"x_sf_count": 3}]}'))
+        self.assertEqual(CachedUser._meta.sf_cache_ttl, 300)
+        self.assertIsNone(User._meta.sf_cache_ttl)
+        self.assertEqual(CachedUser.objects.count(), 3)
+        self.assertEqual(CachedUser.objects.count(), 3)
+
+
+class ParallelQueryTest(MockTestCase):
+    """Parallel queries split by Id ranges (run by one thread for deterministic order of requests)"""
+    api_version = '42.0'
+    url = 'GET mock:///services/data/v42.0/query/?q=SELECT+Opportunity.Id%2C+Opportunity.CloseDate+FROM+Opportunity+'
+    resp = '{"totalSize": %d, "done": true, "records": [%s]}'
+    rec = '{"attributes": {"type": "Opportunity"}, "Id": "%s", "CloseDate": "%s"}'
+
+    @override_settings(SF_PARALLEL_MAX_WORKERS=1)
+    def test_sf_parallel(self) -> None:
+        url_id = 'GET mock:///services/data/v42.0/query/?q=SELECT+Opportunity.Id+FROM+Opportunity+'
+        url = self.url + 'WHERE+Opportunity.Id+{}+%27006000000000005AAA%27+ORDER+BY+Opportunity.CloseDate+ASC'
+        self.mock_add_expected([
+            MockJsonRequest(url_id + 'ORDER+BY+Opportunity.Id+ASC+LIMIT+1',
+                            resp=self.resp % (1, '{"attributes": {"type": "Opportunity"}, '
+                                                 '"Id": "006000000000001AAA"}')),
+            MockJsonRequest(url_id + 'ORDER+BY+Opportunity.Id+DESC+LIMIT+1',
+                            resp=self.resp % (1, '{"attributes": {"type": "Opportunity"}, '
+                                                 '"Id": "006000000000009AAA"}')),
+            MockJsonRequest(url.format('%3C'),
+                            resp=self.resp % (2, ', '.join((self.rec % ('006000000000001AAA', '2024-01-01'),
+                                                            self.rec % ('006000000000002AAA', '2024-01-03'))))),
+            MockJsonRequest(url.format('%3E%3D'),
+                            resp=self.resp % (1, self.rec % ('006000000000009AAA', '2024-01-02'))),
+        ])
+        qs = Opportunity.objects.order_by('close_date').only('close_date').sf_parallel(partitions=2,
+                                                                                       preserve_order=True)
+        self.assertEqual([x.close_date.day for x in qs], [1, 2, 3])
+
+    def test_text_ordering(self) -> None:
+        # the ordering of text by SOQL is preserved by one query, not by a merge
+        url = ('GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id%2C+Contact.LastName+FROM+Contact+'
+               'ORDER+BY+Contact.LastName+ASC')
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "LastName": "%s"}'
+        self.mock_add_expected(MockJsonRequest(url, resp=self.resp % (2, ', '.join((rec % ('003A', 'a'),
+                                                                                    rec % ('003B', 'B'))))))
+        qs = Contact.objects.order_by('last_name').only('last_name').sf_parallel(partitions=2, preserve_order=True)
+        with self.assertWarns(SalesforceWarning):
+            self.assertEqual([x.last_name for x in qs], ['a', 'B'])
+
+
+class InListSplitTest(MockTestCase):
+    """Long IN lists split to more queries (run by one thread for deterministic order of requests)"""
+    api_version = '42.0'
+    resp = '{"totalSize": %d, "done": true, "records": [%s]}'
+
+    @override_settings(SF_MAX_IN_LIST_SIZE=2, SF_PARALLEL_MAX_WORKERS=1)
+    def test_split_ordered(self) -> None:
+        url = ('GET mock:///services/data/v42.0/query/?q=SELECT+Opportunity.Id%2C+Opportunity.CloseDate+'
+               'FROM+Opportunity+WHERE+Opportunity.Name+IN+%28{}%29+ORDER+BY+Opportunity.CloseDate+DESC')
+        rec = '{"attributes": {"type": "Opportunity"}, "Id": "%s", "CloseDate": "%s"}'
+        self.mock_add_expected([
+            MockJsonRequest(url.format('%27a%27%2C+%27c%27'),
+                            resp=self.resp % (2, ', '.join((rec % ('006C', '2024-01-03'),
+                                                            rec % ('006A', '2024-01-01'))))),
+            MockJsonRequest(url.format('%27b%27'), resp=self.resp % (1, rec % ('006B', '2024-01-02'))),
+        ])
+        qs = Opportunity.objects.filter(name__in=['a', 'c', 'b', 'a']).order_by('-close_date').only('close_date')
+        self.assertEqual([x.pk for x in qs], ['006C', '006B', '006A'])
+
+    @override_settings(SF_MAX_IN_LIST_SIZE=2, SF_PARALLEL_MAX_WORKERS=1)
+    def test_split_text_ordering(self) -> None:
+        url = ('GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id%2C+Contact.LastName+FROM+Contact+'
+               'WHERE+Contact.LastName+IN+%28{}%29+ORDER+BY+Contact.LastName+ASC')
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "LastName": "%s"}'
+        self.mock_add_expected([
+            MockJsonRequest(url.format('%27a%27%2C+%27c%27'),
+                            resp=self.resp % (2, ', '.join((rec % ('003A', 'a'), rec % ('003C', 'c'))))),
+            MockJsonRequest(url.format('%27B%27'), resp=self.resp % (1, rec % ('003B', 'B'))),
+        ])
+        qs = Contact.objects.filter(last_name__in=['a', 'c', 'B']).order_by('last_name').only('last_name')
+        # SOQL orders text case-insensitively, therefore the results are not merged by Python
+        with self.assertWarns(SalesforceWarning):
+            self.assertEqual([x.last_name for x in qs], ['a', 'c', 'B'])
+
+
+class BulkApiTest(MockTestCase):
+    """Bulk API 2.0 ingest jobs"""
+    api_version = '42.0'
+    url = 'mock:///services/data/v42.0/jobs/ingest/'
+
+    def job_requests(self, operation: str, csv_data: str, successful: str, failed: str) -> List[MockRequest]:
+        job = '{"id": "750X", "object": "Contact", "operation": "%s", "state": "%%s"}' % operation
+        return [
+            MockJsonRequest('POST ' + self.url, {'object': 'Contact', 'operation': operation, 'contentType': 'CSV',
+                                                 'lineEnding': 'LF'}, resp=job % 'Open'),
+            MockRequest('PUT %s750X/batches/' % self.url, csv_data.encode('utf-8'), request_type='text/csv'),
+            MockJsonRequest('PATCH %s750X/' % self.url, {'state': 'UploadComplete'}, resp=job % 'UploadComplete'),
+            MockJsonRequest('GET %s750X/' % self.url, resp=job % 'JobComplete'),
+            MockRequest('GET %s750X/successfulResults/' % self.url, resp=successful, response_type='text/csv'),
+            MockRequest('GET %s750X/failedResults/' % self.url, resp=failed, response_type='text/csv'),
+        ]
+
+    def test_insert(self) -> None:
+        # results are not in the original order and a failed record is reported separately
+        self.mock_add_expected(self.job_requests(
+            'insert',
+            'LastName,FirstName\na,\nb,x\n,y\na,\n',
+            'sf__Id,sf__Created,LastName,FirstName\n003B,true,b,x\n003A,true,a,\n003C,true,a,\n',
+            'sf__Id,sf__Error,LastName,FirstName\n,REQUIRED_FIELD_MISSING:Required fields are missing: [LastName]'
+            ':LastName --,,y\n'))
+        records = [{'LastName': 'a', 'FirstName': None}, {'LastName': 'b', 'FirstName': 'x'},
+                   {'FirstName': 'y'}, {'LastName': 'a'}]
+        connections['salesforce'].ensure_connection()
+        results = bulk_ingest(connections['salesforce'].connection, 'insert', 'Contact', records)
+        self.assertEqual([x.id for x in results], ['003A', '003B', None, '003C'])
+        self.assertEqual([x.success for x in results], [True, True, False, True])
+        with self.assertRaises(SalesforceError) as cm:
+            results.raise_errors()
+        self.assertIn('REQUIRED_FIELD_MISSING', str(cm.exception))
+
+    def test_update_and_delete(self) -> None:
+        self.mock_add_expected(self.job_requests(
+            'update',
+            'LastName,Id\na,003A\n#N/A,003B\n',
+            'sf__Id,sf__Created,LastName,Id\n003B,false,#N/A,003B\n003A,false,a,003A\n',
+            'sf__Id,sf__Error,LastName,Id\n'))
+        contacts = [Contact(pk='003A', last_name='a'), Contact(pk='003B', last_name=None)]
+        for contact in contacts:
+            contact._state.db = 'salesforce'
+        Contact.objects.sf(bulk_api=True).bulk_update(contacts, ['last_name'])
+
+        url = ('GET mock:///services/data/v42.0/query/'
+               '?q=SELECT+Contact.Id+FROM+Contact+WHERE+Contact.LastName+%3D+%27a%27')
+        self.mock_add_expected(
+            [MockJsonRequest(url, resp='{"totalSize": 2, "done": true, "records": ['
+                                       '{"attributes": {"type": "Contact"}, "Id": "003A"}, '
+                                       '{"attributes": {"type": "Contact"}, "Id": "003B"}]}')]
+            + self.job_requests('delete', 'Id\n003A\n003B\n', 'sf__Id,sf__Created,Id\n003A,false,003A\n',
+                                'sf__Id,sf__Error,Id\n003B,ENTITY_IS_DELETED:entity is deleted:--,003B\n'))
+        with self.assertRaises(SalesforceError) as cm:
+            Contact.objects.filter(last_name='a').sf(bulk_api=True).delete()
+        self.assertIn('ENTITY_IS_DELETED', str(cm.exception))
+
+    @override_settings(SF_BULK_API_THRESHOLD=100)
+    def test_delete_below_threshold(self) -> None:
+        """The primary keys are queried once and the records are deleted normally"""
+        self.mock_add_expected(MockJsonRequest(
+            'GET mock:///services/data/v42.0/query/'
+            '?q=SELECT+Contact.Id+FROM+Contact+WHERE+Contact.LastName+%3D+%27a%27',
+            resp='{"totalSize": 2, "done": true, "records": ['
+                 '{"attributes": {"type": "Contact"}, "Id": "003A"}, '
+                 '{"attributes": {"type": "Contact"}, "Id": "003B"}]}'))
+        with mock.patch.object(type(self.sf_connection), 'sobject_collections_parallel',
+                               return_value=['003A', '003B']) as collections:
+            self.assertEqual(Contact.objects.filter(last_name='a').delete(), (2, {'example.Contact': 2}))
+        collections.assert_called_once_with('DELETE', ['003A', '003B'], all_or_none=None)
+
+    def test_delete_with_signals(self) -> None:
+        def receiver(**kwargs: Any) -> None:
+            pass
+
+        pre_delete.connect(receiver, sender=Contact)
+        try:
+            with self.assertRaises(DbNotSupportedError):
+                Contact.objects.filter(last_name='a').sf(bulk_api=True).delete()
+        finally:
+            pre_delete.disconnect(receiver, sender=Contact)
+
+
+class BulkQueryTest(MockTestCase):
+    """Bulk API 2.0 query jobs with results by pages of CSV"""
+    api_version = '42.0'
+    url = 'mock:///services/data/v42.0/jobs/query/'
+
+    def job_requests(self, soql: str, pages: List[str]) -> List[MockRequest]:
+        job = '{"id": "750Q", "operation": "query", "state": "%s", "numberRecordsProcessed": 3}'
+        ret = [
+            MockJsonRequest('POST ' + self.url, {'operation': 'query', 'query': soql, 'contentType': 'CSV',
+                                                 'lineEnding': 'LF'}, resp=job % 'UploadComplete'),
+            MockJsonRequest('GET %s750Q/' % self.url, resp=job % 'JobComplete'),
+        ]  # type: List[MockRequest]
+        for i, page in enumerate(pages):
+            locator = '&locator=L%d' % i if i else ''
+            next_locator = 'L%d' % (i + 1) if i + 1 < len(pages) else 'null'
+            ret.append(MockRequest('GET %s750Q/results/?maxRecords=50000%s' % (self.url, locator), resp=page,
+                                   response_type='text/csv', response_headers={'Sforce-Locator': next_locator}))
+        return ret
+
+    def test_cursor_pages(self) -> None:
+        soql = "SELECT Contact.Id, Contact.LastName, Contact.EmailBouncedDate FROM Contact"
+        self.mock_add_expected(self.job_requests(soql, [
+            'Id,LastName,EmailBouncedDate\n003A,a,2024-01-02T03:04:05.000Z\n003B,"b, c",\n',
+            'Id,LastName,EmailBouncedDate\n003C,,\n',
+        ]))
+        cursor = connections['salesforce'].cursor().cursor
+        cursor.row_type = dict
+        cursor.execute(soql, bulk=True)
+        rows = cursor.fetchall()
+        self.assertEqual(cursor.rowcount, 3)
+        self.assertEqual([x['LastName'] for x in rows], ['a', 'b, c', None])
+        self.assertEqual(rows[0]['EmailBouncedDate'], datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=pytz.utc))
+        self.assertEqual(rows[1]['EmailBouncedDate'], None)
+
+    def test_queryset(self) -> None:
+        self.mock_add_expected(self.job_requests("SELECT User.Id, User.IsActive FROM User", [
+            'Id,IsActive\n005A,true\n005B,false\n',
+        ]))
+        users = list(User.objects.sf(bulk_query=True).only('IsActive'))
+        self.assertEqual([(x.pk, x.IsActive) for x in users], [('005A', True), ('005B', False)])
+
+    def test_unsupported(self) -> None:
+        with self.assertRaises(NotSupportedError):
+            connections['salesforce'].cursor().cursor.execute("SELECT COUNT() FROM Contact", bulk=True)
+
+
+class GatherTest(MockTestCase):
+    """Independent queries by 'composite/batch' requests"""
+    api_version = '42.0'
+    url = 'POST mock:///services/data/v42.0/composite/batch'
+
+    def test_gather(self) -> None:
+        records = ('{"totalSize": 3, "done": false, "nextRecordsUrl": "/services/data/v42.0/query/01gX-2",'
+                   ' "records": [%s, %s]}' % ('{"attributes": {"type": "Contact"}, "Id": "003A"}',
+                                              '{"attributes": {"type": "Contact"}, "Id": "003B"}'))
+        self.mock_add_expected([
+            MockJsonRequest(self.url, {'batchRequests': [
+                {'method': 'GET', 'url': 'v42.0/query/?q=SELECT+Contact.Id+FROM+Contact'},
+                {'method': 'GET', 'url': 'v42.0/query/?q=SELECT+COUNT%28%29+FROM+Contact'},
+            ], 'haltOnError': False}, resp='{"hasErrors": false, "results": [%s, %s]}' % (
+                '{"statusCode": 200, "result": %s}' % records,
+                '{"statusCode": 200, "result": {"totalSize": 7, "done": true, "records": []}}')),
+            MockJsonRequest('GET mock:///services/data/v42.0/query/01gX-2', resp=(
+                '{"totalSize": 3, "done": true, "records": [{"attributes": {"type": "Contact"}, "Id": "003C"}]}')),
+        ])
+        qs = Contact.objects.only('pk')
+        contacts, count, empty = salesforce.gather(qs, salesforce.lazy_count(Contact.objects.all()),
+                                                   Contact.objects.none())
+        self.assertEqual([x.pk for x in contacts], ['003A', '003B', '003C'])
+        self.assertEqual((count, empty), (7, []))
+        self.assertIs(qs._result_cache, contacts)  # evaluated in place
+
+    def test_prefetch_related(self) -> None:
+        """Children of gathered querysets are prefetched normally, not by child subqueries"""
+        rec = '{"attributes": {"type": "Contact"}, "Id": "%s", "AccountId": "001A", "LastName": "%s"}'
+        self.mock_add_expected([
+            MockJsonRequest(self.url, {'batchRequests': [
+                {'method': 'GET', 'url': 'v42.0/query/?q=SELECT+Account.Id%2C+Account.Name+FROM+Account'},
+            ], 'haltOnError': False}, resp='{"hasErrors": false, "results": [{"statusCode": 200, "result": '
+                '{"totalSize": 1, "done": true, "records": '
+                '[{"attributes": {"type": "Account"}, "Id": "001A", "Name": "a"}]}}]}'),
+            MockJsonRequest(
+                'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id%2C+Contact.AccountId%2C+'
+                'Contact.LastName+FROM+Contact+WHERE+Contact.AccountId+IN+%28%27001A%27%29',
+                resp='{"totalSize": 2, "done": true, "records": [%s, %s]}' % (
+                    rec % ('003A', 'x'), rec % ('003B', 'y'))),
+        ])
+        qs = Account.objects.only('Name').prefetch_related(
+            Prefetch('contact_set', queryset=Contact.objects.only('account', 'last_name')))
+        [accounts] = salesforce.gather(qs)
+        self.assertEqual([x.Name for x in accounts], ['a'])
+        self.assertEqual([x.last_name for x in accounts[0].contact_set.all()], ['x', 'y'])
+
+    def test_executemany(self) -> None:
+        soql = "SELECT Contact.Id FROM Contact WHERE Contact.LastName = %s"
+        url = "v42.0/query/?q=SELECT+Contact.Id+FROM+Contact+WHERE+Contact.LastName+%3D+%27{}%27"
+        self.mock_add_expected(MockJsonRequest(self.url, {'batchRequests': [
+            {'method': 'GET', 'url': url.format('a')},
+            {'method': 'GET', 'url': url.format('b')},
+        ], 'haltOnError': False}, resp='{"hasErrors": true, "results": [%s, %s]}' % (
+            '{"statusCode": 200, "result": {"totalSize": 1, "done": true, "records": '
+            '[{"attributes": {"type": "Contact"}, "Id": "003A"}]}}',
+            '{"statusCode": 200, "result": {"totalSize": 0, "done": true, "records": []}}')))
+        cursor = connections['salesforce'].cursor().cursor
+        cursor.executemany(soql, [['a'], ['b']])
+        self.assertEqual(cursor.fetchall(), [('003A',)])
+        self.assertTrue(cursor.nextset())
+        self.assertEqual((cursor.rowcount, cursor.fetchall()), (0, []))
+        self.assertIsNone(cursor.nextset())
+
+    def test_error(self) -> None:
+        self.mock_add_expected(MockJsonRequest(self.url, {'batchRequests': [
+            {'method': 'GET', 'url': 'v42.0/query/?q=SELECT+Id+FROM+Nonexistent'},
+        ], 'haltOnError': False}, resp=(
+            '{"hasErrors": true, "results": [{"statusCode": 400, "result": '
+            '[{"errorCode": "INVALID_TYPE", "message": "sObject type is not supported"}]}]}')))
+        with self.assertRaises(SalesforceError) as cm:
+            connections['salesforce'].cursor().cursor.executemany("SELECT Id FROM Nonexistent", [[]])
+        self.assertIn('INVALID_TYPE', str(cm.exception))
+
+
+class GraphTest(MockTestCase):
+    """Inserts of related objects by a Composite Graph request"""
+    api_version = '42.0'
+
+    def test_graph(self) -> None:
+        account_body = dict.fromkeys(['BillingStreet', 'BillingCity', 'BillingState', 'BillingPostalCode',
+                                      'BillingCountry', 'ShippingStreet', 'ShippingCity', 'ShippingState',
+                                      'ShippingPostalCode', 'ShippingCountry', 'Phone', 'Website', 'Industry',
+                                      'Description'], '')
+        account_body.update(Type=None, Name='a')
+        contact_body = {'AccountId': '@{Account_0.id}', 'LastName': 'b', 'FirstName': None, 'Email': None,
+                        'EmailBouncedDate': None}
+        if DJANGO_50_PLUS:  # null values are omitted for the database defaults
+            account_body.pop('Type')
+            contact_body = {'AccountId': '@{Account_0.id}', 'LastName': 'b'}
+        url = '/services/data/v42.0/sobjects/{}'
+        self.mock_add_expected(MockJsonRequest(
+            'POST mock:///services/data/v42.0/composite/graph',
+            {'graphs': [{'graphId': 'graph_0', 'compositeRequest': [
+                {'method': 'POST', 'referenceId': 'Account_0', 'body': account_body, 'url': url.format('Account')},
+                {'method': 'POST', 'referenceId': 'Contact_1', 'body': contact_body, 'url': url.format('Contact')},
+            ]}]},
+            resp='{"graphs": [{"graphId": "graph_0", "isSuccessful": true, "graphResponse": '
+                 '{"compositeResponse": [%s, %s]}}]}' % (
+                     '{"referenceId": "Account_0", "httpStatusCode": 201, "httpHeaders": {}, '
+                     '"body": {"id": "001A", "success": true, "errors": []}}',
+                     '{"referenceId": "Contact_1", "httpStatusCode": 201, "httpHeaders": {}, '
+                     '"body": {"id": "003A", "success": true, "errors": []}}')))
+        account = Account(Name='a')
+        with mock.patch.object(query_cache, 'invalidate_after_write') as invalidate_after_write:
+            with salesforce.graph('salesforce') as g:
+                contact = g.add(Contact(last_name='b', account=account))
+                g.add(account)  # reordered: parents before children
+        invalidate_after_write.assert_called_once_with({'Account', 'Contact'})
+        self.assertEqual((account.pk, contact.pk, contact.account_id), ('001A', '003A', '001A'))
+        self.assertEqual(account._state.db, 'salesforce')
+
+    def test_unsupported(self) -> None:
+        with self.assertRaises(NotSupportedError):
+            salesforce.graph().add(Contact(pk='003A', last_name='b'))
+        with self.assertRaises(ValueError):
+            with salesforce.graph('salesforce') as g:
+                g.add(Contact(last_name='b', account=Account(Name='a')))
+
+
+class RetrieveTest(MockTestCase):
+    """Lookup by Ids by sObject Collections retrieve"""
+    api_version = '42.0'
+
+    @override_settings(SF_RETRIEVE_THRESHOLD=2)
+    def test_retrieve(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            'POST mock:///services/data/v42.0/composite/sobjects/Contact',
+            {'ids': ['003A', '003B', '003C'], 'fields': ['Id', 'LastName', 'EmailBouncedDate']},
+            resp='[%s, null, %s]' % (
+                '{"attributes": {"type": "Contact"}, "Id": "003A", "LastName": "a", '
+                '"EmailBouncedDate": "2024-01-02T03:04:05.000+0000"}',
+                '{"attributes": {"type": "Contact"}, "Id": "003C", "LastName": "c", "EmailBouncedDate": null}')))
+        contacts = Contact.objects.only('last_name', 'email_bounced_date').in_bulk(['003A', '003B', '003C', '003A'])
+        self.assertEqual(sorted(contacts), ['003A', '003C'])
+        self.assertEqual(contacts['003C'].last_name, 'c')
+        self.assertEqual(contacts['003A'].email_bounced_date,
+                         datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=pytz.utc))
+
+    @override_settings(SF_RETRIEVE_THRESHOLD=2)
+    def test_not_pure_lookup(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            "GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact+WHERE+%28Contact.LastName+"
+            "%3D+%27a%27+AND+Contact.Id+IN+%28%27003A%27%2C+%27003B%27%29%29",
+            resp='{"totalSize": 0, "done": true, "records": []}'))
+        self.assertEqual(list(Contact.objects.filter(pk__in=['003A', '003B'], last_name='a').only('pk')), [])
+
+    @skipUnless(DJANGO_40_PLUS, "filter() by a lookup expression requires Django 4.0")
+    @override_settings(SF_RETRIEVE_THRESHOLD=2)
+    def test_expression_lookup(self) -> None:
+        qs = Contact.objects.filter(In(Lower('pk'), ['003a', '003b'])).only('pk')
+        compiler = qs.query.get_compiler('salesforce')
+        compiler.as_sql()
+        self.assertIsNone(compiler.retrieve_ids())
+
+
+class RetryTest(MockTestCase):
+    api_version = '42.0'
+
+    @override_settings(SF_RETRY_POLICY={'backoff': 0})
+    def test_retry_query(self) -> None:
+        url = 'GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact'
+        self.mock_add_expected([
+            MockJsonRequest(url, resp='[{"errorCode": "SERVER_UNAVAILABLE", "message": "Server unavailable"}]',
+                            status_code=503),
+            MockJsonRequest(url, resp='{"totalSize": 0, "done": true, "records": []}'),
+        ])
+        self.assertEqual(list(Contact.objects.only('pk')), [])
+        metrics = connections['salesforce'].connection.metrics
+        self.assertGreaterEqual(metrics.retries['SERVER_UNAVAILABLE'], 1)
+        self.assertGreaterEqual(metrics.requests[('query', 'GET', '503')], 1)
+
+    @override_settings(SF_RETRY_POLICY={'backoff': 0})
+    def test_not_retried_post(self) -> None:
+        self.mock_add_expected(MockJsonRequest(
+            'POST mock:///services/data/v42.0/sobjects/Contact/', {'LastName': 'a'},
+            resp='[{"errorCode": "UNABLE_TO_LOCK_ROW", "message": "unable to obtain exclusive access"}]',
+            status_code=400))
+        with self.assertRaises(SalesforceError):
+            connections['salesforce'].connection.handle_api_exceptions(
+                'POST', 'sobjects/Contact/', json={'LastName': 'a'})
+
+
+class RateGovernorTest(MockTestCase):
+    api_version = '42.0'
+
+    def test_limits_poll(self) -> None:
+        raw_connection = connections['salesforce'].connection
+        governor = RateGovernor(poll_limits=3600, reject_usage=0.9)
+        raw_connection.governor = governor
+        try:
+            self.mock_add_expected([
+                MockJsonRequest('GET mock:///services/data/v42.0/limits/',
+                                resp='{"DailyApiRequests": {"Max": 1000, "Remaining": 50}}'),
+                MockJsonRequest('GET mock:///services/data/v42.0/query/?q=SELECT+Contact.Id+FROM+Contact',
+                                resp='{"totalSize": 0, "done": true, "records": []}'),
+            ])
+            self.assertEqual(list(Contact.objects.only('pk')), [])
+            self.assertEqual((governor.api_usage, governor.api_limit), (950, 1000))
+            with low_priority():
+                with self.assertRaises(OperationalError):
+                    list(Contact.objects.only('pk'))
+        finally:
+            raw_connection.governor = None
+
+
 def parse_this() -> MockRequest:
     # OAuth error codes are in
     # https://support.salesforce.com/articleView?id=remoteaccess_errorcodes.htm&type=5